@@ -26,6 +26,12 @@ class IsAdminUser(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated and request.user.is_superuser
 
+class CanExportCatalog(permissions.BasePermission):
+    """Staff, or professional accounts (the marketplace's partners)."""
+    def has_permission(self, request, view):
+        user = request.user
+        return user.is_authenticated and (user.is_staff or user.role == user.Role.PROFESSIONNEL)
+
 class IsPremiumUser(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated:
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsetSerializerMixin
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from .models import User, Address, ProfessionalInfo
@@ -6,7 +7,7 @@ from accounts.services import create_stripe_account
 
 User = get_user_model()
 
-class AddressSerializer(serializers.ModelSerializer):
+class AddressSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Address
         fields = [
@@ -31,7 +32,7 @@ class ProfessionalInfoSerializer(serializers.ModelSerializer):
         fields = ['company_name', 'siret_number', 'vat_number', 'company_address']
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     addresses = AddressSerializer(many=True, read_only=True)
     billing_address = AddressSerializer(read_only=True)
 
@@ -0,0 +1,31 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_autocomplete_index():
+    # The index is process-wide; rolled-back test data must not leak between tests.
+    from products.services.autocomplete import autocomplete_index
+
+    autocomplete_index.clear()
+    yield
+    autocomplete_index.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Cached search results would outlive the rolled-back rows they describe.
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_reference_tables():
+    # Process-wide copies of languages, versions, conditions and grades.
+    from products.services.reference_data import clear_reference_tables
+
+    clear_reference_tables()
+    yield
+    clear_reference_tables()
@@ -0,0 +1,171 @@
+"""
+Sparse fieldsets and explicit expansion of nested serializers.
+
+``?fields=id,price,variant.id,variant.language.code`` keeps only the listed
+fields, at any depth. ``?expand=variant`` embeds only the listed nested
+serializers and renders the others as ids; without ``expand`` they are all
+embedded as usual, and a dotted ``fields`` path implies the expansion of its
+parents. ``?expand=`` alone reduces every nested object to its id.
+
+Serializers opt in with ``SparseFieldsetSerializerMixin`` and views with
+``core.mixins.SparseFieldsetMixin``, which puts the ``Fieldset`` in the
+serializer context and rebuilds the queryset's ``select_related`` and
+``prefetch_related`` from what will actually be rendered
+(``related_lookups``).
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_paths(value):
+    """``'a,b.c,b.d'`` as ``{'a': {}, 'b': {'c': {}, 'd': {}}}``; ``None`` when absent."""
+    if value is None:
+        return None
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in filter(None, (name.strip() for name in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def _node(tree, path):
+    for name in path:
+        if tree is None:
+            return None
+        tree = tree.get(name)
+    return tree
+
+
+class Fieldset:
+    """The ``fields`` and ``expand`` trees of one request."""
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request):
+        """The request's fieldset, or ``None`` when it asks for the default representation."""
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        fields = parse_paths(request.query_params.get('fields'))
+        expand = parse_paths(request.query_params.get('expand'))
+        if fields is None and expand is None:
+            return None
+        return cls(fields, expand)
+
+    def selected(self, path):
+        """Names of the fields requested at ``path``, or ``None`` for all of them."""
+        return set(_node(self.fields, path) or ()) or None
+
+    def expansions(self, path):
+        """Names of the nested serializers explicitly expanded at ``path``."""
+        return set(_node(self.expand, path) or ())
+
+    def is_expanded(self, path):
+        """Whether the nested serializer at ``path`` is embedded rather than reduced to its id."""
+        return self.expand is None or _node(self.expand, path) is not None or bool(_node(self.fields, path))
+
+
+def serializer_path(serializer):
+    """Field names leading from the root serializer to ``serializer``."""
+    names = []
+    while serializer.parent is not None:
+        if serializer.field_name:
+            names.append(serializer.field_name)
+        serializer = serializer.parent
+    return tuple(reversed(names))
+
+
+def _nested(field):
+    return field.child if isinstance(field, serializers.ListSerializer) else field
+
+
+def _unknown(kind, path, names):
+    prefix = ''.join(f'{name}.' for name in path)
+    return ValidationError({kind: [f"Unknown field '{prefix}{name}'." for name in sorted(names)]})
+
+
+class SparseFieldsetSerializerMixin:
+    """Applies the context's ``fieldset`` to this serializer's fields."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get('fieldset')
+        if fieldset is None:
+            return fields
+        path = serializer_path(self)
+        readable = {name: field for name, field in fields.items() if not field.write_only}
+
+        selected = fieldset.selected(path)
+        if selected is not None:
+            if selected - set(readable):
+                raise _unknown('fields', path, selected - set(readable))
+            readable = {name: field for name, field in readable.items() if name in selected}
+
+        expandable = {
+            name for name, field in readable.items() if isinstance(_nested(field), serializers.ModelSerializer)
+        }
+        if fieldset.expansions(path) - expandable:
+            raise _unknown('expand', path, fieldset.expansions(path) - expandable)
+        for name in expandable:
+            if not fieldset.is_expanded((*path, name)):
+                field = readable[name]
+                kwargs = {'source': field.source} if field.source not in (None, name) else {}
+                readable[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True, many=isinstance(field, serializers.ListSerializer), **kwargs
+                )
+        return readable
+
+
+def related_lookups(serializer):
+    """
+    ``select_related`` and ``prefetch_related`` lookups covering what
+    ``serializer`` renders. Forward relations are joined unless they come from
+    a prefetch; to-many relations, even reduced to ids, are prefetched.
+    Nested serializers marked ``served_from_cache`` need no query, and
+    ``method_relations`` names the relations read by method fields.
+    """
+    select, prefetch = [], []
+
+    def collect(serializer, prefix, prefetching):
+        serializer = _nested(serializer)
+        model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+        if model is None:
+            return
+        method_relations = getattr(serializer, 'method_relations', {})
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            for relation in method_relations.get(name, ()):
+                (prefetch if prefetching else select).append(prefix + relation)
+            source = field.source
+            if source == '*' or '.' in source:
+                continue
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                continue
+            if not model_field.is_relation:
+                continue
+            path = prefix + source
+            many = model_field.many_to_many or model_field.one_to_many
+            nested = _nested(field)
+            if not isinstance(nested, serializers.BaseSerializer):
+                if many:
+                    prefetch.append(path)
+                continue
+            if not many and getattr(nested, 'served_from_cache', False):
+                continue
+            if many or prefetching:
+                prefetch.append(path)
+                collect(nested, f'{path}__', True)
+            else:
+                select.append(path)
+                collect(nested, f'{path}__', False)
+
+    collect(serializer, '', False)
+    return list(dict.fromkeys(select)), list(dict.fromkeys(prefetch))
@@ -1,9 +1,16 @@
 """
 Custom mixins for consistent API behavior.
 """
+import hashlib
+import time
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import status
 from rest_framework.response import Response
 from .exceptions import APIResponse
+from .fieldsets import Fieldset, related_lookups
+from .table_versions import table_versions
 
 
 class StandardResponseMixin:
@@ -61,6 +68,7 @@ class StandardResponseMixin:
                 meta={
                     'pagination': {
                         'count': paginated_response.data['count'],
+                        'count_exact': paginated_response.data.get('count_exact', True),
                         'next': paginated_response.data['next'],
                         'previous': paginated_response.data['previous'],
                     }
@@ -191,4 +199,80 @@ class BusinessLogicMixin:
                     'field': field
                 }
             )
-        return None
\ No newline at end of file
+        return None
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for read-mostly ViewSets.
+
+    ``list`` and ``retrieve`` responses carry an ``ETag`` and a
+    ``Last-Modified`` date derived from the version stamps of
+    ``conditional_tables`` (see ``core.table_versions``). A request whose
+    ``If-None-Match`` or ``If-Modified-Since`` still matches gets a 304 before
+    anything is queried or serialized. Whatever writes to these tables must
+    bump their stamps.
+
+    HTTP dates have whole-second precision, so ``Last-Modified`` is the stamp
+    rounded up and is only sent once that second is over: a write later in
+    the same second could otherwise be answered with a 304. Until then the
+    ``ETag`` alone validates.
+    """
+    conditional_tables = ()
+
+    def get_validators(self, request):
+        versions = table_versions(*self.conditional_tables)
+        seed = '|'.join([
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+            *map(str, versions),
+        ])
+        etag = f'W/"{hashlib.md5(seed.encode("utf-8")).hexdigest()}"'
+        last_modified = -(-max(versions) // 10**9)
+        return etag, (last_modified if last_modified <= time.time() else None)
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        not_modified = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        response = not_modified or handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+
+class SparseFieldsetMixin:
+    """
+    ``?fields=`` and ``?expand=`` on read requests (see ``core.fieldsets``).
+
+    The serializer renders only the requested fields, and the queryset's
+    ``select_related`` and ``prefetch_related`` are rebuilt from them, so a
+    client asking for ids and prices neither receives nor pays for the nested
+    objects. Without either parameter the view is unchanged.
+    """
+
+    def get_fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = Fieldset.from_request(getattr(self, 'request', None))
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fieldset'] = self.get_fieldset()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.get_fieldset() is None:
+            return queryset
+        select, prefetch = related_lookups(self.get_serializer())
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        return queryset.prefetch_related(*prefetch)
@@ -0,0 +1,338 @@
+"""
+Pagination classes shared by the list endpoints.
+
+``KeysetPagination`` pages on the view's sort columns instead of an offset:
+the cursor holds the sort values of the last row served and the next page is
+``WHERE (sort columns) < cursor``. Every page costs one index range scan, no
+``COUNT(*)`` is issued, and rows inserted meanwhile never shift or repeat
+results. The last sort column must be unique (the primary key), and sort
+columns must be plain fields or annotations that are never NULL: a NULL fails
+both ``<`` and ``>``, so its row would be skipped. Other orderings are answered
+with a 400 asking for page numbers.
+
+``KeysetOrPageNumberPagination`` serves keyset pages when the request asks
+for them (``?pagination=cursor`` or a ``cursor`` parameter) and classic page
+numbers otherwise.
+
+``BoundedCountPageNumberPagination`` (the project default) counts exactly up
+to ``PAGINATION_COUNT_CAP`` rows only; past the cap ``count`` is the
+PostgreSQL planner's row estimate and ``count_exact`` is false. An estimate is
+only reported, never used for paging: any page number is served, and whether
+a next page exists is decided by fetching one extra row.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    payload = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, size):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise NotFound('Invalid cursor.')
+    if not isinstance(values, list) or len(values) != size:
+        raise NotFound('Invalid cursor.')
+    return values
+
+
+def keyset_condition(ordering, values):
+    """
+    Rows strictly after ``values`` in ``ordering``, e.g. for
+    ``('-created_at', '-pk')``:
+    ``created_at <= v0 AND (created_at < v0 OR (created_at = v0 AND pk < v1))``.
+    The redundant leading bound lets the database start the index scan at the
+    cursor instead of filtering every earlier row.
+    """
+    first = ordering[0]
+    bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+    condition = Q()
+    for position, term in enumerate(ordering):
+        field = term.lstrip('-')
+        lookup = 'lt' if term.startswith('-') else 'gt'
+        step = Q(**{f'{field}__{lookup}': values[position]})
+        for previous, value in zip(ordering[:position], values):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return bound & condition
+
+
+def _sort_field(model, name):
+    """``(field, nullable)`` for the sort column ``name``, following relations."""
+    nullable = False
+    field = None
+    for part in name.split('__'):
+        if model is None:
+            raise FieldDoesNotExist(name)
+        field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+        nullable = nullable or field.null
+        model = field.related_model
+    return field, nullable
+
+
+def _excludes_nulls(queryset, field):
+    """Whether ``queryset`` is filtered on ``field__isnull=False`` at the top level."""
+    where = queryset.query.where
+    if where.connector != 'AND' or where.negated:
+        return False
+    return any(
+        getattr(child, 'lookup_name', None) == 'isnull'
+        and child.rhs is False
+        and getattr(child.lhs, 'target', None) is field
+        for child in where.children
+    )
+
+
+def estimate_count(queryset):
+    """Planner row estimate for ``queryset`` on PostgreSQL, else ``None``."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def bounded_count(queryset, cap):
+    """
+    ``(count, exact)``: the exact count when it is at most ``cap``, found by
+    counting at most ``cap + 1`` rows, else the planner estimate (never below
+    ``cap + 1``). Backends without estimates always count exactly.
+    """
+    counted = queryset.order_by()[:cap + 1].count()
+    if counted <= cap:
+        return counted, True
+    estimate = estimate_count(queryset)
+    if estimate is None:
+        return queryset.count(), True
+    return max(estimate, cap + 1), False
+
+
+class EstimatedCountPage(Page):
+    """A page that knows whether another follows from its rows, not from the count."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class BoundedCountPaginator(Paginator):
+    count_cap = 1000
+    count_exact = True
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+        count, self.count_exact = bounded_count(self.object_list, self.count_cap)
+        return count
+
+    def validate_number(self, number):
+        self.count
+        if self.count_exact:
+            return super().validate_number(number)
+        # An estimated count gives no upper bound on the page number.
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_exact:
+            return super().page(number)
+        # Read one row past the page to tell whether another one follows.
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_('That page contains no results'))
+        return EstimatedCountPage(rows[:self.per_page], number, self, len(rows) > self.per_page)
+
+
+class BoundedCountPageNumberPagination(PageNumberPagination):
+    """Page numbers with an exact count up to ``PAGINATION_COUNT_CAP``, estimated above."""
+
+    def django_paginator_class(self, *args, **kwargs):
+        paginator = BoundedCountPaginator(*args, **kwargs)
+        paginator.count_cap = getattr(settings, 'PAGINATION_COUNT_CAP', 1000)
+        return paginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_exact'] = self.page.paginator.count_exact
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_exact'] = {'type': 'boolean', 'example': True}
+        return response_schema
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only cursor pagination on a composite sort key.
+
+    The sort key is the queryset's own ordering (explicit ``order_by()`` or the
+    model's ``Meta.ordering``), else ``view.keyset_ordering``, else newest
+    first; the primary key is appended as the tie-breaker.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-pk')
+
+    def get_ordering(self, queryset, view):
+        ordering = (
+            tuple(queryset.query.order_by)
+            or tuple(queryset.model._meta.ordering)
+            or tuple(getattr(view, 'keyset_ordering', self.ordering))
+        )
+        if not all(isinstance(term, str) for term in ordering):
+            raise ValidationError({'pagination': ['This ordering cannot be paged with a cursor; use page numbers.']})
+        for term in ordering:
+            name = term.lstrip('-')
+            if name in queryset.query.annotations:
+                continue
+            try:
+                field, nullable = _sort_field(queryset.model, name)
+            except FieldDoesNotExist:
+                raise ValidationError({'pagination': [f"Cannot page on '{name}' with a cursor; use page numbers."]})
+            if nullable and not _excludes_nulls(queryset, field):
+                raise ValidationError({'pagination': [f"Cannot page on nullable '{name}' with a cursor; use page numbers."]})
+        if ordering[-1].lstrip('-') != 'pk':
+            ordering += ('-pk' if ordering[-1].startswith('-') else 'pk',)
+        return ordering
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset, view)
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values = decode_cursor(cursor, len(self.ordering))
+            queryset = queryset.filter(keyset_condition(self.ordering, values))
+
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        page = rows[:page_size]
+        self.next_values = self.get_values(page[-1]) if self.has_next else None
+        return page
+
+    def get_values(self, row):
+        if isinstance(row, dict):
+            # values() rows; they must carry every sort column, 'pk' included.
+            return [row[term.lstrip('-')] for term in self.ordering]
+        return [getattr(row, term.lstrip('-')) for term in self.ordering]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            remove_query_param(self.base_url, 'page'),
+            self.cursor_query_param,
+            encode_cursor(self.next_values),
+        )
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def to_html(self):
+        return ''
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetOrPageNumberPagination(BasePagination):
+    """Page numbers by default; keyset pages on ``?pagination=cursor`` or ``?cursor=``."""
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+    page_number_class = BoundedCountPageNumberPagination
+
+    def __init__(self):
+        self.keyset = self.keyset_class()
+        self.page_number = self.page_number_class()
+        self.current = self.page_number
+
+    def use_keyset(self, request):
+        params = request.query_params
+        return params.get(self.mode_query_param) == 'cursor' or self.keyset.cursor_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.current = self.keyset if self.use_keyset(request) else self.page_number
+        return self.current.paginate_queryset(queryset, request, view)
+
+    @property
+    def display_page_controls(self):
+        return self.current.display_page_controls
+
+    def get_paginated_response(self, data):
+        return self.current.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def get_schema_fields(self, view):
+        return self.page_number.get_schema_fields(view)
+
+    def get_schema_operation_parameters(self, view):
+        return self.page_number.get_schema_operation_parameters(view)
+
+    def to_html(self):
+        return self.current.to_html()
@@ -22,6 +22,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'drf_yasg',
@@ -85,7 +86,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.BoundedCountPageNumberPagination',
     'PAGE_SIZE': int(os.getenv('DEFAULT_PAGE_SIZE', '20')),
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
@@ -96,7 +97,8 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': os.getenv('ANON_THROTTLE_RATE', '100/hour'),
-        'user': os.getenv('USER_THROTTLE_RATE', '1000/hour')
+        'user': os.getenv('USER_THROTTLE_RATE', '1000/hour'),
+        'exports': os.getenv('EXPORT_THROTTLE_RATE', '20/hour'),
     },
     'EXCEPTION_HANDLER': 'core.exceptions.custom_exception_handler',
 }
@@ -169,6 +171,33 @@ STRIPE_ONBOARDING_RETURN_URL = os.getenv('STRIPE_ONBOARDING_RETURN_URL')
 PLATFORM_COMMISSION_PERCENT = float(os.getenv('PLATFORM_COMMISSION_PERCENT', '0.05'))
 CART_RESERVATION_MINUTES = int(os.getenv('CART_RESERVATION_MINUTES', '30'))
 
+# Paginated counts are exact up to this many rows, planner estimates above it
+PAGINATION_COUNT_CAP = int(os.getenv('PAGINATION_COUNT_CAP', '1000'))
+
+# Search Configuration
+# Engine behind listing and product search (see products.services.backends)
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'products.services.backends.DatabaseSearchBackend')
+SEARCH_TRIGRAM_THRESHOLD = float(os.getenv('SEARCH_TRIGRAM_THRESHOLD', '0.5'))
+AUTOCOMPLETE_MAX_AGE = int(os.getenv('AUTOCOMPLETE_MAX_AGE', '300'))  # seconds before a worker rebuilds its index
+AUTOCOMPLETE_HISTORY_TERMS = int(os.getenv('AUTOCOMPLETE_HISTORY_TERMS', '1000'))
+# Shared memory-mapped index written by `build_autocomplete_index`; empty keeps a per-worker index
+AUTOCOMPLETE_INDEX_PATH = os.getenv('AUTOCOMPLETE_INDEX_PATH', '')
+# Search history is written in batches by a background thread
+SEARCH_HISTORY_ENABLED = os.getenv('SEARCH_HISTORY_ENABLED', 'True').lower() == 'true'
+SEARCH_HISTORY_BUFFERED = os.getenv('SEARCH_HISTORY_BUFFERED', 'True').lower() == 'true'
+SEARCH_HISTORY_BUFFER_SIZE = int(os.getenv('SEARCH_HISTORY_BUFFER_SIZE', '100'))
+SEARCH_HISTORY_FLUSH_INTERVAL = float(os.getenv('SEARCH_HISTORY_FLUSH_INTERVAL', '5'))
+SEARCH_FACETS_CACHE_TIMEOUT = int(os.getenv('SEARCH_FACETS_CACHE_TIMEOUT', '60'))  # seconds
+# Search responses are cached until a write bumps their tcg_type generation; 0 disables
+SEARCH_RESULT_CACHE_TIMEOUT = int(os.getenv('SEARCH_RESULT_CACHE_TIMEOUT', '300'))
+# Seconds a process serves its copy of languages, versions, conditions and grades
+# before checking the shared version stamp for edits made by other processes
+REFERENCE_CACHE_CHECK_INTERVAL = float(os.getenv('REFERENCE_CACHE_CHECK_INTERVAL', '1'))
+# Rows fetched per server-side cursor round trip by the streaming exports
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+# Listing, variant and search lists rendered from values() rows (see products.services.fast_read)
+FAST_READ_PATH = os.getenv('FAST_READ_PATH', 'True').lower() == 'true'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
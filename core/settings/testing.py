@@ -35,7 +35,8 @@ MEDIA_ROOT = '/tmp/test_media'
 # Disable throttling for tests
 REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = {
     'anon': '1000/hour',
-    'user': '10000/hour'
+    'user': '10000/hour',
+    'exports': '1000/hour',
 }
 
 # Faster password hashing for tests
@@ -67,5 +68,8 @@ LOGGING = {
 SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'] = timedelta(minutes=5)
 SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'] = timedelta(minutes=10)
 
+# Write search history synchronously so tests can assert on it
+SEARCH_HISTORY_BUFFERED = False
+
 # Disable CORS checks for tests
 CORS_ALLOW_ALL_ORIGINS = True
\ No newline at end of file
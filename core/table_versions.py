@@ -0,0 +1,41 @@
+"""
+Version stamps of rarely changing tables, shared by every process through the
+Django cache.
+
+A stamp is the ``time.time_ns()`` of the table's last write: writers call
+``bump_table_versions`` and readers compare stamps to know whether data they
+hold (an in-process copy, a client's cached response) is still current. Using
+the write time rather than a counter makes concurrent bumps always produce a
+new value and doubles as the ``Last-Modified`` date. A stamp missing from the
+cache is re-seeded with the current time, which only ever causes a reload.
+"""
+import time
+
+from django.core.cache import cache
+
+VERSION_PREFIX = 'table:version:'
+
+
+def _key(name):
+    return f'{VERSION_PREFIX}{name}'
+
+
+def table_version(name):
+    """Current stamp of table ``name``."""
+    key = _key(name)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, time.time_ns(), None)
+        value = cache.get(key)
+    return value
+
+
+def table_versions(*names):
+    """Stamps of several tables with a single cache round trip when all are set."""
+    found = cache.get_many([_key(name) for name in names])
+    return tuple(found.get(_key(name)) or table_version(name) for name in names)
+
+
+def bump_table_versions(*names):
+    stamp = time.time_ns()
+    cache.set_many({_key(name): stamp for name in names}, None)
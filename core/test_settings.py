@@ -13,3 +13,6 @@ DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
 # Allow anonymous access in tests unless views specify otherwise
 REST_FRAMEWORK['DEFAULT_PERMISSION_CLASSES'] = []
+
+# Write search history synchronously so tests can assert on it
+SEARCH_HISTORY_BUFFERED = False
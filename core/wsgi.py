@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Load the search autocomplete index before the worker serves requests.
+from products.services.autocomplete import warm_up  # noqa: E402
+
+warm_up()
+
@@ -1,11 +1,12 @@
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsetSerializerMixin
 from .models import Dispute, DisputeMessage
 from orders.serializers import OrderSerializer
 from orders.models import Order
 from accounts.serializers import UserSerializer
 
 
-class DisputeMessageSerializer(serializers.ModelSerializer):
+class DisputeMessageSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
 
     class Meta:
@@ -20,7 +21,7 @@ class DisputeMessageSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "sender", "created_at"]
 
 
-class DisputeSerializer(serializers.ModelSerializer):
+class DisputeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     initiator = UserSerializer(read_only=True)
     moderator = UserSerializer(read_only=True)
     order = OrderSerializer(read_only=True)
@@ -86,3 +86,30 @@ def test_access_rights():
     url = reverse("dispute-list")
     resp = client.post(url, {"order_id": order.id})
     assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+def test_dispute_list_with_sparse_fields():
+    buyer = User.objects.create_user(username="buyer", password="pass")
+    for _ in range(3):
+        order = Order.objects.create(
+            buyer=buyer,
+            base_price=10,
+            buyer_processing_fee=1,
+            buyer_shipping_fee=1,
+            buyer_total_price=12,
+        )
+        Dispute.objects.create(order=order, initiator=buyer)
+    client = APIClient()
+    client.force_authenticate(user=buyer)
+    url = reverse("dispute-list")
+
+    response = client.get(url, {"fields": "id,status,order.id,order.buyer_total_price"})
+    assert response.status_code == 200
+    rows = response.json()["results"]
+    assert set(rows[0]) == {"id", "status", "order"}
+    assert set(rows[0]["order"]) == {"id", "buyer_total_price"}
+
+    collapsed = client.get(url, {"fields": "id,order,initiator", "expand": ""}).json()["results"]
+    assert {row["order"] for row in collapsed} == set(Order.objects.values_list("id", flat=True))
+    assert collapsed[0]["initiator"] == buyer.id
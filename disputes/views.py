@@ -6,11 +6,13 @@ from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from core.mixins import SparseFieldsetMixin
+
 from .models import Dispute, DisputeMessage
 from .serializers import DisputeSerializer, DisputeMessageSerializer
 
 
-class DisputeViewSet(viewsets.ModelViewSet):
+class DisputeViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     Dispute management for order issues.
     
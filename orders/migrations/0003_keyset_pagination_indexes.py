@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_cartitem_orders_cart_buyer_i_fa467a_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['buyer', '-created_at', '-id'], name='orders_buyer_created_id_idx'),
+        ),
+    ]
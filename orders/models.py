@@ -61,6 +61,7 @@ class Order(models.Model):
             models.Index(fields=['stripe_payment_intent_id']),
             models.Index(fields=['buyer', 'status']),
             models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['buyer', '-created_at', '-id'], name='orders_buyer_created_id_idx'),
         ]
 
     def __str__(self):
@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsetSerializerMixin
 from .models import Order, CartItem, OrderItem
 from accounts.serializers import UserSerializer, AddressSerializer
 from products.serializers import ListingSerializer
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     listing = ListingSerializer(read_only=True)
 
     class Meta:
@@ -11,7 +12,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'listing', 'quantity']
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     buyer = UserSerializer(read_only=True)
     items = OrderItemSerializer(many=True, read_only=True)
     buyer_address = AddressSerializer(read_only=True)
@@ -37,7 +38,7 @@ class OrderSerializer(serializers.ModelSerializer):
         return value
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     listing = ListingSerializer(read_only=True)
 
     class Meta:
@@ -11,6 +11,8 @@ from accounts.services import create_payment_intent, confirm_payment_intent
 from django.conf import settings
 from .serializers import OrderSerializer, CartItemSerializer
 from accounts.permissions import IsBuyer, IsSeller
+from core.mixins import SparseFieldsetMixin
+from core.pagination import KeysetOrPageNumberPagination
 from accounts.models import Address
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -19,7 +21,7 @@ from datetime import timedelta
 User = get_user_model()
 
 
-class CartItemViewSet(viewsets.ModelViewSet):
+class CartItemViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = CartItemSerializer
     permission_classes = [IsAuthenticated]
 
@@ -47,9 +49,11 @@ class CartItemViewSet(viewsets.ModelViewSet):
         serializer.save(buyer=self.request.user, listing=listing, quantity=quantity, reserved_until=reserved_until)
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    pagination_class = KeysetOrPageNumberPagination
+    keyset_ordering = ('-created_at', '-pk')
 
     def get_permissions(self):
         if self.action in ['create']:
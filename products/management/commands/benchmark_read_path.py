@@ -0,0 +1,32 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from products.services.benchmark import run_read_path_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Compare serializer and values() fast-path rendering of listing and variant pages as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', type=int, nargs='+', default=[20, 100, 500])
+        parser.add_argument('--repeat', type=int, default=20, help='Measured renders per page size.')
+        parser.add_argument('--warmup', type=int, default=2, help='Unmeasured renders run first.')
+        parser.add_argument('--output', default='', help='Write the report to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        report = run_read_path_benchmark(
+            page_sizes=options['page_sizes'], repeat=options['repeat'], warmup=options['warmup'],
+        )
+        payload = json.dumps(report, indent=2)
+        if not options['output']:
+            self.stdout.write(payload)
+            return
+        with open(options['output'], 'w') as output:
+            output.write(payload + '\n')
+        for name, result in report['results'].items():
+            self.stdout.write(
+                f"{name}: {result['serializer'].get('p50_ms')} ms -> {result['fast'].get('p50_ms')} ms "
+                f"(x{result['speedup']})"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}."))
@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from products.services.benchmark import run_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Replay a mix of search requests and report p50/p95/p99 latency and query counts as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Measured requests.')
+        parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests run first.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the request mix.')
+        parser.add_argument('--backend', default='', help='Dotted path of the search backend to use.')
+        parser.add_argument('--with-cache', action='store_true', help='Keep the search result and facet caches on.')
+        parser.add_argument('--output', default='', help='Write the report to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        report = run_benchmark(
+            requests=options['requests'],
+            warmup=options['warmup'],
+            seed=options['seed'],
+            backend=options['backend'] or None,
+            use_cache=options['with_cache'],
+        )
+        payload = json.dumps(report, indent=2)
+        if not options['output']:
+            self.stdout.write(payload)
+            return
+        with open(options['output'], 'w') as output:
+            output.write(payload + '\n')
+        overall = report['overall']
+        self.stdout.write(self.style.SUCCESS(
+            f"{overall['count']} requests: p50 {overall.get('p50_ms')} ms, p95 {overall.get('p95_ms')} ms, "
+            f"p99 {overall.get('p99_ms')} ms. Report written to {options['output']}."
+        ))
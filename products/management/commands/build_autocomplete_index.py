@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from products.services.autocomplete import load_term_weights
+from products.services.shared_index import write_index_file
+
+
+class Command(BaseCommand):
+    help = 'Write the shared memory-mapped autocomplete index read by every worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=getattr(settings, 'AUTOCOMPLETE_INDEX_PATH', ''),
+            help='Index file to (atomically) replace. Defaults to AUTOCOMPLETE_INDEX_PATH.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['output']
+        if not path:
+            raise CommandError('No output path: pass --output or set AUTOCOMPLETE_INDEX_PATH.')
+        weights, _ = load_term_weights()
+        generation = write_index_file(path, weights)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {len(weights)} terms to {path} (generation {generation}).'
+        ))
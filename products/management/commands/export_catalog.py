@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Product
+from products.services.exports import EXPORTS, FORMATS, export_lines
+from products.services.product_stats import available_listings
+
+
+class Command(BaseCommand):
+    help = 'Stream all products or all available listings as JSON Lines or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--output', default='-', help='File to write; "-" for standard output.')
+        parser.add_argument('--tcg-type', help='Only export this TCG type.')
+        parser.add_argument('--chunk-size', type=int, help='Rows fetched per round trip.')
+
+    def handle(self, *args, **options):
+        kind, tcg_type = options['kind'], options['tcg_type']
+        if kind == 'products':
+            queryset = Product.objects.all()
+            if tcg_type:
+                queryset = queryset.filter(tcg_type=tcg_type)
+        else:
+            queryset = available_listings()
+            if tcg_type:
+                queryset = queryset.filter(product__tcg_type=tcg_type)
+
+        lines = export_lines(kind, options['format'], queryset, chunk_size=options['chunk_size'])
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        count = 0
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            for line in lines:
+                output.write(line)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} lines to {options["output"]}.'))
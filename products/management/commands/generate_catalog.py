@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.services.catalog_generator import generate_catalog
+
+
+class Command(BaseCommand):
+    help = 'Insert a synthetic TCG catalog (products, variants, listings) for search benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--variants', type=int, default=500_000)
+        parser.add_argument('--listings', type=int, default=2_000_000)
+        parser.add_argument('--sellers', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed builds the same catalog.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows written per statement.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            counts = generate_catalog(
+                products=options['products'],
+                variants=options['variants'],
+                listings=options['listings'],
+                sellers=options['sellers'],
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+                log=self.stdout.write,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Generated {products} products, {variants} variants, {listings} listings '
+            'and {documents} search documents.'.format(**counts)
+        ))
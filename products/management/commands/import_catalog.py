@@ -0,0 +1,55 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.services.catalog_import import FORMATS, detect_format, import_catalog, read_records
+
+
+class Command(BaseCommand):
+    help = 'Import products with their variants and images from a CSV or JSON Lines file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file to import.')
+        parser.add_argument('--format', choices=FORMATS, help='Input format; guessed from the file extension by default.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Products written per transaction.')
+        parser.add_argument('--skip', type=int, default=0, help='Input rows to skip before importing.')
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Skip the rows already imported according to the checkpoint file.',
+        )
+        parser.add_argument('--checkpoint', help='Checkpoint file; defaults to <path>.checkpoint.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        try:
+            format = options['format'] or detect_format(path)
+        except ValueError as exc:
+            raise CommandError(exc)
+        skip = options['skip']
+        if options['resume'] and os.path.exists(checkpoint):
+            with open(checkpoint) as handle:
+                skip = int(handle.read().strip() or 0)
+            self.stdout.write(f'Resuming after row {skip}')
+
+        def save_checkpoint(position, counts):
+            with open(f'{checkpoint}.tmp', 'w') as handle:
+                handle.write(str(position))
+            os.replace(f'{checkpoint}.tmp', checkpoint)
+            self.stdout.write(f'{position} rows: {counts["products"]} products, {counts["variants"]} variants')
+
+        with open(path, newline='', encoding='utf-8') as stream:
+            counts = import_catalog(
+                read_records(stream, format, skip=skip),
+                batch_size=options['batch_size'],
+                on_batch=save_checkpoint,
+            )
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        for position, message in counts.errors:
+            self.stderr.write(f'Row {position}: {message}')
+        self.stdout.write(self.style.SUCCESS(
+            'Imported {products} products ({existing} already present), {variants} variants '
+            'and {images} images; {rejected} records rejected.'.format(**counts)
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from products.services.documents import sync_search_documents
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized search document of every listing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Documents written per statement.')
+
+    def handle(self, *args, **options):
+        upserted, deleted = sync_search_documents(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {upserted} search documents, removed {deleted} stale ones.'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.services.product_stats import rebuild_listing_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product and variant listing stats from the listings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows written per statement.')
+
+    def handle(self, *args, **options):
+        written = rebuild_listing_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} product and variant stats rows.'))
@@ -0,0 +1,39 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# Trigram GIN indexes backing the fuzzy (%>) lookups on product text columns.
+# PostgreSQL only; TrigramExtension itself is a no-op on other backends.
+TRIGRAM_INDEXES = {
+    'products_pr_name_trgm': 'name',
+    'products_pr_series_trgm': 'series',
+    'products_pr_block_trgm': 'block',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON products_product USING gin ({column} gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_listing_products_li_status_035c3b_idx_and_more'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:16
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.text
+
+
+# GIN indexes (full-text and trigram) and the backfill only exist on
+# PostgreSQL; elsewhere documents are filled by products.services.documents.
+DOCUMENT_INDEXES = {
+    'products_lsd_search_vector_gin': 'search_vector',
+    'products_lsd_name_trgm': 'product_name gin_trgm_ops',
+    'products_lsd_series_trgm': 'product_series gin_trgm_ops',
+    'products_lsd_block_trgm': 'product_block gin_trgm_ops',
+}
+
+BACKFILL_SQL = """
+INSERT INTO products_listingsearchdocument (
+    listing_id, product_id, variant_id, product_name, product_series, product_block, tcg_type,
+    language_code, version_code, condition_code, grader, grade_value, labels,
+    price, stock, created_at
+)
+SELECT li.id, p.id, v.id, p.name, p.series, p.block, p.tcg_type,
+       l.code, ver.code, c.code, g.grader, g.value,
+       left(concat_ws(' ', l.name, l.code, ver.name, c.label, g.grader, g.value::text), 400),
+       li.price, li.stock, li.created_at
+FROM products_listing li
+JOIN products_product p ON p.id = li.product_id
+JOIN products_variant v ON v.id = li.variant_id
+JOIN products_language l ON l.id = v.language_id
+JOIN products_version ver ON ver.id = v.version_id
+JOIN products_condition c ON c.id = v.condition_id
+LEFT JOIN products_grade g ON g.id = v.grade_id
+WHERE li.status = 'active'
+"""
+
+VECTOR_SQL = """
+UPDATE products_listingsearchdocument
+SET search_vector =
+    setweight(to_tsvector('simple', coalesce(product_name, '')), 'A')
+    || setweight(to_tsvector('simple', concat_ws(' ', product_series, product_block)), 'B')
+    || setweight(to_tsvector('simple', labels), 'C')
+"""
+
+
+def create_document_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in DOCUMENT_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON products_listingsearchdocument USING gin ({column})"
+        )
+    schema_editor.execute(BACKFILL_SQL)
+    schema_editor.execute(VECTOR_SQL)
+
+
+def drop_document_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in DOCUMENT_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingSearchDocument',
+            fields=[
+                ('listing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='products.listing')),
+                ('product_name', models.CharField(max_length=200)),
+                ('product_series', models.CharField(blank=True, max_length=100, null=True)),
+                ('product_block', models.CharField(blank=True, max_length=100, null=True)),
+                ('tcg_type', models.CharField(max_length=50)),
+                ('language_code', models.CharField(max_length=10)),
+                ('version_code', models.CharField(max_length=50)),
+                ('condition_code', models.CharField(max_length=20)),
+                ('grader', models.CharField(blank=True, max_length=20, null=True)),
+                ('grade_value', models.DecimalField(blank=True, decimal_places=1, max_digits=4, null=True)),
+                ('labels', models.CharField(blank=True, default='', max_length=400)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('stock', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product')),
+                ('variant', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.variant')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at'], name='products_lsd_created_idx'), models.Index(condition=models.Q(('stock__gt', 0)), fields=['-created_at'], name='products_lsd_in_stock_idx'), models.Index(fields=['price'], name='products_lsd_price_idx'), models.Index(fields=['tcg_type', '-created_at'], name='products_lsd_tcg_created_idx'), models.Index(fields=['tcg_type', 'price'], name='products_lsd_tcg_price_idx'), models.Index(fields=['language_code', 'condition_code', 'price'], name='products_lsd_lang_cond_idx'), models.Index(fields=['version_code'], name='products_lsd_version_idx'), models.Index(fields=['grader', 'grade_value'], name='products_lsd_grade_idx'), models.Index(fields=['product', 'price'], name='products_lsd_product_idx'), models.Index(django.db.models.functions.text.Upper('product_series'), name='products_lsd_series_idx'), models.Index(django.db.models.functions.text.Upper('product_block'), name='products_lsd_block_idx')],
+            },
+        ),
+        migrations.RunPython(create_document_indexes, drop_document_indexes),
+    ]
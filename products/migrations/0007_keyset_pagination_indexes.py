@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_listingsearchdocument'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='listingsearchdocument',
+            name='products_lsd_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listingsearchdocument',
+            name='products_lsd_in_stock_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='listingsearchdocument',
+            name='products_lsd_price_idx',
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['-created_at', '-id'], name='products_li_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['price', 'id'], name='products_li_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listingsearchdocument',
+            index=models.Index(fields=['-created_at', '-listing'], name='products_lsd_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listingsearchdocument',
+            index=models.Index(condition=models.Q(('stock__gt', 0)), fields=['-created_at', '-listing'], name='products_lsd_in_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listingsearchdocument',
+            index=models.Index(fields=['price', 'listing'], name='products_lsd_price_idx'),
+        ),
+    ]
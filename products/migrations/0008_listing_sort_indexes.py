@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['variant', 'price', 'id'], name='products_li_variant_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listingsearchdocument',
+            index=models.Index(condition=models.Q(('grade_value__isnull', False)), fields=['-grade_value', 'price', 'listing'], name='products_lsd_grade_sort_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listingsearchdocument',
+            index=models.Index(fields=['variant', 'price', 'listing'], name='products_lsd_variant_price_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BACKFILL_SQL = """
+INSERT INTO products_{model}stats ({column}, min_price, price_total, total_stock, listing_count)
+SELECT {column}, MIN(price), SUM(price), SUM(stock), COUNT(*)
+FROM products_listing
+WHERE status = 'active' AND stock > 0
+GROUP BY {column}
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_listing_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductStats',
+            fields=[
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('price_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_stock', models.PositiveIntegerField(default=0)),
+                ('listing_count', models.PositiveIntegerField(default=0)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='products.product')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='VariantStats',
+            fields=[
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('price_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_stock', models.PositiveIntegerField(default=0)),
+                ('listing_count', models.PositiveIntegerField(default=0)),
+                ('variant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='products.variant')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunSQL(
+            BACKFILL_SQL.format(model='product', column='product_id'), migrations.RunSQL.noop
+        ),
+        migrations.RunSQL(
+            BACKFILL_SQL.format(model='variant', column='variant_id'), migrations.RunSQL.noop
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:37
+
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def path_of(category_id):
+        if category_id not in paths:
+            parent_id = parents[category_id]
+            paths[category_id] = (path_of(parent_id) if parent_id else '') + f'{category_id}/'
+        return paths[category_id]
+
+    categories = list(Category.objects.all())
+    for category in categories:
+        category.path = path_of(category.id)
+    Category.objects.bulk_update(categories, ['path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_listing_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='products_category_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
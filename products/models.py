@@ -1,4 +1,9 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr, Upper
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 from django.conf import settings
@@ -8,17 +13,47 @@ class Category(models.Model):
     description = models.TextField(blank=True, null=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
+    # Materialized path of ids from the root, e.g. "3/12/40/": a subtree is
+    # every row whose path starts with its root's path.
+    path = models.CharField(max_length=255, default='', editable=False)
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = self.name.lower().replace(' ', '-')
-        super().save(*args, **kwargs)
+        parent_path = ''
+        if self.parent_id:
+            parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).get()
+            if self.path and parent_path.startswith(self.path):
+                raise ValidationError("A category cannot be moved under itself or one of its descendants.")
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._move_subtree(f"{parent_path}{self.pk}/")
+
+    def _move_subtree(self, path):
+        old_path = Category.objects.filter(pk=self.pk).values_list('path', flat=True).get()
+        if path == old_path:
+            self.path = path
+            return
+        if old_path:
+            Category.objects.filter(path__startswith=old_path).update(
+                path=Concat(Value(path), Substr('path', len(old_path) + 1))
+            )
+        else:
+            Category.objects.filter(pk=self.pk).update(path=path)
+        self.path = path
+
+    def is_descendant_of(self, other):
+        return self.path.startswith(other.path) and self.pk != other.pk
 
     def __str__(self):
         return self.name
 
     class Meta:
         verbose_name_plural = "categories"
+        indexes = [
+            # varchar_pattern_ops lets PostgreSQL serve LIKE 'prefix%' from the index.
+            models.Index(fields=['path'], name='products_category_path_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
 class Language(models.Model):
     code = models.CharField(max_length=10, unique=True)
@@ -89,14 +124,6 @@ class Product(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
-    def calculate_average_price(self):
-        from django.db.models import Avg
-        return self.listings.aggregate(avg_price=Avg('price'))['avg_price'] or 0
-
-    def calculate_total_stock(self):
-        from django.db.models import Sum
-        return self.listings.aggregate(total_stock=Sum('stock'))['total_stock'] or 0
-
     class Meta:
         indexes = [
             models.Index(fields=['name']),
@@ -192,10 +219,114 @@ class Listing(models.Model):
             models.Index(fields=['seller', 'status']),
             models.Index(fields=['product', 'status']),
             models.Index(fields=['stock']),
+            models.Index(fields=['-created_at', '-id'], name='products_li_created_id_idx'),
+            models.Index(fields=['price', 'id'], name='products_li_price_id_idx'),
+            models.Index(fields=['variant', 'price', 'id'], name='products_li_variant_price_idx'),
         ]
         ordering = ['-created_at']
 
 
+
+class ListingSearchDocument(models.Model):
+    """
+    Denormalized, join-free copy of an active listing used by listing search.
+
+    One row per active Listing, kept in sync by products.services.documents
+    when the listing, its variant, its product or an attribute label changes.
+    The full-text and trigram GIN indexes are created by migration on
+    PostgreSQL only.
+    """
+    listing = models.OneToOneField(
+        Listing, on_delete=models.CASCADE, primary_key=True, related_name='search_document'
+    )
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, db_index=False, related_name='+')
+    variant = models.ForeignKey(Variant, on_delete=models.CASCADE, db_index=False, related_name='+')
+    product_name = models.CharField(max_length=200)
+    product_series = models.CharField(max_length=100, blank=True, null=True)
+    product_block = models.CharField(max_length=100, blank=True, null=True)
+    tcg_type = models.CharField(max_length=50)
+    language_code = models.CharField(max_length=10)
+    version_code = models.CharField(max_length=50)
+    condition_code = models.CharField(max_length=20)
+    grader = models.CharField(max_length=20, blank=True, null=True)
+    grade_value = models.DecimalField(max_digits=4, decimal_places=1, blank=True, null=True)
+    # Language, version, condition and grade labels, for text matching.
+    labels = models.CharField(max_length=400, blank=True, default='')
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    stock = models.PositiveIntegerField()
+    created_at = models.DateTimeField()
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    def __str__(self):
+        return f"Search document for listing {self.listing_id}"
+
+    class Meta:
+        indexes = [
+            # Keyset pagination sorts on (created_at, listing) or (price, listing).
+            models.Index(fields=['-created_at', '-listing'], name='products_lsd_created_idx'),
+            models.Index(
+                fields=['-created_at', '-listing'], condition=models.Q(stock__gt=0), name='products_lsd_in_stock_idx'
+            ),
+            models.Index(fields=['price', 'listing'], name='products_lsd_price_idx'),
+            models.Index(fields=['tcg_type', '-created_at'], name='products_lsd_tcg_created_idx'),
+            models.Index(fields=['tcg_type', 'price'], name='products_lsd_tcg_price_idx'),
+            models.Index(
+                fields=['language_code', 'condition_code', 'price'], name='products_lsd_lang_cond_idx'
+            ),
+            models.Index(fields=['version_code'], name='products_lsd_version_idx'),
+            models.Index(fields=['grader', 'grade_value'], name='products_lsd_grade_idx'),
+            models.Index(
+                fields=['-grade_value', 'price', 'listing'],
+                condition=models.Q(grade_value__isnull=False),
+                name='products_lsd_grade_sort_idx',
+            ),
+            models.Index(fields=['variant', 'price', 'listing'], name='products_lsd_variant_price_idx'),
+            models.Index(fields=['product', 'price'], name='products_lsd_product_idx'),
+            models.Index(Upper('product_series'), name='products_lsd_series_idx'),
+            models.Index(Upper('product_block'), name='products_lsd_block_idx'),
+        ]
+        ordering = ['-created_at']
+
+
+class ListingStats(models.Model):
+    """
+    Aggregates over the available listings (active and in stock) of one
+    product or variant, maintained incrementally by
+    products.services.product_stats. A missing row means no available listing
+    and is rendered like an empty one.
+    """
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    price_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_stock = models.PositiveIntegerField(default=0)
+    listing_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    # Average price of a product or variant without available listings.
+    EMPTY_AVERAGE_PRICE = Decimal('0.00')
+
+    @property
+    def average_price(self):
+        if not self.listing_count:
+            return self.EMPTY_AVERAGE_PRICE
+        return (self.price_total / self.listing_count).quantize(Decimal('0.01'))
+
+
+class ProductStats(ListingStats):
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+
+    def __str__(self):
+        return f"Stats of {self.product_id}: {self.listing_count} listings from {self.min_price}"
+
+
+class VariantStats(ListingStats):
+    variant = models.OneToOneField(Variant, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+
+    def __str__(self):
+        return f"Stats of variant {self.variant_id}: {self.listing_count} listings from {self.min_price}"
+
+
 class Collection(models.Model):
     user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='collections')
     name = models.CharField(max_length=100)
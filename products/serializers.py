@@ -1,4 +1,8 @@
+import copy
+
+from django.core.exceptions import FieldDoesNotExist
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsetSerializerMixin
 from .models import (
     Category,
     Language,
@@ -7,12 +11,52 @@ from .models import (
     Grade,
     Product,
     ProductImage,
+    ProductStats,
     Variant,
     Listing,
     Collection,
     CollectionItem,
     SearchHistory,
 )
+from .services.categories import CategoryTree
+from .services.reference_data import reference_table
+
+# --- Reference data ---
+
+class ReferencePrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Validates ids of a reference table against the in-process cache."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        row = reference_table(self.get_queryset().model).get(data)
+        if row is None:
+            # Unknown here, possibly created by another process moments ago.
+            return super().to_internal_value(data)
+        # The cached row is shared by the whole process; the caller gets its own.
+        return copy.copy(row)
+
+
+class ReferenceSerializerMixin:
+    """
+    Nested as a foreign key, reads the related row from the in-process cache
+    instead of querying it (or joining it) for every instance.
+    """
+    served_from_cache = True
+
+    def get_attribute(self, instance):
+        try:
+            field = instance._meta.get_field(self.source)
+        except (AttributeError, FieldDoesNotExist):
+            return super().get_attribute(instance)
+        if field.many_to_one and not field.is_cached(instance):
+            pk = getattr(instance, field.attname)
+            if pk is None:
+                return None
+            row = reference_table(field.related_model).get(pk)
+            if row is not None:
+                return row
+        return super().get_attribute(instance)
 
 # --- Base Serializers ---
 
@@ -25,75 +69,102 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'description', 'parent', 'children']
         read_only_fields = ['slug', 'children']
 
-    def get_children(self, obj):
-        return CategorySerializer(obj.children.all(), many=True).data
+    def validate_parent(self, parent):
+        if parent is not None and self.instance is not None and (
+            parent.pk == self.instance.pk or parent.is_descendant_of(self.instance)
+        ):
+            raise serializers.ValidationError("A category cannot be moved under itself or one of its descendants.")
+        return parent
 
-class LanguageSerializer(serializers.ModelSerializer):
+    def get_children(self, obj):
+        # One tree per serialization, shared through the context by every
+        # nested category, instead of a children query per node.
+        tree = self.context.get('category_tree')
+        if tree is None or obj not in tree:
+            tree = self.context['category_tree'] = CategoryTree.load()
+        return CategorySerializer(tree.children_of(obj), many=True, context=self.context).data
+
+class LanguageSerializer(ReferenceSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Language
         fields = ['id', 'code', 'name']
 
-class VersionSerializer(serializers.ModelSerializer):
+class VersionSerializer(ReferenceSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Version
         fields = ['id', 'code', 'name', 'tcg_types', 'description', 'displayable']
 
-class ConditionSerializer(serializers.ModelSerializer):
+class ConditionSerializer(ReferenceSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Condition
         fields = ['id', 'code', 'label', 'is_graded']
 
-class GradeSerializer(serializers.ModelSerializer):
+class GradeSerializer(ReferenceSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Grade
         fields = ['id', 'value', 'grader']
 
 # --- Product and Related ---
 
-class ProductImageSerializer(serializers.ModelSerializer):
+class ProductImageSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ProductImage
         fields = ['id', 'image', 'alt_text', 'created_at']
         read_only_fields = ['created_at']
 
-class VariantSerializer(serializers.ModelSerializer):
+class ListingStatsSerializer(serializers.Serializer):
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    average_price = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    total_stock = serializers.IntegerField()
+    listing_count = serializers.IntegerField()
+
+class VariantSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     language = LanguageSerializer(read_only=True)
     version = VersionSerializer(read_only=True)
     condition = ConditionSerializer(read_only=True)
     grade = GradeSerializer(read_only=True)
 
-    language_id = serializers.PrimaryKeyRelatedField(
+    language_id = ReferencePrimaryKeyRelatedField(
         queryset=Language.objects.all(), write_only=True, source='language'
     )
-    version_id = serializers.PrimaryKeyRelatedField(
+    version_id = ReferencePrimaryKeyRelatedField(
         queryset=Version.objects.all(), write_only=True, source='version'
     )
-    condition_id = serializers.PrimaryKeyRelatedField(
+    condition_id = ReferencePrimaryKeyRelatedField(
         queryset=Condition.objects.all(), write_only=True, source='condition'
     )
-    grade_id = serializers.PrimaryKeyRelatedField(
+    grade_id = ReferencePrimaryKeyRelatedField(
         queryset=Grade.objects.all(), write_only=True, allow_null=True, required=False, source='grade'
     )
+    # Available listings of the variant; null when there are none.
+    stats = ListingStatsSerializer(read_only=True)
 
     class Meta:
         model = Variant
         fields = [
             'id', 'product',
             'language', 'version', 'condition', 'grade',
-            'language_id', 'version_id', 'condition_id', 'grade_id'
+            'language_id', 'version_id', 'condition_id', 'grade_id',
+            'stats',
         ]
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     categories = CategorySerializer(many=True, read_only=True)
     categories_ids = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), many=True, write_only=True, source='categories')
     allowed_languages = LanguageSerializer(many=True, read_only=True)
-    allowed_languages_ids = serializers.PrimaryKeyRelatedField(queryset=Language.objects.all(), many=True, write_only=True, source='allowed_languages')
+    allowed_languages_ids = ReferencePrimaryKeyRelatedField(queryset=Language.objects.all(), many=True, write_only=True, source='allowed_languages')
     allowed_versions = VersionSerializer(many=True, read_only=True)
-    allowed_versions_ids = serializers.PrimaryKeyRelatedField(queryset=Version.objects.all(), many=True, write_only=True, source='allowed_versions')
+    allowed_versions_ids = ReferencePrimaryKeyRelatedField(queryset=Version.objects.all(), many=True, write_only=True, source='allowed_versions')
     images = ProductImageSerializer(many=True, read_only=True)
+    min_price = serializers.SerializerMethodField()
     average_price = serializers.SerializerMethodField()
     total_stock = serializers.SerializerMethodField()
+    listing_count = serializers.SerializerMethodField()
+    # Relations read by the method fields, for core.fieldsets.related_lookups.
+    method_relations = {
+        'min_price': ('stats',), 'average_price': ('stats',), 'total_stock': ('stats',), 'listing_count': ('stats',),
+    }
 
     class Meta:
         model = Product
@@ -102,15 +173,35 @@ class ProductSerializer(serializers.ModelSerializer):
             'categories', 'categories_ids',
             'allowed_languages', 'allowed_languages_ids',
             'allowed_versions', 'allowed_versions_ids',
-            'images', 'average_price', 'total_stock', 'created_at', 'updated_at'
+            'images', 'min_price', 'average_price', 'total_stock', 'listing_count',
+            'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'slug', 'created_at', 'updated_at', 'average_price', 'total_stock']
+        read_only_fields = [
+            'id', 'slug', 'created_at', 'updated_at', 'min_price', 'average_price', 'total_stock', 'listing_count'
+        ]
+
+    # Precomputed over the available listings (see products.services.product_stats).
+    def _stats(self, obj):
+        try:
+            return obj.stats
+        except ProductStats.DoesNotExist:
+            return None
+
+    def get_min_price(self, obj):
+        stats = self._stats(obj)
+        return stats.min_price if stats else None
 
     def get_average_price(self, obj):
-        return obj.calculate_average_price()
+        stats = self._stats(obj)
+        return stats.average_price if stats else ProductStats.EMPTY_AVERAGE_PRICE
 
     def get_total_stock(self, obj):
-        return obj.calculate_total_stock()
+        stats = self._stats(obj)
+        return stats.total_stock if stats else 0
+
+    def get_listing_count(self, obj):
+        stats = self._stats(obj)
+        return stats.listing_count if stats else 0
 
     def create(self, validated_data):
         categories = validated_data.pop('categories', [])
@@ -135,7 +226,7 @@ class ProductSerializer(serializers.ModelSerializer):
             instance.allowed_versions.set(allowed_versions)
         return instance
 
-class ListingSerializer(serializers.ModelSerializer):
+class ListingSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     variant = VariantSerializer(read_only=True)
     variant_id = serializers.PrimaryKeyRelatedField(
         queryset=Variant.objects.all(), write_only=True, source='variant'
@@ -0,0 +1,7 @@
+from .search import (
+    search_listings,
+    fuzzy_search_listings,
+    fuzzy_suggestions,
+)
+from .documents import sync_search_documents
+from .backends import get_search_backend
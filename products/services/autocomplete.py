@@ -0,0 +1,346 @@
+"""
+In-memory autocomplete for search suggestions.
+
+``PrefixIndex`` keeps a sorted array of normalized keys (one per word start of
+every product name, series and block, plus popular past queries) so a prefix
+lookup is two binary searches followed by a top-K selection on popularity.
+Requests never touch the database: the index is built once per process and
+then updated incrementally from model signals. Once it is older than
+``max_age`` a single background thread rebuilds it while requests keep reading
+the current one. Variant attribute labels (language, version, condition) are
+indexed too, weighted by usage.
+"""
+import bisect
+import heapq
+from itertools import chain
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Count, Q
+
+from products.models import Product, Variant
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+_SPACE_RE = re.compile(r'\s+')
+
+# Prefixes matching more keys than this have their top-K cached until the next
+# mutation; narrower ranges are cheap enough to select on every call.
+CACHED_RANGE_SIZE = 256
+MAX_CACHED_PREFIXES = 10000
+
+
+def normalize(text):
+    """Casefold, strip accents and collapse whitespace ("Pokémon" -> "pokemon")."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _SPACE_RE.sub(' ', text.casefold()).strip()
+
+
+def index_keys(term):
+    """Every suffix of ``term`` starting at a word, so "Fire Block" is found by "blo"."""
+    normalized = normalize(term)
+    return {normalized[match.start():] for match in _WORD_RE.finditer(normalized)}
+
+
+class PrefixIndex:
+    """Weighted prefix index over catalog terms, safe to share between threads."""
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        # Held by whichever thread is building, so only one build runs at a time.
+        self._build_lock = threading.Lock()
+        # Products changed while a build is reading the database, or None.
+        self._changed = None
+        self._rebuild_thread = None
+        self._reset()
+
+    def _reset(self):
+        self._keys = []            # sorted (key, term) pairs
+        self._weights = {}         # term -> popularity
+        self._product_terms = {}   # product id -> (terms, weight)
+        self._cache = {}
+        self._built_at = None
+        self._stale = False
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def mark_stale(self):
+        """Rebuild on next use, in the background, after writes that skip signals."""
+        self._stale = True
+
+    # --- Mutations -------------------------------------------------------
+
+    def _add_weight(self, term, weight):
+        current = self._weights.get(term, 0)
+        if not current:
+            for key in index_keys(term):
+                bisect.insort(self._keys, (key, term))
+        self._weights[term] = current + weight
+
+    def _remove_weight(self, term, weight):
+        remaining = self._weights.get(term, 0) - weight
+        if remaining > 0:
+            self._weights[term] = remaining
+            return
+        self._weights.pop(term, None)
+        for key in index_keys(term):
+            position = bisect.bisect_left(self._keys, (key, term))
+            if position < len(self._keys) and self._keys[position] == (key, term):
+                del self._keys[position]
+
+    def _note_change(self, product_id):
+        if self._changed is not None:
+            self._changed.add(product_id)
+
+    def set_product(self, product_id, terms, weight):
+        """Register (or replace) the terms contributed by one product."""
+        terms = tuple(term for term in dict.fromkeys(terms) if term)
+        with self._lock:
+            self._note_change(product_id)
+            self._discard_product(product_id)
+            for term in terms:
+                self._add_weight(term, weight)
+            self._product_terms[product_id] = (terms, weight)
+            self._cache.clear()
+
+    def remove_product(self, product_id):
+        with self._lock:
+            self._note_change(product_id)
+            self._discard_product(product_id)
+            self._cache.clear()
+
+    def adjust_product_weight(self, product_id, delta):
+        """Add ``delta`` to a product's weight, e.g. when one of its listings (de)activates."""
+        with self._lock:
+            self._note_change(product_id)
+            if product_id not in self._product_terms:
+                return
+            terms, weight = self._product_terms[product_id]
+            new_weight = max(weight + delta, 1)
+            for term in terms:
+                self._weights[term] += new_weight - weight
+            self._product_terms[product_id] = (terms, new_weight)
+            self._cache.clear()
+
+    def _discard_product(self, product_id):
+        terms, weight = self._product_terms.pop(product_id, ((), 0))
+        for term in terms:
+            self._remove_weight(term, weight)
+
+    def add_term(self, term, weight):
+        """Add a free-standing term (e.g. a popular past query)."""
+        with self._lock:
+            self._add_weight(term, weight)
+            self._cache.clear()
+
+    # --- Loading ---------------------------------------------------------
+
+    def build(self):
+        """
+        (Re)load every catalog term and the most frequent past queries.
+        Products changed while the database is being read are reloaded once
+        the new index is in place, so no signal update is lost.
+        """
+        started = time.monotonic()
+        with self._lock:
+            self._changed = set()
+            # A mark_stale() from here on asks for another build.
+            self._stale = False
+        try:
+            weights, product_terms = load_term_weights()
+        except BaseException:
+            with self._lock:
+                self._changed = None
+            raise
+        # One sort instead of an insort per key keeps the build O(n log n).
+        keys = sorted({(key, term) for term in weights for key in index_keys(term)})
+        with self._lock:
+            self._keys = keys
+            self._weights = weights
+            self._product_terms = product_terms
+            self._cache = {}
+            self._built_at = time.monotonic()
+            changed, self._changed = self._changed, None
+        if changed:
+            self._reload_products(changed)
+        logger.info(
+            "Autocomplete index built: %d terms in %.2fs",
+            len(weights), time.monotonic() - started,
+        )
+
+    def ensure_built(self):
+        """
+        Build on first use, waiting for a build already running in another
+        thread. Once ``max_age`` seconds have passed or the index was marked
+        stale, start a rebuild in the background and keep serving the current
+        index until it is swapped in.
+        """
+        if self._built_at is None:
+            with self._build_lock:
+                if self._built_at is None:
+                    self.build()
+        elif self._stale or (self.max_age and time.monotonic() - self._built_at > self.max_age):
+            self.rebuild_in_background()
+
+    def rebuild_in_background(self):
+        """Start a rebuild thread unless one is already running."""
+        if not self._build_lock.acquire(blocking=False):
+            return
+        try:
+            self._rebuild_thread = threading.Thread(
+                target=self._rebuild, name='autocomplete-rebuild', daemon=True
+            )
+            self._rebuild_thread.start()
+        except BaseException:
+            self._build_lock.release()
+            raise
+
+    def _rebuild(self):
+        try:
+            self.build()
+        except DatabaseError:
+            logger.exception("Autocomplete index rebuild failed; serving the previous index")
+            with self._lock:
+                # Retry after another max_age rather than on every request.
+                if self._built_at is not None:
+                    self._built_at = time.monotonic()
+        finally:
+            connection.close()
+            self._build_lock.release()
+
+    def _reload_products(self, product_ids):
+        found = set()
+        for product_id, terms, weight in _product_rows(Q(pk__in=product_ids)):
+            self.set_product(product_id, terms, weight)
+            found.add(product_id)
+        for product_id in set(product_ids) - found:
+            self.remove_product(product_id)
+
+    def refresh_product(self, product_id):
+        """Reload one product from the database, if the index is already built."""
+        with self._lock:
+            self._note_change(product_id)
+        if not self.is_built:
+            return
+        rows = list(_product_rows(Q(pk=product_id)))
+        if rows:
+            self.set_product(*rows[0])
+        else:
+            self.remove_product(product_id)
+
+    # --- Lookups ---------------------------------------------------------
+
+    def suggest(self, prefix, limit=10):
+        """Top ``limit`` terms with a word starting with ``prefix``, most popular first."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            cached = self._cache.get((prefix, limit))
+            if cached is not None:
+                return list(cached)
+            low = bisect.bisect_left(self._keys, (prefix,))
+            high = bisect.bisect_left(self._keys, (prefix + '\U0010ffff',), low)
+            candidates = {term for _, term in self._keys[low:high]}
+            weights = self._weights
+            result = heapq.nsmallest(limit, candidates, key=lambda term: (-weights[term], term))
+            if high - low > CACHED_RANGE_SIZE:
+                if len(self._cache) >= MAX_CACHED_PREFIXES:
+                    self._cache.clear()
+                self._cache[(prefix, limit)] = result
+        return list(result)
+
+
+def load_term_weights():
+    """
+    Read every suggestion term from the database.
+
+    Returns ``(weights, product_terms)``: popularity per term, and the terms
+    and weight contributed by each product (needed for incremental updates).
+    """
+    weights = {}
+    product_terms = {}
+    for product_id, terms, weight in _product_rows():
+        terms = tuple(term for term in dict.fromkeys(terms) if term)
+        product_terms[product_id] = (terms, weight)
+        for term in terms:
+            weights[term] = weights.get(term, 0) + weight
+    for term, count in chain(_attribute_rows(), _popular_query_rows()):
+        weights[term] = weights.get(term, 0) + count
+    return weights, product_terms
+
+
+def _product_rows(condition=Q()):
+    rows = (
+        Product.objects.filter(condition)
+        .annotate(active_listings=Count('listings', filter=Q(listings__status='active')))
+        .values_list('id', 'name', 'series', 'block', 'active_listings')
+        .order_by()
+    )
+    for product_id, name, series, block, active_listings in rows.iterator(chunk_size=2000):
+        yield product_id, (name, series, block), 1 + active_listings
+
+
+def _attribute_rows():
+    """Variant attribute labels (language, version, condition), weighted by usage."""
+    for field, label in (('language', 'name'), ('version', 'name'), ('condition', 'label')):
+        yield from (
+            Variant.objects.values_list(f'{field}__{label}')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+
+
+def _popular_query_rows():
+    """Most searched queries, read from the rollup rather than the raw history."""
+    try:
+        SearchQueryRollup = apps.get_model('searches', 'SearchQueryRollup')
+    except LookupError:
+        return []
+    limit = getattr(settings, 'AUTOCOMPLETE_HISTORY_TERMS', 1000)
+    return SearchQueryRollup.objects.order_by('-count').values_list('query', 'count')[:limit]
+
+
+def get_autocomplete_index():
+    """
+    The index serving suggestions: the shared memory-mapped file when
+    ``AUTOCOMPLETE_INDEX_PATH`` points to a built one, else this process's own.
+    """
+    global _shared_index
+    path = getattr(settings, 'AUTOCOMPLETE_INDEX_PATH', '')
+    if path and _shared_index is None and os.path.exists(path):
+        from .shared_index import MappedPrefixIndex
+
+        _shared_index = MappedPrefixIndex(path, max_age=getattr(settings, 'AUTOCOMPLETE_MAX_AGE', 300))
+    if _shared_index is not None:
+        return _shared_index
+    autocomplete_index.ensure_built()
+    return autocomplete_index
+
+
+def warm_up():
+    """Load the index at worker startup; failures fall back to a lazy build."""
+    try:
+        get_autocomplete_index()
+    except DatabaseError:
+        logger.exception("Autocomplete index warm-up failed; it will be built on first use")
+
+
+autocomplete_index = PrefixIndex(max_age=getattr(settings, 'AUTOCOMPLETE_MAX_AGE', 300))
+_shared_index = None
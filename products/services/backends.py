@@ -0,0 +1,186 @@
+"""
+Search backends shared by the listing and product search endpoints.
+
+A backend narrows querysets to the rows matching a free-text query, best
+matches first; structured filters, paging, facets and caching stay with the
+caller, so every backend is exercised through the same code path and can be
+compared on the same queries (see the ``SEARCH_BACKEND`` setting).
+
+``DatabaseSearchBackend`` is the production engine: PostgreSQL full-text and
+trigram search on ``ListingSearchDocument``, ``icontains`` elsewhere.
+``InMemorySearchBackend`` matches against a per-process inverted index of the
+documents and product names, for development and tests without PostgreSQL.
+"""
+import bisect
+import difflib
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Case, FloatField, Value, When
+from django.utils.module_loading import import_string
+
+from products.models import ListingSearchDocument, Product
+
+from .autocomplete import normalize
+from .result_cache import generation
+from .search import fuzzy_search_listings, search_listings, search_terms, trigram_threshold
+
+DEFAULT_BACKEND = 'products.services.backends.DatabaseSearchBackend'
+
+
+class SearchBackend:
+    """Interface of a search engine."""
+
+    def search_listings(self, queryset, query, fuzzy=False):
+        """
+        Restrict a ``ListingSearchDocument`` queryset to ``query`` matches.
+        Results may be ordered by relevance, exposed as the ``rank`` (or, in
+        fuzzy mode, ``similarity``) annotation.
+        """
+        raise NotImplementedError
+
+    def search_products(self, queryset, query):
+        """Restrict a ``Product`` queryset to products whose name matches ``query``."""
+        raise NotImplementedError
+
+
+class DatabaseSearchBackend(SearchBackend):
+
+    def search_listings(self, queryset, query, fuzzy=False):
+        if fuzzy:
+            return fuzzy_search_listings(queryset, query)
+        return search_listings(queryset, query)
+
+    def search_products(self, queryset, query):
+        # Served by the name trigram index on PostgreSQL (gin_trgm_ops covers ILIKE).
+        return queryset.filter(name__icontains=query)
+
+
+# Relevance of a match per document field, mirroring the tsvector weights A/B/C.
+FIELD_WEIGHTS = {
+    'product_name': 1.0,
+    'product_series': 0.4,
+    'product_block': 0.4,
+    'labels': 0.2,
+}
+
+
+class TokenIndex:
+    """Sorted tokens with their postings: ``{row id: best field weight}``."""
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.tokens = []
+
+    def add(self, row_id, text, weight):
+        for token in search_terms(normalize(text)):
+            postings = self.postings[token]
+            postings[row_id] = max(weight, postings.get(row_id, 0))
+
+    def freeze(self):
+        self.tokens = sorted(self.postings)
+
+    def expand(self, term, fuzzy=False):
+        """Tokens matching ``term``: prefix matches, or similar ones in fuzzy mode."""
+        if fuzzy:
+            return difflib.get_close_matches(term, self.tokens, n=20, cutoff=trigram_threshold())
+        low = bisect.bisect_left(self.tokens, term)
+        high = bisect.bisect_left(self.tokens, term + '\U0010ffff', low)
+        return self.tokens[low:high]
+
+    def match(self, query, fuzzy=False):
+        """``{row id: score}`` of rows matching every term of ``query``."""
+        scores = None
+        for term in search_terms(normalize(query)):
+            term_scores = {}
+            for token in self.expand(term, fuzzy):
+                for row_id, weight in self.postings[token].items():
+                    term_scores[row_id] = max(weight, term_scores.get(row_id, 0))
+            if scores is not None:
+                term_scores = {
+                    row_id: score + term_scores[row_id]
+                    for row_id, score in scores.items()
+                    if row_id in term_scores
+                }
+            scores = term_scores
+            if not scores:
+                break
+        return scores or {}
+
+
+class InMemorySearchBackend(SearchBackend):
+    """
+    Matches queries in Python against indexes loaded from the database.
+
+    The indexes are rebuilt whenever the search cache generation moves, i.e.
+    after any listing, product or variant write.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = None
+        self._listings = TokenIndex()
+        self._products = TokenIndex()
+
+    def _ensure_current(self):
+        current = generation()
+        if current == self._generation:
+            return
+        with self._lock:
+            if current == self._generation:
+                return
+            listings, products = TokenIndex(), TokenIndex()
+            for row in ListingSearchDocument.objects.values('listing_id', *FIELD_WEIGHTS).iterator():
+                for field, weight in FIELD_WEIGHTS.items():
+                    listings.add(row['listing_id'], row[field], weight)
+            for product_id, name in Product.objects.values_list('id', 'name').iterator():
+                products.add(product_id, name, 1.0)
+            listings.freeze()
+            products.freeze()
+            self._listings, self._products, self._generation = listings, products, current
+
+    def search_listings(self, queryset, query, fuzzy=False):
+        if not search_terms(query):
+            return queryset
+        self._ensure_current()
+        scores = self._listings.match(query, fuzzy)
+        alias = 'similarity' if fuzzy else 'rank'
+        return ranked_by_scores(queryset, scores, alias)
+
+    def search_products(self, queryset, query):
+        if not search_terms(query):
+            return queryset
+        self._ensure_current()
+        return queryset.filter(pk__in=list(self._products.match(query)))
+
+
+def ranked_by_scores(queryset, scores, alias):
+    """Keep the rows of ``scores`` and order them by score, then newest first."""
+    by_score = defaultdict(list)
+    for row_id, score in scores.items():
+        by_score[round(score, 4)].append(row_id)
+    if not by_score:
+        return queryset.none()
+    annotation = Case(
+        *[When(pk__in=ids, then=Value(score)) for score, ids in by_score.items()],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    return (
+        queryset.filter(pk__in=list(scores))
+        .annotate(**{alias: annotation})
+        .order_by(f'-{alias}', '-created_at')
+    )
+
+
+_backends = {}
+
+
+def get_search_backend():
+    """The backend named by ``SEARCH_BACKEND``, one instance per process."""
+    path = getattr(settings, 'SEARCH_BACKEND', DEFAULT_BACKEND)
+    backend = _backends.get(path)
+    if backend is None:
+        backend = _backends.setdefault(path, import_string(path)())
+    return backend
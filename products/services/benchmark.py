@@ -0,0 +1,252 @@
+"""
+Search latency benchmark.
+
+``run_benchmark`` replays a seeded mix of realistic requests (plain text,
+prefixes, filters, query operators, sort modes, facets, fuzzy matching,
+suggestions and product search) against the search views in-process and
+reports p50/p95/p99 latency and SQL query counts per scenario. Queries are
+drawn from the most listed products, so the mix follows the catalog's
+popularity; run it against a catalog from ``generate_catalog`` (see
+``products.services.catalog_generator``) to compare changes on the same data.
+
+Requests go through the full DRF stack (authentication, pagination,
+serialization and rendering) without throttling. The search result and facet
+caches are disabled unless ``use_cache`` is set, so each request measures the
+database work, and the benchmark user's searches are not recorded.
+
+``run_read_path_benchmark`` times single list pages rendered by
+``ListingSerializer``/``VariantSerializer`` and by the ``values()`` fast path
+(``products.services.fast_read``) at several page sizes.
+"""
+import math
+import random
+import statistics
+from collections import defaultdict
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from products.models import Language, Listing, ListingSearchDocument, Product, Variant
+from products.serializers import ListingSerializer, VariantSerializer
+
+from .fast_read import listing_values, render_listings, render_variants, variant_values
+from .sorting import SORT_MODES
+
+BENCHMARK_USER = 'bench-user'
+
+# Relative weight of each scenario in the replayed mix.
+SCENARIO_WEIGHTS = {
+    'text': 25,
+    'prefix': 10,
+    'filtered': 15,
+    'operators': 10,
+    'sorted': 10,
+    'facets': 5,
+    'browse': 5,
+    'fuzzy': 5,
+    'suggestions': 12,
+    'fuzzy_suggestions': 3,
+    'product_search': 5,
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+def _views():
+    from products.views import SearchSuggestionView, SearchView
+    from searches.views import SearchView as ProductSearchView
+
+    return {
+        'listing_search': ('/api/search/', SearchView.as_view(throttle_classes=[])),
+        'suggestions': ('/api/search/suggestions/', SearchSuggestionView.as_view(throttle_classes=[])),
+        'product_search': ('/api/search/products/', ProductSearchView.as_view(throttle_classes=[])),
+    }
+
+
+def popular_names(limit=200):
+    """Product names with the most listings, falling back to any product name."""
+    names = list(
+        ListingSearchDocument.objects.values('product_name')
+        .annotate(listings=Count('listing'))
+        .order_by('-listings')
+        .values_list('product_name', flat=True)[:limit]
+    )
+    return names or list(Product.objects.values_list('name', flat=True)[:limit])
+
+
+def typo(word, rng):
+    """``word`` with two adjacent letters swapped."""
+    if len(word) < 4:
+        return word
+    index = rng.randrange(1, len(word) - 2)
+    return word[:index] + word[index + 1] + word[index] + word[index + 2:]
+
+
+def build_scenarios(count, seed=0):
+    """``count`` requests as ``(scenario, view, params)``, reproducible for a seed."""
+    rng = random.Random(seed)
+    names = popular_names()
+    if not names:
+        raise ValueError('The catalog is empty; run generate_catalog first.')
+    languages = list(Language.objects.values_list('code', flat=True)) or ['EN']
+    weights = [1 / rank for rank in range(1, len(names) + 1)]
+    kinds = list(SCENARIO_WEIGHTS)
+
+    scenarios = []
+    for kind in rng.choices(kinds, [SCENARIO_WEIGHTS[kind] for kind in kinds], k=count):
+        name = rng.choices(names, weights)[0]
+        word = name.split()[0]
+        price = rng.choice([10, 25, 50, 100, 250])
+        if kind == 'text':
+            scenarios.append((kind, 'listing_search', {'q': name}))
+        elif kind == 'prefix':
+            scenarios.append((kind, 'listing_search', {'q': word[:max(3, len(word) // 2)]}))
+        elif kind == 'filtered':
+            scenarios.append((kind, 'listing_search', {
+                'q': word, 'language': rng.choice(languages), 'max_price': price, 'availability': 'in_stock',
+            }))
+        elif kind == 'operators':
+            scenarios.append((kind, 'listing_search', {
+                'q': f'{word} lang:{rng.choice(languages).lower()} price:<{price}',
+            }))
+        elif kind == 'sorted':
+            scenarios.append((kind, 'listing_search', {'q': word, 'sort': rng.choice(list(SORT_MODES))}))
+        elif kind == 'facets':
+            scenarios.append((kind, 'listing_search', {'q': word, 'facets': 'true'}))
+        elif kind == 'browse':
+            scenarios.append((kind, 'listing_search', {'sort': 'newest', 'pagination': 'cursor'}))
+        elif kind == 'fuzzy':
+            scenarios.append((kind, 'listing_search', {'q': typo(word, rng), 'fuzzy': 'true'}))
+        elif kind == 'suggestions':
+            scenarios.append((kind, 'suggestions', {'query': word[:rng.randint(2, max(2, len(word)))]}))
+        elif kind == 'fuzzy_suggestions':
+            scenarios.append((kind, 'suggestions', {'query': typo(word, rng), 'fuzzy': 'true'}))
+        else:
+            scenarios.append((kind, 'product_search', {'q': word}))
+    return scenarios
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(percent / 100 * len(ordered))) - 1]
+
+
+def summarize(timings, queries, errors=0):
+    summary = {'count': len(timings), 'errors': errors}
+    if timings:
+        for percent in PERCENTILES:
+            summary[f'p{percent}_ms'] = round(percentile(timings, percent), 2)
+        summary['mean_ms'] = round(statistics.fmean(timings), 2)
+        summary['max_ms'] = round(max(timings), 2)
+        summary['mean_queries'] = round(statistics.fmean(queries), 2)
+        summary['max_queries'] = max(queries)
+    return summary
+
+
+def run_benchmark(requests=500, warmup=20, seed=0, backend=None, use_cache=False):
+    """Replay ``requests`` scenarios after ``warmup`` unmeasured ones and return the report."""
+    overrides = {'SEARCH_HISTORY_ENABLED': False}
+    if backend:
+        overrides['SEARCH_BACKEND'] = backend
+    if not use_cache:
+        overrides.update(SEARCH_RESULT_CACHE_TIMEOUT=0, SEARCH_FACETS_CACHE_TIMEOUT=0)
+
+    user, _ = get_user_model().objects.get_or_create(username=BENCHMARK_USER, defaults={'is_buyer': True})
+    factory = APIRequestFactory()
+    views = _views()
+    timings, queries, errors = defaultdict(list), defaultdict(list), defaultdict(int)
+
+    with override_settings(**overrides):
+        for index, (kind, view_name, params) in enumerate(build_scenarios(warmup + requests, seed)):
+            path, view = views[view_name]
+            request = factory.get(path, params)
+            force_authenticate(request, user=user)
+            with CaptureQueriesContext(connection) as captured:
+                started = perf_counter()
+                response = view(request)
+                response.render()
+                elapsed = (perf_counter() - started) * 1000
+            if index < warmup:
+                continue
+            if response.status_code >= 400:
+                errors[kind] += 1
+                continue
+            timings[kind].append(elapsed)
+            queries[kind].append(len(captured.captured_queries))
+
+    all_timings = [value for values in timings.values() for value in values]
+    all_queries = [value for values in queries.values() for value in values]
+    return {
+        'config': {
+            'requests': requests,
+            'warmup': warmup,
+            'seed': seed,
+            'backend': backend or 'default',
+            'cache': use_cache,
+            'database': connection.vendor,
+        },
+        'catalog': {
+            'products': Product.objects.count(),
+            'documents': ListingSearchDocument.objects.count(),
+        },
+        'scenarios': {
+            kind: summarize(timings[kind], queries[kind], errors[kind])
+            for kind in SCENARIO_WEIGHTS
+            if timings[kind] or errors[kind]
+        },
+        'overall': summarize(all_timings, all_queries, sum(errors.values())),
+    }
+
+
+# Per list: the queryset the view serializes, its serializer, and the fast path.
+READ_PATHS = {
+    'listings': (
+        lambda: Listing.objects.select_related('variant__stats').order_by('-created_at', '-pk'),
+        ListingSerializer, listing_values, render_listings,
+    ),
+    'variants': (
+        lambda: Variant.objects.select_related('stats').order_by('pk'),
+        VariantSerializer, variant_values, render_variants,
+    ),
+}
+
+
+def _time_page(render_page, repeat, warmup):
+    timings, queries = [], []
+    for index in range(warmup + repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = perf_counter()
+            JSONRenderer().render(render_page())
+            elapsed = (perf_counter() - started) * 1000
+        if index >= warmup:
+            timings.append(elapsed)
+            queries.append(len(captured.captured_queries))
+    return summarize(timings, queries)
+
+
+def run_read_path_benchmark(page_sizes=(20, 100, 500), repeat=20, warmup=2):
+    """
+    Time fetching, serializing and rendering one page of each list through the
+    serializers and through the fast path; ``speedup`` compares their p50.
+    """
+    results = {}
+    for name, (queryset, serializer_class, values, render) in READ_PATHS.items():
+        for size in page_sizes:
+            serializer = _time_page(lambda: serializer_class(list(queryset()[:size]), many=True).data, repeat, warmup)
+            fast = _time_page(lambda: render(list(values(queryset())[:size])), repeat, warmup)
+            results[f'{name}:{size}'] = {
+                'rows': min(size, queryset().count()),
+                'serializer': serializer,
+                'fast': fast,
+                'speedup': round(serializer['p50_ms'] / fast['p50_ms'], 2) if fast.get('p50_ms') else None,
+            }
+    return {
+        'config': {'page_sizes': list(page_sizes), 'repeat': repeat, 'warmup': warmup, 'database': connection.vendor},
+        'results': results,
+    }
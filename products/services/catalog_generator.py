@@ -0,0 +1,212 @@
+"""
+Synthetic TCG catalog for benchmarks.
+
+``generate_catalog`` bulk-inserts products, variants and listings with a
+Zipf-like popularity: a few chase cards carry most of the listings, as on
+the real marketplace. Rows are written in chunks without model signals, so
+search documents, search caches and listing stats are refreshed once at the
+end. Listings are backdated over the past year with a ``bulk_update`` after
+each insert, since ``auto_now_add`` stamps them with the current time.
+"""
+import math
+import random
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate, product as cartesian
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.text import slugify
+
+from products.models import Condition, Grade, Language, Listing, Product, Variant, Version
+
+from .documents import sync_search_documents
+from .product_stats import rebuild_listing_stats
+from .result_cache import bump_all_generations
+
+NAME_HEADS = [
+    'Char', 'Pika', 'Bulba', 'Squir', 'Mew', 'Gen', 'Drago', 'Lu', 'Ray', 'Eev', 'Snor', 'Gyara',
+    'Umbr', 'Espe', 'Blasto', 'Veno', 'Alaka', 'Machi', 'Dracau', 'Tortan', 'Florizar', 'Noctal',
+    'Black', 'Blue-Eyes', 'Dark', 'Red-Eyes', 'Exodia', 'Serra', 'Shivan', 'Lotus',
+]
+NAME_TAILS = [
+    'izard', 'chu', 'saur', 'tle', 'two', 'gar', 'nite', 'gia', 'quaza', 'ee', 'lax', 'dos',
+    'eon', 'on', 'ise', 'moth', 'zam', 'amp', 'feu', 'k', 're', 'li',
+    ' Lotus', ' White Dragon', ' Magician', ' Black Dragon', ' the Forbidden', ' Angel', ' Dragon', ' Sapphire',
+]
+SERIES = [
+    'Base Set', 'Jungle', 'Fossil', 'Team Rocket', 'Gym Heroes', 'Neo Genesis', 'Neo Discovery',
+    'Expedition', 'Aquapolis', 'Skyridge', 'Ruby & Sapphire', 'Diamond & Pearl', 'Platinum',
+    'HeartGold SoulSilver', 'Black & White', 'XY', 'Evolutions', 'Sun & Moon', 'Hidden Fates',
+    'Sword & Shield', 'Evolving Skies', 'Brilliant Stars', 'Scarlet & Violet', '151', 'Obsidian Flames',
+    'Alpha', 'Beta', 'Unlimited', 'Revised', 'Legends', 'Arabian Nights', 'Antiquities',
+    'Legend of Blue Eyes', 'Metal Raiders', 'Spell Ruler', 'Pharaoh\'s Servant', 'Invasion of Chaos',
+]
+BLOCKS = ['Wizards', 'e-Card', 'EX', 'DP', 'HGSS', 'BW', 'XY', 'SM', 'SWSH', 'SV', 'Classic', 'Modern']
+TCG_TYPES = [('pokemon', 60), ('magic', 25), ('yugioh', 15)]
+
+LANGUAGES = [
+    ('EN', 'English'), ('FR', 'French'), ('JP', 'Japanese'), ('DE', 'German'), ('IT', 'Italian'),
+    ('ES', 'Spanish'), ('PT', 'Portuguese'), ('KO', 'Korean'), ('ZH', 'Chinese'),
+]
+VERSIONS = [
+    ('1st', '1st Edition'), ('unlimited', 'Unlimited'), ('shadowless', 'Shadowless'),
+    ('reverse', 'Reverse Holo'), ('promo', 'Promo'),
+]
+CONDITIONS = [
+    ('MT', 'Mint', False, 1.6), ('NM', 'Near Mint', False, 1.0), ('EX', 'Excellent', False, 0.7),
+    ('GD', 'Good', False, 0.5), ('LP', 'Light Played', False, 0.4), ('PL', 'Played', False, 0.3),
+    ('PO', 'Poor', False, 0.15), ('GR', 'Graded', True, 1.0),
+]
+GRADES = [('PSA', value) for value in range(5, 11)] + [
+    ('BGS', Decimal(value) / 2) for value in range(16, 21)
+] + [('CGC', value) for value in (8, 9, 10)]
+
+SELLER_PREFIX = 'bench-seller-'
+
+
+def zipf_weights(count, exponent=1.1):
+    return [1 / math.pow(rank, exponent) for rank in range(1, count + 1)]
+
+
+def ensure_reference_data():
+    """Languages, versions, conditions and grades used by generated variants."""
+    languages = [
+        Language.objects.get_or_create(code=code, defaults={'name': name})[0] for code, name in LANGUAGES
+    ]
+    versions = [
+        Version.objects.get_or_create(code=code, defaults={'name': name, 'tcg_types': []})[0]
+        for code, name in VERSIONS
+    ]
+    conditions = {
+        code: (Condition.objects.get_or_create(code=code, defaults={'label': label, 'is_graded': graded})[0], factor)
+        for code, label, graded, factor in CONDITIONS
+    }
+    # Grades are not unique in the schema, so reuse the first matching row.
+    grades = [
+        Grade.objects.filter(grader=grader, value=value).first() or Grade.objects.create(grader=grader, value=value)
+        for grader, value in GRADES
+    ]
+    return languages, versions, conditions, grades
+
+
+def ensure_sellers(count):
+    User = get_user_model()
+    existing = User.objects.filter(username__startswith=SELLER_PREFIX).count()
+    User.objects.bulk_create([
+        User(username=f'{SELLER_PREFIX}{index}', is_seller=True, password='!')
+        for index in range(existing, count)
+    ])
+    return list(User.objects.filter(username__startswith=SELLER_PREFIX).values_list('id', flat=True)[:count])
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate_catalog(products=100_000, variants=500_000, listings=2_000_000, sellers=1000,
+                     seed=0, batch_size=5000, log=None):
+    """
+    Insert a synthetic catalog and return the created row counts.
+    ``log`` receives progress messages.
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    now = timezone.now()
+    languages, versions, conditions, grades = ensure_reference_data()
+    seller_ids = ensure_sellers(sellers)
+
+    # Products: unique (name, series, block) triples drawn without replacement.
+    names = list(dict.fromkeys(head + tail for head, tail in cartesian(NAME_HEADS, NAME_TAILS)))
+    space = len(names) * len(SERIES) * len(BLOCKS)
+    if products > space:
+        raise ValueError(f'At most {space} distinct products can be generated.')
+    existing = set(Product.objects.values_list('name', 'series', 'block'))
+    last_product_id = Product.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    tcg_types = [tcg for tcg, _ in TCG_TYPES]
+    tcg_weights = [weight for _, weight in TCG_TYPES]
+    product_rows = []
+    for index in rng.sample(range(space), products):
+        name = names[index % len(names)]
+        series = SERIES[(index // len(names)) % len(SERIES)]
+        block = BLOCKS[index // (len(names) * len(SERIES))]
+        if (name, series, block) in existing:
+            continue
+        product_rows.append(Product(
+            name=name, series=series, block=block,
+            tcg_type=rng.choices(tcg_types, tcg_weights)[0],
+            slug=f'{slugify(name)}-{slugify(series)}-{slugify(block)}',
+        ))
+    for chunk in _chunks(product_rows, batch_size):
+        Product.objects.bulk_create(chunk)
+    product_ids = list(Product.objects.filter(id__gt=last_product_id).values_list('id', flat=True))
+    rng.shuffle(product_ids)
+    log(f'{len(product_ids)} products')
+
+    # Variants: distinct attribute combinations per product.
+    combos = [(language, version, code, None) for language in languages for version in versions
+              for code in conditions if not conditions[code][0].is_graded]
+    combos += [(language, version, 'GR', grade) for language in languages[:3] for version in versions for grade in grades]
+    per_product = max(1, variants // max(1, len(product_ids)))
+    last_variant_id = Variant.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    for chunk in _chunks(product_ids, max(1, batch_size // per_product)):
+        rows = []
+        for product_id in chunk:
+            for language, version, code, grade in rng.sample(combos, min(per_product, len(combos))):
+                rows.append(Variant(
+                    product_id=product_id, language=language, version=version,
+                    condition=conditions[code][0], grade=grade,
+                ))
+        Variant.objects.bulk_create(rows, ignore_conflicts=True)
+
+    # Listings: variants drawn by product popularity (Zipf), prices by rarity and condition.
+    popularity = dict(zip(product_ids, zipf_weights(len(product_ids))))
+    base_prices = {product_id: rng.lognormvariate(2.5, 1.2) for product_id in product_ids}
+    factors = {condition.id: factor for condition, factor in conditions.values()}
+    variant_rows = list(
+        Variant.objects.filter(id__gt=last_variant_id, product_id__gt=last_product_id)
+        .values_list('id', 'product_id', 'condition_id', 'grade__value')
+    )
+    # ignore_conflicts skips duplicates silently: count what was inserted.
+    variant_count = len(variant_rows)
+    log(f'{variant_count} variants')
+    cumulative = list(accumulate(popularity[row[1]] for row in variant_rows))
+
+    last_listing_id = Listing.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    created = 0
+    for chunk in _chunks(range(listings), batch_size):
+        rows, created_at = [], []
+        for variant_id, product_id, condition_id, grade_value in rng.choices(
+            variant_rows, cum_weights=cumulative, k=len(chunk)
+        ):
+            factor = factors[condition_id] * (float(grade_value) / 5 if grade_value else 1)
+            price = Decimal(str(round(base_prices[product_id] * factor * rng.uniform(0.8, 1.25), 2)))
+            rows.append(Listing(
+                product_id=product_id, variant_id=variant_id, seller_id=rng.choice(seller_ids),
+                price=max(price, Decimal('0.50')),
+                stock=0 if rng.random() < 0.1 else rng.randint(1, 5),
+                status=rng.choices(['active', 'sold', 'inactive'], [90, 8, 2])[0],
+            ))
+            created_at.append(now - timedelta(seconds=rng.randint(0, 365 * 86400)))
+        Listing.objects.bulk_create(rows)
+        for row, timestamp in zip(rows, created_at):
+            row.created_at = timestamp
+        Listing.objects.bulk_update(rows, ['created_at'])
+        created += len(rows)
+        if created % (batch_size * 20) == 0:
+            log(f'{created} listings')
+    log(f'{created} listings')
+
+    upserted, _ = sync_search_documents(Listing.objects.filter(id__gt=last_listing_id), batch_size=batch_size)
+    bump_all_generations()
+    log(f'{upserted} search documents')
+    rebuild_listing_stats(batch_size=batch_size)
+    log('listing stats rebuilt')
+    return {'products': len(product_ids), 'variants': variant_count, 'listings': created, 'documents': upserted}
@@ -0,0 +1,386 @@
+"""
+Bulk catalog import from CSV or JSON Lines.
+
+Each JSONL line is one product with its variants and images::
+
+    {"name": "Charizard", "series": "Base Set", "block": "Wizards", "tcg_type": "pokemon",
+     "categories": ["holo"], "languages": ["EN", "FR"], "versions": ["1st"],
+     "variants": [{"language": "EN", "version": "1st", "condition": "GR", "grade": "PSA 9"}],
+     "images": [{"image": "product_images/charizard.jpg", "alt_text": "Front"}]}
+
+A CSV row is one variant: the product columns are repeated and consecutive
+rows of the same product are merged. Multi-valued cells (``categories``,
+``languages``, ``versions``, ``images``) are separated by ``|``.
+
+The input is read as a stream and written in batches: one transaction per
+batch, a few ``bulk_create`` calls each, including the many-to-many rows.
+Languages, versions, conditions and grades are resolved from the in-memory
+reference tables and categories from a map loaded once. A product is
+identified by its (name, series, block) triple, so importing the same file
+twice creates nothing the second time; ``position`` counts input rows and lets
+an interrupted import restart after its last committed batch.
+
+Bulk writes skip model signals, so callers refresh search caches, conditional
+GET stamps and the autocomplete index once per batch (``finish_batch``).
+"""
+import csv
+import json
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from core.table_versions import bump_table_versions
+from products.models import Category, Condition, Grade, Language, Product, ProductImage, Variant, Version
+
+from .autocomplete import autocomplete_index
+from .reference_data import reference_table
+from .result_cache import bump_generations
+
+FORMATS = ('csv', 'jsonl')
+LIST_SEPARATOR = '|'
+TCG_TYPES = {tcg_type for tcg_type, _ in Product.TCG_TYPES}
+
+ProductRecord = namedtuple(
+    'ProductRecord',
+    'position key tcg_type slug description category_ids language_ids version_ids variants images',
+)
+
+
+class ImportCounts(dict):
+    """Created and skipped row counts, plus the rejected records."""
+
+    def __init__(self):
+        super().__init__(products=0, existing=0, variants=0, images=0, rejected=0)
+        self.errors = []
+
+    def reject(self, position, message):
+        self['rejected'] += 1
+        self.errors.append((position, message))
+
+
+def detect_format(path):
+    suffix = str(path).rsplit('.', 1)[-1].lower()
+    if suffix == 'csv':
+        return 'csv'
+    if suffix in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    raise ValueError(f"Cannot tell the format of {path}; pass one of: {', '.join(FORMATS)}.")
+
+
+def _split(value):
+    if isinstance(value, (list, tuple)):
+        return [item for item in value if item not in (None, '')]
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f'Expected a list or a {LIST_SEPARATOR!r}-separated string, got {value!r}.')
+    return [item.strip() for item in (value or '').split(LIST_SEPARATOR) if item.strip()]
+
+
+def _objects(raw, field, allow_strings=False):
+    """The list of objects under ``raw[field]``, or ValueError if it is not one."""
+    value = raw.get(field) or []
+    kinds = (dict, str) if allow_strings else dict
+    if not isinstance(value, list) or not all(isinstance(item, kinds) for item in value):
+        expected = 'objects or strings' if allow_strings else 'objects'
+        raise ValueError(f'{field.capitalize()} must be a list of {expected}.')
+    return value
+
+
+def _blank_to_none(value):
+    if isinstance(value, (list, dict)):
+        raise ValueError(f'Expected a single value, got {value!r}.')
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value in (None, '') else value
+
+
+def read_jsonl(lines, skip=0):
+    """Yield ``(position, record)`` for each non-empty line after the first ``skip``."""
+    for position, line in enumerate(lines, start=1):
+        if position <= skip or not line.strip():
+            continue
+        try:
+            yield position, json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield position, ValueError(f'Invalid JSON: {exc}')
+
+
+def read_csv(lines, skip=0):
+    """
+    Yield ``(position, record)`` per product, merging its consecutive variant
+    rows. ``position`` is the last data row of the product.
+    """
+    current, current_key, position = None, None, skip
+    for position, row in enumerate(csv.DictReader(lines), start=1):
+        if position <= skip:
+            continue
+        key = (row.get('name'), row.get('series'), row.get('block'))
+        if current is not None and key != current_key:
+            yield position - 1, current
+            current = None
+        if current is None:
+            current_key = key
+            current = {
+                field: row.get(field)
+                for field in ('name', 'series', 'block', 'tcg_type', 'slug', 'description')
+            }
+            for field in ('categories', 'languages', 'versions'):
+                current[field] = _split(row.get(field))
+            current['images'] = [{'image': image} for image in _split(row.get('images'))]
+            current['variants'] = []
+        if _blank_to_none(row.get('language')):
+            current['variants'].append({
+                field: row.get(field) for field in ('language', 'version', 'condition', 'grade')
+            })
+    if current is not None:
+        yield position, current
+
+
+def read_records(stream, format, skip=0):
+    readers = {'csv': read_csv, 'jsonl': read_jsonl}
+    return readers[format](stream, skip=skip)
+
+
+class References:
+    """Id lookups for the codes used in import records, all served from memory."""
+
+    def __init__(self):
+        self.categories = {}
+        for category_id, slug, name in Category.objects.values_list('id', 'slug', 'name'):
+            self.categories.setdefault(name.casefold(), category_id)
+            self.categories[slug.casefold()] = category_id
+        self.grades = {}
+        for grade in reference_table(Grade).all():
+            self.grades.setdefault((grade.grader.upper(), Decimal(grade.value).quantize(Decimal('0.1'))), grade)
+
+    @staticmethod
+    def _code(model, value):
+        row = reference_table(model).by_code(value)
+        if row is None:
+            raise ValueError(f'Unknown {model._meta.verbose_name} {value!r}.')
+        return row
+
+    def category_id(self, value):
+        try:
+            return self.categories[str(value).casefold()]
+        except KeyError:
+            raise ValueError(f'Unknown category {value!r}.') from None
+
+    def language_id(self, value):
+        return self._code(Language, value).pk
+
+    def version_id(self, value):
+        return self._code(Version, value).pk
+
+    def condition(self, value):
+        return self._code(Condition, value)
+
+    def grade_id(self, value):
+        if isinstance(value, dict):
+            grader, grade_value = value.get('grader'), value.get('value')
+        else:
+            grader, _, grade_value = str(value).strip().rpartition(' ')
+        try:
+            key = (str(grader or '').strip().upper(), Decimal(str(grade_value)).quantize(Decimal('0.1')))
+        except InvalidOperation:
+            raise ValueError(f'Invalid grade {value!r}.') from None
+        if key not in self.grades:
+            raise ValueError(f'Unknown grade {value!r}.')
+        return self.grades[key].pk
+
+
+def product_key(name, series, block):
+    return (name, series or None, block or None)
+
+
+def default_slug(name, series, block):
+    return '-'.join(slugify(part) for part in (name, series, block) if part)
+
+
+def parse_record(position, raw, references):
+    """Validate one input record and resolve its codes to ids."""
+    if isinstance(raw, Exception):
+        raise raw
+    if not isinstance(raw, dict):
+        raise ValueError('Expected an object.')
+    name = _blank_to_none(raw.get('name'))
+    if not name:
+        raise ValueError('A product needs a name.')
+    key = product_key(name, _blank_to_none(raw.get('series')), _blank_to_none(raw.get('block')))
+    tcg_type = _blank_to_none(raw.get('tcg_type')) or 'pokemon'
+    if tcg_type not in TCG_TYPES:
+        raise ValueError(f'Unknown tcg_type {tcg_type!r}.')
+
+    variants = []
+    for variant in _objects(raw, 'variants'):
+        condition = references.condition(variant.get('condition'))
+        grade = _blank_to_none(variant.get('grade'))
+        if grade and not condition.is_graded:
+            raise ValueError("You cannot assign a grade with a non-graded condition.")
+        if not grade and condition.is_graded:
+            raise ValueError("A graded condition must have a grade value.")
+        variants.append((
+            references.language_id(variant.get('language')),
+            references.version_id(variant.get('version')),
+            condition.pk,
+            references.grade_id(grade) if grade else None,
+        ))
+
+    images = []
+    for image in _objects(raw, 'images', allow_strings=True):
+        if isinstance(image, str):
+            image = {'image': image}
+        path = _blank_to_none(image.get('image'))
+        if path:
+            images.append((str(path), _blank_to_none(image.get('alt_text'))))
+
+    return ProductRecord(
+        position=position,
+        key=key,
+        tcg_type=tcg_type,
+        slug=_blank_to_none(raw.get('slug')) or default_slug(*key),
+        description=_blank_to_none(raw.get('description')),
+        category_ids=[references.category_id(value) for value in _split(raw.get('categories'))],
+        language_ids=[references.language_id(value) for value in _split(raw.get('languages'))],
+        version_ids=[references.version_id(value) for value in _split(raw.get('versions'))],
+        variants=variants,
+        images=images,
+    )
+
+
+def _product_ids(keys):
+    """Ids of the existing products among ``keys``, with one query."""
+    names = {name for name, _, _ in keys}
+    rows = Product.objects.filter(name__in=names).values_list('id', 'name', 'series', 'block')
+    return {
+        key: product_id
+        for product_id, key in ((row[0], product_key(*row[1:])) for row in rows)
+        if key in keys
+    }
+
+
+def _row_count(model, product_ids):
+    return model.objects.filter(product_id__in=product_ids.values()).count()
+
+
+def import_batch(records, counts):
+    """
+    Write one batch of parsed records in a single transaction. Products, their
+    relations, variants and images that already exist are left untouched.
+    """
+    merged = {}
+    for record in records:
+        if record.key in merged:
+            first = merged[record.key]
+            record = first._replace(
+                category_ids=first.category_ids + record.category_ids,
+                language_ids=first.language_ids + record.language_ids,
+                version_ids=first.version_ids + record.version_ids,
+                variants=first.variants + record.variants,
+                images=first.images + record.images,
+            )
+        merged[record.key] = record
+
+    with transaction.atomic():
+        product_ids = _product_ids(merged.keys())
+        counts['existing'] += len(product_ids)
+        # ignore_conflicts covers a concurrent import of the same rows; counts
+        # are re-read afterwards so they only include rows really written.
+        Product.objects.bulk_create([
+            Product(
+                name=name, series=series, block=block,
+                tcg_type=record.tcg_type, slug=record.slug, description=record.description,
+            )
+            for (name, series, block), record in merged.items()
+            if (name, series, block) not in product_ids
+        ], ignore_conflicts=True)
+        created = _product_ids(merged.keys())
+        counts['products'] += len(created) - len(product_ids)
+        for key, record in merged.items():
+            if key not in created:
+                counts.reject(record.position, f'Slug {record.slug!r} is already used by another product.')
+        product_ids = created
+
+        for field, attribute in (
+            ('categories', 'category_ids'),
+            ('allowed_languages', 'language_ids'),
+            ('allowed_versions', 'version_ids'),
+        ):
+            through = getattr(Product, field).through
+            target = getattr(Product, field).field.m2m_reverse_field_name()
+            through.objects.bulk_create([
+                through(product_id=product_ids[key], **{f'{target}_id': target_id})
+                for key, record in merged.items() if key in product_ids
+                for target_id in dict.fromkeys(getattr(record, attribute))
+            ], ignore_conflicts=True)
+
+        existing_variants = set(
+            Variant.objects.filter(product_id__in=product_ids.values())
+            .values_list('product_id', 'language_id', 'version_id', 'condition_id', 'grade_id')
+        )
+        variants = [
+            (product_ids[key], *combination)
+            for key, record in merged.items() if key in product_ids
+            for combination in record.variants
+        ]
+        variants = [row for row in dict.fromkeys(variants) if row not in existing_variants]
+        before = _row_count(Variant, product_ids)
+        Variant.objects.bulk_create([
+            Variant(product_id=product_id, language_id=language_id, version_id=version_id,
+                    condition_id=condition_id, grade_id=grade_id)
+            for product_id, language_id, version_id, condition_id, grade_id in variants
+        ], ignore_conflicts=True)
+        counts['variants'] += _row_count(Variant, product_ids) - before
+
+        existing_images = set(
+            ProductImage.objects.filter(product_id__in=product_ids.values()).values_list('product_id', 'image')
+        )
+        images = {}
+        for key, record in merged.items():
+            if key in product_ids:
+                for image, alt_text in record.images:
+                    images.setdefault((product_ids[key], image), alt_text)
+        images = {row: alt_text for row, alt_text in images.items() if row not in existing_images}
+        before = _row_count(ProductImage, product_ids)
+        ProductImage.objects.bulk_create([
+            ProductImage(product_id=product_id, image=image, alt_text=alt_text)
+            for (product_id, image), alt_text in images.items()
+        ], ignore_conflicts=True)
+        counts['images'] += _row_count(ProductImage, product_ids) - before
+    return {record.tcg_type for record in merged.values()}
+
+
+def finish_batch(tcg_types):
+    """Do what the skipped model signals would have done for a committed batch."""
+    bump_generations(*tcg_types)
+    bump_table_versions(Product._meta.db_table)
+    # Rebuilt in the background rather than refreshed product by product.
+    autocomplete_index.mark_stale()
+
+
+def import_catalog(records, batch_size=500, on_batch=None):
+    """
+    Import ``(position, raw record)`` pairs, as yielded by ``read_records``.
+    Invalid records are rejected and reported in the returned counts without
+    stopping the import. ``on_batch(position, counts)`` is called after each
+    committed batch with the input position it covers.
+    """
+    counts = ImportCounts()
+    references = References()
+    batch, position = [], 0
+    for position, raw in records:
+        try:
+            batch.append(parse_record(position, raw, references))
+        except ValueError as exc:
+            counts.reject(position, str(exc))
+        if len(batch) >= batch_size:
+            finish_batch(import_batch(batch, counts))
+            batch = []
+            if on_batch:
+                on_batch(position, counts)
+    if batch:
+        finish_batch(import_batch(batch, counts))
+    if on_batch and position:
+        on_batch(position, counts)
+    return counts
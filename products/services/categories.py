@@ -0,0 +1,62 @@
+"""
+Category hierarchy helpers built on ``Category.path``.
+
+Each category stores the ids from its root down to itself ("3/12/40/"), so a
+whole subtree is one ``path LIKE '3/12/%'`` range scan on
+``products_category_path_idx``. ``CategoryTree`` loads the full tree, or the
+subtree under one category, in a single query and links children in memory
+for ``CategorySerializer``.
+"""
+from collections import defaultdict
+
+from django.db.models import Q
+
+from products.models import Category, Product
+
+
+class CategoryTree:
+    """Categories fetched with one query, with their children linked in memory."""
+
+    def __init__(self, categories):
+        categories = list(categories)
+        self.nodes = {category.pk: category for category in categories}
+        self._children = defaultdict(list)
+        self.roots = []
+        for category in sorted(categories, key=lambda category: category.name):
+            if category.parent_id in self.nodes:
+                self._children[category.parent_id].append(category)
+            else:
+                self.roots.append(category)
+
+    @classmethod
+    def load(cls, root=None):
+        """The whole tree, or ``root`` and its descendants."""
+        categories = Category.objects.all()
+        if root is not None:
+            categories = categories.filter(path__startswith=root.path)
+        return cls(categories)
+
+    def __contains__(self, category):
+        return category.pk in self.nodes
+
+    def children_of(self, category):
+        return self._children.get(category.pk, [])
+
+
+def descendants_condition(categories, field='path'):
+    """``Q`` matching the given categories and all their descendants."""
+    condition = Q(pk__in=[])
+    for category in categories:
+        condition |= Q(**{f'{field}__startswith': category.path})
+    return condition
+
+
+def products_in_categories(queryset, categories):
+    """
+    Restrict a ``Product`` queryset to products filed under ``categories`` or
+    any of their descendants, as a semi-join so no ``DISTINCT`` is needed.
+    """
+    memberships = Product.categories.through.objects.filter(
+        descendants_condition(categories, field='category__path')
+    )
+    return queryset.filter(pk__in=memberships.values('product_id'))
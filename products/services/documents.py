@@ -0,0 +1,112 @@
+"""
+Maintenance of ``ListingSearchDocument``, the join-free read model of listing
+search.
+
+``sync_search_documents`` takes any ``Listing`` queryset: active listings get
+their document upserted, the others lose it. Model signals call it for every
+listing affected by a change; bulk jobs should call it themselves.
+"""
+from django.contrib.postgres.search import SearchVector
+from django.db.models import Value
+from django.db.models.functions import Concat
+
+from products.models import Listing, ListingSearchDocument
+
+from .search import SEARCH_CONFIG, is_postgres
+
+DOCUMENT_FIELDS = [
+    'product', 'variant', 'product_name', 'product_series', 'product_block', 'tcg_type',
+    'language_code', 'version_code', 'condition_code', 'grader', 'grade_value', 'labels',
+    'price', 'stock', 'created_at',
+]
+
+# Product name ranks above series/block, which rank above attribute labels.
+DOCUMENT_VECTOR = (
+    SearchVector('product_name', weight='A', config=SEARCH_CONFIG)
+    + SearchVector(
+        Concat('product_series', Value(' '), 'product_block'), weight='B', config=SEARCH_CONFIG
+    )
+    + SearchVector('labels', weight='C', config=SEARCH_CONFIG)
+)
+
+_SOURCE_FIELDS = (
+    'id', 'status', 'product_id', 'variant_id', 'price', 'stock', 'created_at',
+    'product__name', 'product__series', 'product__block', 'product__tcg_type',
+    'variant__language__code', 'variant__language__name',
+    'variant__version__code', 'variant__version__name',
+    'variant__condition__code', 'variant__condition__label',
+    'variant__grade__grader', 'variant__grade__value',
+)
+
+
+def _labels(row):
+    parts = [
+        row['variant__language__name'], row['variant__language__code'], row['variant__version__name'],
+        row['variant__condition__label'], row['variant__grade__grader'],
+        row['variant__grade__value'],
+    ]
+    return ' '.join(str(part) for part in parts if part not in (None, ''))[:400]
+
+
+def _document(row):
+    return ListingSearchDocument(
+        listing_id=row['id'],
+        product_id=row['product_id'],
+        variant_id=row['variant_id'],
+        product_name=row['product__name'],
+        product_series=row['product__series'],
+        product_block=row['product__block'],
+        tcg_type=row['product__tcg_type'],
+        language_code=row['variant__language__code'],
+        version_code=row['variant__version__code'],
+        condition_code=row['variant__condition__code'],
+        grader=row['variant__grade__grader'],
+        grade_value=row['variant__grade__value'],
+        labels=_labels(row),
+        price=row['price'],
+        stock=row['stock'],
+        created_at=row['created_at'],
+    )
+
+
+def sync_search_documents(listings=None, batch_size=1000):
+    """
+    Bring the documents of ``listings`` (default: every listing) up to date.
+    Returns ``(upserted, deleted)`` counts.
+    """
+    listings = Listing.objects.all() if listings is None else listings
+    rows = listings.order_by().values(*_SOURCE_FIELDS)
+
+    upserted = deleted = 0
+    batch, stale = [], []
+    for row in rows.iterator(chunk_size=batch_size):
+        if row['status'] == 'active':
+            batch.append(_document(row))
+        else:
+            stale.append(row['id'])
+        if len(batch) >= batch_size:
+            upserted += _write(batch)
+            batch = []
+        if len(stale) >= batch_size:
+            deleted += ListingSearchDocument.objects.filter(listing_id__in=stale).delete()[0]
+            stale = []
+    upserted += _write(batch)
+    if stale:
+        deleted += ListingSearchDocument.objects.filter(listing_id__in=stale).delete()[0]
+    return upserted, deleted
+
+
+def _write(documents):
+    if not documents:
+        return 0
+    ListingSearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=['listing'],
+        update_fields=DOCUMENT_FIELDS,
+    )
+    if is_postgres():
+        ListingSearchDocument.objects.filter(
+            listing_id__in=[document.listing_id for document in documents]
+        ).update(search_vector=DOCUMENT_VECTOR)
+    return len(documents)
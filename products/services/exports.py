@@ -0,0 +1,169 @@
+"""
+Streaming catalog exports as JSON Lines or CSV.
+
+Rows are read with ``values()`` projections through ``.iterator()``, which
+uses a server-side cursor on PostgreSQL, and encoded one line at a time, so
+an export holds one chunk in memory whatever the table size. Many-to-many
+relations are fetched once per chunk, and codes of languages, versions,
+conditions and grades come from the in-memory reference tables.
+
+List values (a product's categories, languages and versions) are joined
+with ``|`` in CSV, the separator ``import_catalog`` reads.
+"""
+import csv
+import json
+from collections import defaultdict
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from products.models import Condition, Grade, Language, Product, ProductStats, Version
+
+from .catalog_import import LIST_SEPARATOR
+from .product_stats import available_listings
+from .reference_data import reference_table
+
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
+
+PRODUCT_FIELDS = (
+    'id', 'name', 'slug', 'series', 'block', 'tcg_type', 'description', 'categories', 'languages',
+    'versions', 'min_price', 'average_price', 'total_stock', 'listing_count', 'created_at', 'updated_at',
+)
+LISTING_FIELDS = (
+    'id', 'product_id', 'product_name', 'variant_id', 'language', 'version', 'condition', 'grader',
+    'grade', 'price', 'stock', 'seller_id', 'created_at', 'updated_at',
+)
+
+
+def default_chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _code(model, pk, field='code'):
+    row = reference_table(model).get(pk) if pk is not None else None
+    return getattr(row, field) if row is not None else None
+
+
+def _related_codes(field, product_ids):
+    """``{product id: [codes]}`` for one many-to-many field of ``Product``."""
+    through = getattr(Product, field).through
+    target = getattr(Product, field).field.m2m_reverse_field_name()
+    codes = defaultdict(list)
+    if field == 'categories':
+        rows = through.objects.filter(product_id__in=product_ids).values_list('product_id', 'category__slug')
+        for product_id, slug in rows.order_by('category__slug'):
+            codes[product_id].append(slug)
+        return codes
+    model = getattr(Product, field).field.related_model
+    rows = through.objects.filter(product_id__in=product_ids).values_list('product_id', f'{target}_id')
+    for product_id, target_id in rows.order_by(f'{target}_id'):
+        codes[product_id].append(_code(model, target_id))
+    return codes
+
+
+def product_rows(queryset=None, chunk_size=None):
+    """Export rows of ``queryset`` (all products by default), in id order."""
+    chunk_size = chunk_size or default_chunk_size()
+    queryset = (Product.objects.all() if queryset is None else queryset).order_by('pk').values(
+        'id', 'name', 'slug', 'series', 'block', 'tcg_type', 'description', 'created_at', 'updated_at',
+        'stats__min_price', 'stats__price_total', 'stats__total_stock', 'stats__listing_count',
+    )
+    for chunk in chunked(queryset.iterator(chunk_size=chunk_size), chunk_size):
+        product_ids = [row['id'] for row in chunk]
+        relations = {
+            name: _related_codes(field, product_ids)
+            for name, field in (
+                ('categories', 'categories'), ('languages', 'allowed_languages'), ('versions', 'allowed_versions'),
+            )
+        }
+        for row in chunk:
+            listing_count = row.pop('stats__listing_count') or 0
+            price_total = row.pop('stats__price_total')
+            row['min_price'] = row.pop('stats__min_price')
+            row['average_price'] = (
+                (Decimal(price_total) / listing_count).quantize(Decimal('0.01'))
+                if listing_count else ProductStats.EMPTY_AVERAGE_PRICE
+            )
+            row['total_stock'] = row.pop('stats__total_stock') or 0
+            row['listing_count'] = listing_count
+            for name, codes in relations.items():
+                row[name] = codes.get(row['id'], [])
+            yield row
+
+
+def listing_rows(queryset=None, chunk_size=None):
+    """Export rows of ``queryset`` (the available listings by default), in id order."""
+    chunk_size = chunk_size or default_chunk_size()
+    queryset = (available_listings() if queryset is None else queryset).order_by('pk').values_list(
+        'id', 'product_id', 'product__name', 'variant_id', 'variant__language_id', 'variant__version_id',
+        'variant__condition_id', 'variant__grade_id', 'price', 'stock', 'seller_id', 'created_at', 'updated_at',
+    )
+    for (listing_id, product_id, product_name, variant_id, language_id, version_id, condition_id, grade_id,
+         price, stock, seller_id, created_at, updated_at) in queryset.iterator(chunk_size=chunk_size):
+        yield {
+            'id': listing_id,
+            'product_id': product_id,
+            'product_name': product_name,
+            'variant_id': variant_id,
+            'language': _code(Language, language_id),
+            'version': _code(Version, version_id),
+            'condition': _code(Condition, condition_id),
+            'grader': _code(Grade, grade_id, 'grader'),
+            'grade': _code(Grade, grade_id, 'value'),
+            'price': price,
+            'stock': stock,
+            'seller_id': seller_id,
+            'created_at': created_at,
+            'updated_at': updated_at,
+        }
+
+
+EXPORTS = {
+    'products': (product_rows, PRODUCT_FIELDS),
+    'listings': (listing_rows, LISTING_FIELDS),
+}
+
+
+class Echo:
+    """File-like object whose ``write`` returns the line, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return LIST_SEPARATOR.join(str(item) for item in value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[field]) for field in fields])
+
+
+def export_lines(kind, format, queryset=None, chunk_size=None):
+    """Lines of the ``kind`` export ('products' or 'listings') encoded as ``format``."""
+    rows_of, fields = EXPORTS[kind]
+    rows = rows_of(queryset, chunk_size=chunk_size)
+    if format == 'csv':
+        return csv_lines(rows, fields)
+    return jsonl_lines(rows)
@@ -0,0 +1,106 @@
+"""
+Facet counts for listing search.
+
+All facets come from one grouped query over ``ListingSearchDocument``: rows
+are grouped by every facet column (price as a bucket) plus, for each active
+facet filter, whether the row passes it. Each facet is then summed in Python
+over the groups passing every *other* facet filter, which gives the usual
+drill-down counts (selecting a language does not hide the other languages)
+without one query per facet.
+
+Sort modes that drop rows (``grade``, ``best_price``) apply to the facet
+queryset too, and are part of the facet cache key; other sorts only reorder
+rows and share one cached entry.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import BooleanField, Case, CharField, Count, ExpressionWrapper, Value, When
+
+from .result_cache import cached_search
+from .sorting import ROW_SORTS
+
+# Facet name -> document column (``price_bucket`` is annotated below).
+FACETS = {
+    'tcg_type': 'tcg_type',
+    'language': 'language_code',
+    'condition': 'condition_code',
+    'grader': 'grader',
+    'price': 'price_bucket',
+}
+
+# Upper bounds of the price buckets; the last bucket is open-ended.
+PRICE_BUCKETS = (10, 25, 50, 100, 250)
+
+CACHE_PREFIX = 'search:facets:'
+
+PAGING_PARAMS = ('page', 'page_size', 'pagination', 'cursor', 'facets')
+
+
+def price_bucket_labels():
+    lower = 0
+    for upper in PRICE_BUCKETS:
+        yield f'{lower}-{upper}'
+        lower = upper
+    yield f'{lower}+'
+
+
+def price_bucket_expression():
+    labels = list(price_bucket_labels())
+    return Case(
+        *[When(price__lt=upper, then=Value(label)) for upper, label in zip(PRICE_BUCKETS, labels)],
+        default=Value(labels[-1]),
+        output_field=CharField(),
+    )
+
+
+def compute_facets(queryset, facet_filters):
+    """
+    Count the documents of ``queryset`` per facet value.
+
+    ``queryset`` must carry every filter except the facet ones, which are given
+    separately as ``{facet name: Q}``. Returns ``{facet: [{value, count}]}``,
+    most frequent values first (price buckets in price order).
+    """
+    matches = {
+        f'matches_{name}': ExpressionWrapper(condition, output_field=BooleanField())
+        for name, condition in facet_filters.items()
+    }
+    rows = (
+        queryset.order_by()
+        .annotate(price_bucket=price_bucket_expression(), **matches)
+        .values(*FACETS.values(), *matches)
+        .annotate(total=Count('pk'))
+    )
+
+    counts = {name: Counter() for name in FACETS}
+    for row in rows:
+        for name, column in FACETS.items():
+            if row[column] is None:
+                continue
+            if all(row[f'matches_{other}'] for other in facet_filters if other != name):
+                counts[name][row[column]] += row['total']
+
+    facets = {}
+    for name, values in counts.items():
+        if name == 'price':
+            ordered = [(label, values[label]) for label in price_bucket_labels() if values[label]]
+        else:
+            ordered = sorted(values.items(), key=lambda item: (-item[1], str(item[0])))
+        facets[name] = [{'value': value, 'count': count} for value, count in ordered]
+    return facets
+
+
+def cached_facets(params, queryset, facet_filters):
+    """
+    :func:`compute_facets`, cached per filter set (paging ignored) for
+    ``SEARCH_FACETS_CACHE_TIMEOUT`` seconds or until a write bumps the generation.
+    """
+    ignore = PAGING_PARAMS if params.get('sort') in ROW_SORTS else (*PAGING_PARAMS, 'sort')
+    return cached_search(
+        CACHE_PREFIX,
+        params,
+        lambda: compute_facets(queryset, facet_filters),
+        ignore=ignore,
+        timeout=getattr(settings, 'SEARCH_FACETS_CACHE_TIMEOUT', 60),
+    )
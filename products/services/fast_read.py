@@ -0,0 +1,180 @@
+"""
+Read-only fast path for the hot listing and variant lists.
+
+``ListingSerializer`` and ``VariantSerializer`` build a model instance per row
+and walk DRF's field machinery for every nested serializer. Here a page is
+read with one ``values()`` query and each row is rendered from a field map
+computed once per process. The map lists the serializer's readable fields in
+order, each with a getter for its column. Scalars are still formatted by the
+serializer's own fields, so decimals and dates match exactly. Languages,
+versions, conditions and grades come from the reference cache and are
+serialized once per process, until the cache reloads them.
+
+A field added to either serializer without a getter here raises
+``ImproperlyConfigured`` instead of silently disappearing from responses.
+"""
+from decimal import Decimal
+from functools import cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from products.models import Condition, Grade, Language, Listing, ListingStats, Version
+from products.serializers import (
+    ConditionSerializer,
+    GradeSerializer,
+    LanguageSerializer,
+    ListingSerializer,
+    ListingStatsSerializer,
+    VariantSerializer,
+    VersionSerializer,
+)
+
+from .reference_data import reference_table
+
+STATS_COLUMNS = ('min_price', 'price_total', 'total_stock', 'listing_count')
+
+
+def fast_read_enabled():
+    return getattr(settings, 'FAST_READ_PATH', True)
+
+
+class RowRenderer:
+    """Renders ``values()`` rows in the shape of ``serializer_class``."""
+
+    def __init__(self, serializer_class, getters, columns):
+        self.columns = tuple(columns)
+        names = [name for name, field in serializer_class().fields.items() if not field.write_only]
+        missing = set(names) - set(getters)
+        if missing:
+            raise ImproperlyConfigured(
+                f"{serializer_class.__name__} fields without a fast-path getter: {', '.join(sorted(missing))}"
+            )
+        self.steps = [(name, getters[name]) for name in names]
+
+    def render(self, row):
+        return {name: getter(row) for name, getter in self.steps}
+
+
+# (model, pk) -> (cached row, its representation). A row reloaded by the
+# reference cache is a new object, which makes its entry stale.
+_reference_data = {}
+
+
+def reference_data(model, serializer_class, pk):
+    """The serialized reference row ``pk``, rendered once per version of the row."""
+    if pk is None:
+        return None
+    row = reference_table(model).get(pk) or model.objects.get(pk=pk)
+    entry = _reference_data.get((model, pk))
+    if entry is None or entry[0] is not row:
+        entry = _reference_data[(model, pk)] = (row, dict(serializer_class(row).data))
+    return dict(entry[1])
+
+
+def column(name, field):
+    to_representation = field.to_representation
+
+    def get(row):
+        value = row[name]
+        return None if value is None else to_representation(value)
+    return get
+
+
+def raw(name):
+    return lambda row: row[name]
+
+
+def reference(name, model, serializer_class):
+    return lambda row: reference_data(model, serializer_class, row[name])
+
+
+@cache
+def stats_getter(prefix):
+    fields = ListingStatsSerializer().fields
+    price = fields['min_price'].to_representation
+    average = fields['average_price'].to_representation
+
+    def get(row):
+        listing_count = row[f'{prefix}listing_count']
+        if listing_count is None:
+            return None
+        min_price = row[f'{prefix}min_price']
+        # Same rounding as ListingStats.average_price.
+        average_price = (
+            (Decimal(row[f'{prefix}price_total']) / listing_count).quantize(Decimal('0.01'))
+            if listing_count else ListingStats.EMPTY_AVERAGE_PRICE
+        )
+        return {
+            'min_price': None if min_price is None else price(min_price),
+            'average_price': average(average_price),
+            'total_stock': row[f'{prefix}total_stock'],
+            'listing_count': listing_count,
+        }
+    return get
+
+
+@cache
+def variant_renderer(prefix=''):
+    getters = {
+        'id': raw(f'{prefix}id'),
+        'product': raw(f'{prefix}product_id'),
+        'language': reference(f'{prefix}language_id', Language, LanguageSerializer),
+        'version': reference(f'{prefix}version_id', Version, VersionSerializer),
+        'condition': reference(f'{prefix}condition_id', Condition, ConditionSerializer),
+        'grade': reference(f'{prefix}grade_id', Grade, GradeSerializer),
+        'stats': stats_getter(f'{prefix}stats__'),
+    }
+    columns = [
+        f'{prefix}{name}' for name in ('id', 'product_id', 'language_id', 'version_id', 'condition_id', 'grade_id')
+    ] + [f'{prefix}stats__{name}' for name in STATS_COLUMNS]
+    return RowRenderer(VariantSerializer, getters, columns)
+
+
+@cache
+def listing_renderer():
+    fields = ListingSerializer().fields
+    variant = variant_renderer('variant__')
+    getters = {
+        'id': raw('id'),
+        'product': raw('product_id'),
+        'variant': variant.render,
+        'seller': raw('seller_id'),
+        **{name: column(name, fields[name]) for name in ('price', 'stock', 'status', 'created_at', 'updated_at')},
+    }
+    columns = ['id', 'product_id', 'seller_id', 'price', 'stock', 'status', 'created_at', 'updated_at']
+    return RowRenderer(ListingSerializer, getters, columns + list(variant.columns))
+
+
+def values_for(queryset, renderer):
+    """
+    ``queryset`` as ``values()`` rows carrying the renderer's columns, plus
+    ``pk`` and any annotations so keyset pagination can read its sort key.
+    """
+    return queryset.values(*renderer.columns, 'pk', *queryset.query.annotations)
+
+
+def listing_values(queryset):
+    return values_for(queryset, listing_renderer())
+
+
+def variant_values(queryset):
+    return values_for(queryset, variant_renderer())
+
+
+def render_listings(rows):
+    """What ``ListingSerializer(many=True).data`` returns for the same rows."""
+    render = listing_renderer().render
+    return [render(row) for row in rows]
+
+
+def render_variants(rows):
+    """What ``VariantSerializer(many=True).data`` returns for the same rows."""
+    render = variant_renderer().render
+    return [render(row) for row in rows]
+
+
+def render_listings_by_id(listing_ids):
+    """The listings of ``listing_ids``, rendered in that order."""
+    rows = {row['id']: row for row in listing_values(Listing.objects.filter(pk__in=listing_ids))}
+    return render_listings(rows[pk] for pk in listing_ids if pk in rows)
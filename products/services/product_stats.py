@@ -0,0 +1,166 @@
+"""
+Listing statistics of products and variants.
+
+``ProductStats`` and ``VariantStats`` hold the minimum and average price,
+total stock and count of the available listings (active, stock above zero)
+of each product and variant. Model signals pass every listing change to
+``apply_listing_change``, which adjusts the counters with one ``UPDATE`` per
+row; only removing the cheapest listing re-reads the minimum price, through
+the ``(variant, price)`` and ``(product, status)`` listing indexes. Bulk jobs
+that bypass signals (``update()``, ``bulk_create``) should call
+``rebuild_listing_stats``, which the ``reconcile_listing_stats`` command runs
+over the whole catalog.
+
+Readers never aggregate listings: ``product_list_queryset`` joins the
+precomputed row and prefetches every relation ``ProductSerializer`` renders.
+"""
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db.models import Count, F, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Least
+
+from core.table_versions import bump_table_versions
+from products.models import Listing, Product, ProductStats, VariantStats
+
+# Contribution of one listing to the stats rows; see ``listing_state``.
+ListingState = namedtuple('ListingState', ['product_id', 'variant_id', 'status', 'stock', 'price'])
+
+# Stats model and the listing column naming its row.
+STATS_TARGETS = ((ProductStats, 'product_id'), (VariantStats, 'variant_id'))
+
+# Relations rendered by ProductSerializer; category children come from a
+# single CategoryTree query (see CategorySerializer).
+PRODUCT_PREFETCHES = ('categories', 'allowed_languages', 'allowed_versions', 'images')
+
+
+def product_list_queryset(queryset=None):
+    """Products ready for ``ProductSerializer``: stats joined, relations prefetched."""
+    queryset = Product.objects.all() if queryset is None else queryset
+    return queryset.select_related('stats').prefetch_related(*PRODUCT_PREFETCHES)
+
+
+def available_listings():
+    return Listing.objects.filter(status='active', stock__gt=0)
+
+
+def listing_state(listing):
+    return ListingState(
+        listing.product_id, listing.variant_id, listing.status, int(listing.stock), Decimal(str(listing.price))
+    )
+
+
+def _counted(state):
+    return state is not None and state.status == 'active' and state.stock > 0
+
+
+def apply_listing_change(before, after):
+    """
+    Update the stats rows for a listing going from state ``before`` to
+    ``after`` (``None`` when created or deleted). Returns whether any changed.
+    """
+    removed = before if _counted(before) else None
+    added = after if _counted(after) else None
+    if removed == added:
+        return False
+    for model, key in STATS_TARGETS:
+        # [listing count, stock, price total, added price, removed price] per row.
+        changes = defaultdict(lambda: [0, 0, Decimal('0'), None, None])
+        if removed is not None:
+            change = changes[getattr(removed, key)]
+            change[0] -= 1
+            change[1] -= removed.stock
+            change[2] -= removed.price
+            change[4] = removed.price
+        if added is not None:
+            change = changes[getattr(added, key)]
+            change[0] += 1
+            change[1] += added.stock
+            change[2] += added.price
+            change[3] = added.price
+        for target_id, (count, stock, total, added_price, removed_price) in changes.items():
+            _apply(model, key, target_id, count, stock, total, added_price, removed_price)
+    return True
+
+
+def _apply(model, key, target_id, count, stock, total, added_price, removed_price):
+    rows = model.objects.filter(pk=target_id)
+    values = {
+        'listing_count': F('listing_count') + count,
+        'total_stock': F('total_stock') + stock,
+        'price_total': F('price_total') + total,
+    }
+    if added_price is not None:
+        values['min_price'] = Least(Coalesce('min_price', Value(added_price)), Value(added_price))
+    if not rows.update(**values):
+        # First available listing of this product or variant (or a row lost
+        # to a concurrent rebuild): aggregate it from the listings.
+        rebuild_listing_stats(**{f'{key}s': [target_id]})
+        return
+    if removed_price is not None:
+        # The removed listing may have been the cheapest one.
+        cheapest = (
+            available_listings()
+            .filter(**{key: OuterRef('pk')})
+            .order_by('price')
+            .values('price')[:1]
+        )
+        rows.filter(min_price__gte=removed_price).update(min_price=Subquery(cheapest))
+    if count < 0:
+        # Like the rebuild, keep no row for a product or variant left without listings.
+        rows.filter(listing_count=0).delete()
+
+
+def rebuild_listing_stats(product_ids=None, variant_ids=None, batch_size=1000):
+    """
+    Recompute stats from the listings: for the given products and variants,
+    or for the whole catalog when neither is given. Returns the rows written.
+    """
+    scopes = {'product_id': product_ids, 'variant_id': variant_ids}
+    everything = product_ids is None and variant_ids is None
+    written = 0
+    for model, key in STATS_TARGETS:
+        ids = scopes[key]
+        if not everything and ids is None:
+            continue
+        listings = available_listings()
+        stale = model.objects.all()
+        if ids is not None:
+            listings = listings.filter(**{f'{key}__in': ids})
+            stale = stale.filter(pk__in=ids)
+        rows = (
+            listings.order_by()
+            .values(key)
+            .annotate(
+                min_price=Min('price'),
+                price_total=Sum('price'),
+                total_stock=Sum('stock'),
+                listing_count=Count('id'),
+            )
+        )
+        batch, seen = [], set()
+        for row in rows.iterator(chunk_size=batch_size):
+            seen.add(row[key])
+            batch.append(model(**row))
+            if len(batch) >= batch_size:
+                written += _write(model, batch)
+                batch = []
+        written += _write(model, batch)
+        if ids is not None:
+            stale.exclude(pk__in=seen).delete()
+        else:
+            stale.exclude(pk__in=Subquery(available_listings().values(key))).delete()
+    bump_table_versions(*(model._meta.db_table for model, _ in STATS_TARGETS))
+    return written
+
+
+def _write(model, rows):
+    if not rows:
+        return 0
+    model.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=[model._meta.pk.name],
+        update_fields=['min_price', 'price_total', 'total_stock', 'listing_count'],
+    )
+    return len(rows)
@@ -0,0 +1,116 @@
+"""
+Structured search syntax for the single search box.
+
+``parse_query("charizard lang:jp grade:psa>=9 price:<200")`` splits the
+operators out of the free text and compiles them to conditions on the
+indexed ``ListingSearchDocument`` columns, so only ``"charizard"`` is left for
+text matching. Supported operators::
+
+    lang:jp  language:french      language code or name
+    version:1st  ver:unlimited    version code or name
+    cond:nm  condition:"near mint" condition code or label
+    grade:psa  grade:psa>=9  grade:>9.5   grader and/or grade value
+    price:<200  price:>=10  price:10-50   price bounds
+    tcg:pokemon  type:magic       tcg type
+    series:"base set"  block:xy   exact series / block, case-insensitive
+
+Values may be quoted. Unknown operators and values that do not parse stay in
+the free text.
+"""
+import re
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+from products.models import Condition, Language, Version
+
+from .reference_data import reference_table
+
+# ``conditions`` maps a facet name (see ``products.services.facets``) or
+# ``None`` for non-facet filters to a ``Q`` on document columns.
+ParsedQuery = namedtuple('ParsedQuery', ['text', 'conditions'])
+
+_OPERATOR_RE = re.compile(r'(?<!\S)(?P<key>[a-z_]+):(?P<value>"[^"]*"|\S+)', re.IGNORECASE)
+_COMPARISON_RE = re.compile(r'^(?P<op><=|>=|<|>|=)?(?P<number>\d+(?:[.,]\d+)?)$')
+_RANGE_RE = re.compile(r'^(?P<low>\d+(?:[.,]\d+)?)(?:-|\.\.)(?P<high>\d+(?:[.,]\d+)?)$')
+_GRADE_RE = re.compile(r'^(?P<grader>[a-z]+)?(?P<comparison>(?:<=|>=|<|>|=)?\d+(?:[.,]\d+)?)?$', re.IGNORECASE)
+
+_LOOKUPS = {'<': 'lt', '<=': 'lte', '>': 'gt', '>=': 'gte', '=': 'exact', None: 'exact'}
+
+
+def _number(value):
+    try:
+        return Decimal(value.replace(',', '.'))
+    except InvalidOperation:
+        return None
+
+
+def compile_comparison(field, value):
+    """``<200`` -> ``Q(price__lt=200)``, ``10-50`` -> a closed range; ``None`` if invalid."""
+    match = _RANGE_RE.match(value)
+    if match:
+        return Q(**{f'{field}__gte': _number(match['low']), f'{field}__lte': _number(match['high'])})
+    match = _COMPARISON_RE.match(value)
+    if match:
+        return Q(**{f"{field}__{_LOOKUPS[match['op']]}": _number(match['number'])})
+    return None
+
+
+def _reference_code(model, value):
+    """Canonical code of a reference row given its code or label in any case."""
+    row = reference_table(model).by_code(value)
+    return row.code if row is not None else value
+
+
+def _compile_grade(value):
+    match = _GRADE_RE.match(value)
+    if not match or not (match['grader'] or match['comparison']):
+        return None
+    condition = Q()
+    if match['grader']:
+        condition &= Q(grader=match['grader'].upper())
+    if match['comparison']:
+        condition &= compile_comparison('grade_value', match['comparison'])
+    return condition
+
+
+def _compile(key, value):
+    """``(facet, Q)`` for one operator, or ``None`` when it is not understood."""
+    if key in ('lang', 'language'):
+        return 'language', Q(language_code=_reference_code(Language, value))
+    if key in ('ver', 'version'):
+        return None, Q(version_code=_reference_code(Version, value))
+    if key in ('cond', 'condition'):
+        return 'condition', Q(condition_code=_reference_code(Condition, value))
+    if key == 'grade':
+        condition = _compile_grade(value)
+        return ('grader', condition) if condition is not None else None
+    if key == 'price':
+        condition = compile_comparison('price', value)
+        return ('price', condition) if condition is not None else None
+    if key in ('tcg', 'type', 'tcg_type'):
+        return 'tcg_type', Q(tcg_type=value.lower())
+    if key == 'series':
+        return None, Q(product_series__iexact=value)
+    if key == 'block':
+        return None, Q(product_block__iexact=value)
+    return None
+
+
+def parse_query(query):
+    """Split ``query`` into the remaining free text and compiled operator conditions."""
+    conditions = []
+    kept = []
+    position = 0
+    for match in _OPERATOR_RE.finditer(query or ''):
+        value = match['value'].strip('"').strip()
+        compiled = _compile(match['key'].lower(), value) if value else None
+        if compiled is None:
+            continue
+        kept.append(query[position:match.start()])
+        position = match.end()
+        conditions.append(compiled)
+    kept.append((query or '')[position:])
+    text = ' '.join(''.join(kept).split())
+    return ParsedQuery(text, conditions)
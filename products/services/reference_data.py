@@ -0,0 +1,117 @@
+"""
+Process-local cache of the reference tables: languages, versions, conditions
+and grades.
+
+They change a few times a year but are read on every variant and listing
+serialization and every search operator. Each process keeps a copy of each
+table, loaded with one query, and serves lookups by id or code from memory.
+
+Freshness is tracked with a version stamp per table in the Django cache (see
+``core.table_versions``).
+Saving or deleting a row bumps it (see ``products.signals``), and every
+process reloads its copy once it sees a new stamp. To spare a cache round
+trip per lookup, a process compares stamps at most once every
+``REFERENCE_CACHE_CHECK_INTERVAL`` seconds, so admin edits reach other
+processes within that delay. The process that made the edit sees it
+immediately.
+
+Cached rows are shared by every thread of the process and must never be
+mutated or saved; hand out a copy when a caller may change the instance.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from core.table_versions import bump_table_versions, table_version
+from products.models import Condition, Grade, Language, Version
+
+
+def check_interval():
+    return float(getattr(settings, 'REFERENCE_CACHE_CHECK_INTERVAL', 1.0))
+
+
+class ReferenceTable:
+    """In-memory copy of one reference table, looked up by id or code."""
+
+    def __init__(self, model, lookup_fields=()):
+        self.model = model
+        # Fields matched case-insensitively by ``by_code``, in priority order.
+        self.lookup_fields = lookup_fields
+        self._lock = threading.Lock()
+        self._rows = None
+        self._index = {}
+        self._version = None
+        self._checked_at = 0.0
+
+    @property
+    def table_name(self):
+        return self.model._meta.db_table
+
+    def version(self):
+        return table_version(self.table_name)
+
+    def _current_rows(self):
+        now = time.monotonic()
+        rows = self._rows
+        if rows is not None and now - self._checked_at < check_interval():
+            return rows
+        version = self.version()
+        with self._lock:
+            if self._rows is None or version != self._version:
+                self._rows = {row.pk: row for row in self.model.objects.all()}
+                self._index = {
+                    (field, str(getattr(row, field)).casefold()): row
+                    for field in self.lookup_fields
+                    for row in self._rows.values()
+                }
+                self._version = version
+            self._checked_at = now
+            return self._rows
+
+    def all(self):
+        return list(self._current_rows().values())
+
+    def get(self, pk):
+        """The row with primary key ``pk``, or ``None``."""
+        try:
+            return self._current_rows().get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+    def by_code(self, value):
+        """The row whose code (or name/label) equals ``value`` in any case, or ``None``."""
+        self._current_rows()
+        key = str(value).casefold()
+        for field in self.lookup_fields:
+            row = self._index.get((field, key))
+            if row is not None:
+                return row
+        return None
+
+    def invalidate(self):
+        """Drop this process's copy and make every other process reload theirs."""
+        bump_table_versions(self.table_name)
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._rows = None
+            self._version = None
+
+
+REFERENCE_TABLES = {
+    Language: ReferenceTable(Language, ('code', 'name')),
+    Version: ReferenceTable(Version, ('code', 'name')),
+    Condition: ReferenceTable(Condition, ('code', 'label')),
+    Grade: ReferenceTable(Grade),
+}
+
+
+def reference_table(model):
+    return REFERENCE_TABLES[model]
+
+
+def clear_reference_tables():
+    for table in REFERENCE_TABLES.values():
+        table.clear()
@@ -0,0 +1,117 @@
+"""
+Versioned cache of listing search responses.
+
+Cache keys embed a generation counter: one per ``tcg_type`` plus ``*`` for
+searches spanning every type. Writes never delete entries, they bump the
+counters of the types they touch (see ``products.signals``), so every key
+computed afterwards misses and the old entries simply expire. Counters start
+at a timestamp so an evicted counter can never come back to a value that
+older entries were stored under.
+
+Cached responses keep their ``next``/``previous`` links relative
+(``relative_links``); ``absolute_links`` rebuilds them from each request, so
+every client gets links on its own host and scheme.
+"""
+import hashlib
+import json
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from django.conf import settings
+from django.core.cache import cache
+
+from products.models import Product
+
+GENERATION_PREFIX = 'search:gen:'
+ALL_TYPES = '*'
+
+# Parameters that never change a search response.
+IGNORED_PARAMS = ('format',)
+
+# Pagination links of a response, stored without scheme and host.
+LINK_FIELDS = ('next', 'previous')
+
+
+def _generation_key(tcg_type):
+    return f'{GENERATION_PREFIX}{tcg_type}'
+
+
+def generation(tcg_type=ALL_TYPES):
+    key = _generation_key(tcg_type or ALL_TYPES)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, time.time_ns(), None)
+        value = cache.get(key)
+    return value
+
+
+def bump_generations(*tcg_types):
+    """Invalidate cached searches over ``tcg_types`` and over every type."""
+    for tcg_type in {*tcg_types, ALL_TYPES}:
+        if tcg_type is None:
+            continue
+        key = _generation_key(tcg_type)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def bump_all_generations():
+    bump_generations(*(tcg_type for tcg_type, _ in Product.TCG_TYPES))
+
+
+def normalize_params(params, ignore=()):
+    """Sorted, non-empty query parameters with a case- and space-insensitive ``q``."""
+    normalized = {}
+    for key, value in sorted(params.items()):
+        if key in ignore or key in IGNORED_PARAMS or value in (None, ''):
+            continue
+        if key == 'q':
+            value = ' '.join(value.split()).casefold()
+        normalized[key] = value
+    return normalized
+
+
+def search_cache_key(prefix, params, ignore=()):
+    """Key of a search for ``params``, under the current generation of its ``tcg_type``."""
+    normalized = normalize_params(params, ignore)
+    payload = json.dumps(
+        [generation(normalized.get('tcg_type')), normalized], sort_keys=True, default=str
+    )
+    return f'{prefix}{hashlib.md5(payload.encode("utf-8")).hexdigest()}'
+
+
+def cached_search(prefix, params, compute, ignore=(), timeout=None):
+    """Return the cached value for ``params``, computing and storing it on a miss."""
+    key = search_cache_key(prefix, params, ignore)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        if timeout is None:
+            timeout = getattr(settings, 'SEARCH_RESULT_CACHE_TIMEOUT', 300)
+        cache.set(key, value, timeout)
+    return value
+
+
+def relative_links(data):
+    """``data`` with its pagination links reduced to path and query string."""
+    if not isinstance(data, dict):
+        return data
+    data = dict(data)
+    for field in LINK_FIELDS:
+        if data.get(field):
+            parts = urlsplit(data[field])
+            data[field] = urlunsplit(('', '', parts.path, parts.query, parts.fragment))
+    return data
+
+
+def absolute_links(data, request):
+    """``data`` with its relative pagination links made absolute for ``request``."""
+    if not isinstance(data, dict):
+        return data
+    data = dict(data)
+    for field in LINK_FIELDS:
+        if data.get(field):
+            data[field] = request.build_absolute_uri(data[field])
+    return data
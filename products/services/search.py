@@ -0,0 +1,160 @@
+"""
+Full-text search over marketplace listings.
+
+Listing search reads ``ListingSearchDocument`` only: one denormalized row per
+active listing (see ``products.services.documents``) holding the product
+text, the attribute codes and labels, price and stock. On PostgreSQL each
+document carries a weighted ``tsvector`` (product name, then series and
+block, then attribute labels) matched through a GIN index and ranked by
+relevance. Other database backends fall back to ``icontains`` matching so
+the test suite keeps running on SQLite.
+
+A fuzzy mode tolerates typos in card names ("Charzard", "Dracofeu") with
+``pg_trgm`` word similarity on product name, series and block. Lookups use the
+``%>`` operator so they stay backed by the trigram GIN indexes; the threshold
+comes from ``SEARCH_TRIGRAM_THRESHOLD``.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from products.models import Product
+
+# "simple" keeps card names untouched (no stemming of "Dracaufeu" or "Charizard").
+SEARCH_CONFIG = 'simple'
+
+# Product columns carrying a trigram GIN index (see migration 0005).
+FUZZY_FIELDS = ('name', 'series', 'block')
+
+# Their copies on ListingSearchDocument, indexed the same way (migration 0006).
+DOCUMENT_FUZZY_FIELDS = ('product_name', 'product_series', 'product_block')
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_postgres(using='default'):
+    return connections[using].vendor == 'postgresql'
+
+
+def search_terms(query):
+    """Split a raw user query into alphanumeric terms."""
+    return _TERM_RE.findall(query or '')
+
+
+def build_search_query(query):
+    """
+    Build a prefix ``tsquery`` where every term must match, so partial input
+    such as ``"pika"`` already finds ``"Pikachu"``.
+    Returns ``None`` when the query has no searchable term.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return None
+    raw = ' & '.join(f'{term}:*' for term in terms)
+    return SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_listings(queryset, query):
+    """
+    Restrict a ``ListingSearchDocument`` queryset to rows matching ``query``.
+
+    On PostgreSQL results are annotated with ``rank`` and ordered by relevance;
+    otherwise each term must be contained in one of the text columns.
+    """
+    if not query:
+        return queryset
+
+    if is_postgres(queryset.db):
+        search_query = build_search_query(query)
+        if search_query is None:
+            return queryset
+        return (
+            queryset.filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F('search_vector'), search_query))
+            .order_by('-rank', '-created_at')
+        )
+
+    # Like the tsquery above, every term must match one of the text columns.
+    for term in search_terms(query) or [query]:
+        queryset = queryset.filter(
+            Q(product_name__icontains=term)
+            | Q(product_series__icontains=term)
+            | Q(product_block__icontains=term)
+            | Q(labels__icontains=term)
+        )
+    return queryset
+
+
+def trigram_threshold():
+    return float(getattr(settings, 'SEARCH_TRIGRAM_THRESHOLD', 0.5))
+
+
+def fuzzy_filter(queryset, query, fields, threshold=None):
+    """
+    Keep rows where ``query`` is word-similar to any of ``fields`` (lookup
+    names, e.g. ``product_name``), annotated with ``similarity`` and ordered
+    by it. The ``%>`` prefilter is bounded by the connection's
+    ``pg_trgm.word_similarity_threshold``, so ``threshold`` can only tighten
+    the configured value. Falls back to ``icontains`` outside PostgreSQL.
+    """
+    condition = Q()
+    if not is_postgres(queryset.db):
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition)
+
+    threshold = trigram_threshold() if threshold is None else threshold
+    similarities = [TrigramWordSimilarity(query, field) for field in fields]
+    for field in fields:
+        condition |= Q(**{f'{field}__trigram_word_similar': query})
+    return (
+        queryset.filter(condition)
+        .annotate(similarity=Greatest(*similarities) if len(similarities) > 1 else similarities[0])
+        .filter(similarity__gte=threshold)
+        .order_by('-similarity')
+    )
+
+
+def fuzzy_search_listings(queryset, query, threshold=None):
+    """Typo-tolerant variant of :func:`search_listings` on product name, series and block."""
+    if not query:
+        return queryset
+    queryset = fuzzy_filter(queryset, query, DOCUMENT_FUZZY_FIELDS, threshold)
+    if is_postgres(queryset.db):
+        queryset = queryset.order_by('-similarity', '-created_at')
+    return queryset
+
+
+def fuzzy_suggestions(query, limit=10, threshold=None):
+    """
+    Distinct product names, series and blocks similar to ``query``, best
+    matches first.
+    """
+    scores = {}
+    for field in FUZZY_FIELDS:
+        rows = fuzzy_filter(
+            Product.objects.exclude(**{f'{field}__isnull': True}), query, [field], threshold
+        )
+        if is_postgres(rows.db):
+            rows = rows.values_list(field, 'similarity').distinct()[:limit]
+        else:
+            rows = ((value, 0) for value in rows.values_list(field, flat=True).distinct()[:limit])
+        for value, similarity in rows:
+            scores[value] = max(similarity, scores.get(value, 0))
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [value for value, _ in ranked[:limit]]
+
+
+def configure_trigram_threshold(connection):
+    """Align ``%>`` with ``SEARCH_TRIGRAM_THRESHOLD`` on a new PostgreSQL connection."""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)",
+            [str(trigram_threshold())],
+        )
@@ -0,0 +1,304 @@
+"""
+Memory-mapped autocomplete index shared by every worker process.
+
+``write_index_file`` serializes the catalog terms into a compact, read-only
+file; ``MappedPrefixIndex`` maps it and answers lookups straight from the page
+cache, so each gunicorn worker adds no private copy of the index. Rebuilds
+write a new file next to the old one and ``os.replace`` it: workers notice the
+new inode and switch generations without restarting.
+
+Model signals only update a worker's in-process index, so the file is rebuilt
+on a schedule instead: once it is older than ``max_age`` seconds, the first
+worker to notice rewrites it in a background thread, holding an exclusive lock
+on ``<path>.lock`` so only one process rebuilds at a time. Suggestions lag
+catalog writes by at most ``max_age``, as they do between per-process indexes.
+
+File layout (little-endian, arrays of uint32 unless noted)::
+
+    header      magic, format version, top_k, generation (uint64), counts,
+                section offsets (uint64)
+    term_offsets[n_terms + 1]   term_weights[n_terms]
+    key_offsets[n_keys + 1]     key_terms[n_keys]
+    prefix_offsets[n_prefixes + 1]  prefix_top[n_prefixes * top_k]
+    term_blob, key_blob, prefix_blob (UTF-8)
+
+Keys are the normalized word suffixes of every term (see ``index_keys``),
+sorted by their UTF-8 bytes. Prefixes matching more than ``CACHED_RANGE_SIZE``
+keys have their top-K term ids precomputed in the prefix table, so every
+lookup reads at most that many keys.
+"""
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+
+from django.db import DatabaseError, connection
+
+from .autocomplete import CACHED_RANGE_SIZE, index_keys, load_term_weights, normalize
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'FLIIPIDX'
+FORMAT_VERSION = 1
+TOP_K = 20
+NO_TERM = 0xFFFFFFFF
+
+_HEADER = struct.Struct('<8sIIQIII' + 'Q' * 6)
+_UINT32 = 4
+
+# How often (seconds) a worker checks whether the file was swapped.
+RELOAD_CHECK_INTERVAL = 1.0
+
+
+def _blob(strings):
+    offsets = array('I', [0])
+    chunks = []
+    position = 0
+    for value in strings:
+        encoded = value.encode('utf-8')
+        chunks.append(encoded)
+        position += len(encoded)
+        offsets.append(position)
+    return offsets, b''.join(chunks)
+
+
+def _top_prefixes(keys, key_terms, rank):
+    """
+    Yield ``(prefix, top term ids)`` for every prefix matching more than
+    ``CACHED_RANGE_SIZE`` keys, splitting large groups one character at a time.
+    """
+    pending = [(0, len(keys), 1)]
+    while pending:
+        low, high, length = pending.pop()
+        position = low
+        while position < high:
+            key = keys[position]
+            if len(key) < length:
+                position += 1
+                continue
+            prefix = key[:length]
+            end = position
+            while end < high and keys[end][:length] == prefix:
+                end += 1
+            if end - position > CACHED_RANGE_SIZE:
+                terms = sorted({key_terms[i] for i in range(position, end)}, key=rank)[:TOP_K]
+                yield prefix, terms
+                pending.append((position, end, length + 1))
+            position = end
+
+
+def write_index_file(path, weights):
+    """
+    Serialize ``weights`` (term -> popularity) to ``path`` atomically.
+    Returns the generation number written in the header.
+    """
+    terms = sorted(weights, key=lambda term: (-weights[term], term))
+    term_ids = {term: term_id for term_id, term in enumerate(terms)}
+    pairs = sorted(
+        (key.encode('utf-8'), term_ids[term]) for term in terms for key in index_keys(term)
+    )
+    keys = [key.decode('utf-8') for key, _ in pairs]
+    key_terms = array('I', (term_id for _, term_id in pairs))
+
+    # Term ids are already in rank order, so the smallest ids are the top-K.
+    prefixes = list(_top_prefixes(keys, key_terms, rank=int))
+    prefixes.sort(key=lambda item: item[0].encode('utf-8'))
+    prefix_top = array('I')
+    for _, top in prefixes:
+        prefix_top.extend(top + [NO_TERM] * (TOP_K - len(top)))
+
+    term_offsets, term_blob = _blob(terms)
+    key_offsets, key_blob = _blob(keys)
+    prefix_offsets, prefix_blob = _blob(prefix for prefix, _ in prefixes)
+    term_weights = array('I', (min(weights[term], NO_TERM - 1) for term in terms))
+
+    sections = [
+        term_offsets.tobytes() + term_weights.tobytes(),
+        key_offsets.tobytes() + key_terms.tobytes(),
+        prefix_offsets.tobytes() + prefix_top.tobytes(),
+        term_blob,
+        key_blob,
+        prefix_blob,
+    ]
+    offsets = []
+    position = _HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+
+    generation = time.time_ns()
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, TOP_K, generation,
+        len(terms), len(keys), len(prefixes), *offsets,
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.autocomplete-')
+    try:
+        with os.fdopen(descriptor, 'wb') as handle:
+            handle.write(header)
+            for section in sections:
+                handle.write(section)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+    return generation
+
+
+def rebuild_index_file(path, max_age=None):
+    """
+    Rewrite the index file at ``path`` from the database unless another
+    process is already doing it or, with ``max_age``, it is recent enough.
+    Returns the new generation, or ``None`` when nothing was written.
+    """
+    with open(f'{path}.lock', 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return None
+        try:
+            if max_age and time.time() - os.stat(path).st_mtime <= max_age:
+                return None
+            weights, _ = load_term_weights()
+            return write_index_file(path, weights)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class _Generation:
+    """One mapped file; views into the mapping are never copied."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as handle:
+            self.inode = os.fstat(handle.fileno()).st_ino
+            self.buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.buffer)
+        (magic, version, self.top_k, self.generation,
+         n_terms, n_keys, n_prefixes, *offsets) = _HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not an autocomplete index (format {FORMAT_VERSION})")
+        terms_at, keys_at, prefixes_at, term_blob_at, key_blob_at, prefix_blob_at = offsets
+
+        def uint32(start, count):
+            return view[start:start + count * _UINT32].cast('I')
+
+        self.term_offsets = uint32(terms_at, n_terms + 1)
+        self.term_weights = uint32(terms_at + (n_terms + 1) * _UINT32, n_terms)
+        self.key_offsets = uint32(keys_at, n_keys + 1)
+        self.key_terms = uint32(keys_at + (n_keys + 1) * _UINT32, n_keys)
+        self.prefix_offsets = uint32(prefixes_at, n_prefixes + 1)
+        self.prefix_top = uint32(prefixes_at + (n_prefixes + 1) * _UINT32, n_prefixes * self.top_k)
+        self.term_blob = term_blob_at
+        self.key_blob = key_blob_at
+        self.prefix_blob = prefix_blob_at
+        self.n_keys = n_keys
+        self.n_prefixes = n_prefixes
+
+    def term(self, term_id):
+        start = self.term_blob + self.term_offsets[term_id]
+        end = self.term_blob + self.term_offsets[term_id + 1]
+        return self.buffer[start:end].decode('utf-8')
+
+    def _key(self, position):
+        return self.buffer[self.key_blob + self.key_offsets[position]:self.key_blob + self.key_offsets[position + 1]]
+
+    def _prefix(self, position):
+        return self.buffer[
+            self.prefix_blob + self.prefix_offsets[position]:self.prefix_blob + self.prefix_offsets[position + 1]
+        ]
+
+    def _bisect(self, getter, size, target):
+        low, high = 0, size
+        while low < high:
+            middle = (low + high) // 2
+            if getter(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def suggest(self, prefix, limit):
+        target = prefix.encode('utf-8')
+        if limit <= self.top_k:
+            position = self._bisect(self._prefix, self.n_prefixes, target)
+            if position < self.n_prefixes and self._prefix(position) == target:
+                start = position * self.top_k
+                ids = [term_id for term_id in self.prefix_top[start:start + limit] if term_id != NO_TERM]
+                return [self.term(term_id) for term_id in ids]
+
+        low = self._bisect(self._key, self.n_keys, target)
+        high = low + self._bisect(
+            lambda offset: self._key(low + offset), self.n_keys - low, target + b'\xff'
+        )
+        # Term ids are assigned in rank order: the smallest ids win.
+        ids = sorted(set(self.key_terms[low:high]))[:limit]
+        return [self.term(term_id) for term_id in ids]
+
+
+class MappedPrefixIndex:
+    """
+    Read-only view of an index file, switching to new generations on swap and
+    rebuilding the file once it is older than ``max_age`` seconds.
+    """
+
+    def __init__(self, path, max_age=None):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._current = _Generation(path)
+        self._checked_at = time.monotonic()
+        self._rebuild_thread = None
+
+    @property
+    def generation(self):
+        return self._current.generation
+
+    def _reload_if_swapped(self):
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return
+            if stat.st_ino != self._current.inode:
+                # The previous mapping is released once in-flight lookups drop it.
+                self._current = _Generation(self.path)
+            if self.max_age and time.time() - stat.st_mtime > self.max_age:
+                self._rebuild_in_background()
+
+    def _rebuild_in_background(self):
+        if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+            return
+        self._rebuild_thread = threading.Thread(
+            target=self._rebuild, name='autocomplete-file-rebuild', daemon=True
+        )
+        self._rebuild_thread.start()
+
+    def _rebuild(self):
+        try:
+            rebuild_index_file(self.path, max_age=self.max_age)
+        except (DatabaseError, OSError):
+            logger.exception("Rebuilding the shared autocomplete index %s failed", self.path)
+        finally:
+            connection.close()
+
+    def suggest(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        self._reload_if_swapped()
+        return self._current.suggest(prefix, limit)
@@ -0,0 +1,69 @@
+"""
+Sort modes shared by listing search and the listings endpoint.
+
+Each mode is a plain column ordering (the primary key is appended by the
+paginators as tie-breaker) backed by an index on ``ListingSearchDocument``:
+
+    newest      created_at DESC          products_lsd_created_idx
+    price_asc   price ASC                products_lsd_price_idx
+    price_desc  price DESC               products_lsd_price_idx, scanned backwards
+    grade       grade_value DESC, price  products_lsd_grade_sort_idx (graded only)
+    best_price  price ASC, cheapest available listing of each variant only
+                                         products_lsd_variant_price_idx
+
+so the database can stream the first page out of the index instead of
+sorting every match.
+
+``grade`` and ``best_price`` also choose which rows come back (``ROW_SORTS``),
+so facet counts must be computed on ``sort_rows`` of the same queryset.
+"""
+from django.db.models import Exists, F, OuterRef, Q
+
+SORT_MODES = {
+    'newest': ('-created_at',),
+    'price_asc': ('price',),
+    'price_desc': ('-price',),
+    'grade': ('-grade_value', 'price'),
+    'best_price': ('price',),
+}
+
+# Modes that filter rows as well as ordering them.
+ROW_SORTS = ('grade', 'best_price')
+
+
+def cheapest_per_variant(queryset):
+    """Keep the cheapest row of ``queryset`` per variant (lowest pk on ties)."""
+    cheaper = queryset.order_by().filter(variant_id=OuterRef('variant_id')).filter(
+        Q(price__lt=OuterRef('price')) | Q(price=OuterRef('price'), pk__lt=OuterRef('pk'))
+    )
+    return queryset.filter(~Exists(cheaper.values('pk')))
+
+
+def sort_rows(queryset, sort):
+    """The rows of ``queryset`` that ``sort`` keeps, in no particular order."""
+    if not sort:
+        return queryset
+    if sort not in SORT_MODES:
+        raise ValueError(f"Unknown sort '{sort}'. Choose from: {', '.join(SORT_MODES)}.")
+    fields = {field.name for field in queryset.model._meta.fields}
+    if sort == 'grade':
+        if 'grade_value' not in fields:
+            queryset = queryset.annotate(grade_value=F('variant__grade__value'))
+        queryset = queryset.filter(grade_value__isnull=False)
+    if sort == 'best_price':
+        # Only a listing that can be bought is a variant's best price.
+        queryset = queryset.filter(stock__gt=0)
+        if 'status' in fields:
+            queryset = queryset.filter(status='active')
+        queryset = cheapest_per_variant(queryset)
+    return queryset
+
+
+def sort_listings(queryset, sort):
+    """
+    Order a ``ListingSearchDocument`` or ``Listing`` queryset by ``sort``.
+    ``None`` or ``''`` keeps the current ordering (relevance, or newest first).
+    """
+    if not sort:
+        return queryset
+    return sort_rows(queryset, sort).order_by(*SORT_MODES[sort])
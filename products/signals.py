@@ -0,0 +1,219 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.table_versions import bump_table_versions
+
+from .models import (
+    Category,
+    Condition,
+    Grade,
+    Language,
+    Listing,
+    Product,
+    ProductImage,
+    ProductStats,
+    Variant,
+    VariantStats,
+    Version,
+)
+from .services.autocomplete import autocomplete_index
+from .services.documents import sync_search_documents
+from .services.product_stats import ListingState, apply_listing_change, listing_state
+from .services.reference_data import reference_table
+from .services.result_cache import bump_all_generations, bump_generations
+from .services.search import configure_trigram_threshold
+
+
+@receiver(connection_created)
+def set_trigram_threshold(sender, connection, **kwargs):
+    configure_trigram_threshold(connection)
+
+
+@receiver(post_save, sender=Listing)
+def sync_listing_search_document(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sync_search_documents(Listing.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_save, sender=Listing)
+def remember_listing_state(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    row = (
+        Listing.objects.filter(pk=instance.pk)
+        .values_list(*ListingState._fields)
+        .first()
+    )
+    instance._previous_state = ListingState(*row) if row else None
+
+
+@receiver(post_save, sender=Listing)
+def update_listing_stats(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if apply_listing_change(getattr(instance, '_previous_state', None), listing_state(instance)):
+        touch_tables(ProductStats, VariantStats)
+
+
+@receiver(post_delete, sender=Listing)
+def remove_listing_stats(sender, instance, **kwargs):
+    if apply_listing_change(listing_state(instance), None):
+        touch_tables(ProductStats, VariantStats)
+
+
+@receiver(post_save, sender=Variant)
+def sync_variant_search_documents(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    sync_search_documents(Listing.objects.filter(variant=instance))
+
+
+@receiver(post_save, sender=Product)
+def sync_product_search_documents(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    sync_search_documents(Listing.objects.filter(product=instance))
+
+
+@receiver(post_save, sender=Language)
+@receiver(post_save, sender=Version)
+@receiver(post_save, sender=Condition)
+@receiver(post_save, sender=Grade)
+def sync_attribute_search_documents(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    field = sender._meta.model_name
+    sync_search_documents(Listing.objects.filter(**{f'variant__{field}': instance}))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def update_autocomplete_product(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    product_id = instance.pk
+    transaction.on_commit(lambda: autocomplete_index.refresh_product(product_id))
+
+
+def _active_listing_deltas(before, after):
+    # A product's suggestion weight counts its active listings.
+    deltas = {}
+    for state, sign in ((before, -1), (after, 1)):
+        if state is not None and state.status == 'active':
+            deltas[state.product_id] = deltas.get(state.product_id, 0) + sign
+    return {product_id: delta for product_id, delta in deltas.items() if delta}
+
+
+def _adjust_autocomplete_weights(before, after):
+    for product_id, delta in _active_listing_deltas(before, after).items():
+        transaction.on_commit(
+            lambda product_id=product_id, delta=delta: autocomplete_index.adjust_product_weight(product_id, delta)
+        )
+
+
+@receiver(post_save, sender=Listing)
+def update_autocomplete_popularity(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _adjust_autocomplete_weights(getattr(instance, '_previous_state', None), listing_state(instance))
+
+
+@receiver(post_delete, sender=Listing)
+def remove_autocomplete_popularity(sender, instance, **kwargs):
+    _adjust_autocomplete_weights(listing_state(instance), None)
+
+
+def invalidate_search_cache(*tcg_types):
+    # Bump now so this request never reads a stale entry, and again on commit
+    # so entries cached by concurrent requests before the commit are dropped.
+    bump_generations(*tcg_types)
+    transaction.on_commit(lambda: bump_generations(*tcg_types))
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_tcg_type(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    instance._previous_tcg_type = (
+        Product.objects.filter(pk=instance.pk).values_list('tcg_type', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_searches(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_search_cache(instance.tcg_type, getattr(instance, '_previous_tcg_type', None))
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+@receiver(post_save, sender=Variant)
+@receiver(post_delete, sender=Variant)
+def invalidate_listing_searches(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if sender._meta.get_field('product').is_cached(instance):
+        tcg_type = instance.product.tcg_type
+    else:
+        tcg_type = Product.objects.filter(pk=instance.product_id).values_list('tcg_type', flat=True).first()
+    invalidate_search_cache(tcg_type)
+
+
+@receiver(post_save, sender=Language)
+@receiver(post_save, sender=Version)
+@receiver(post_save, sender=Condition)
+@receiver(post_save, sender=Grade)
+def invalidate_attribute_searches(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    bump_all_generations()
+    transaction.on_commit(bump_all_generations)
+
+
+@receiver(post_save, sender=Language)
+@receiver(post_save, sender=Version)
+@receiver(post_save, sender=Condition)
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Language)
+@receiver(post_delete, sender=Version)
+@receiver(post_delete, sender=Condition)
+@receiver(post_delete, sender=Grade)
+def invalidate_reference_table(sender, instance, raw=False, **kwargs):
+    # Like the search cache: now for this transaction, on commit for the others.
+    table = reference_table(sender)
+    table.invalidate()
+    transaction.on_commit(table.invalidate)
+
+
+def touch_tables(*models):
+    # Conditional GET validators (see core.mixins.ConditionalGetMixin); bumped
+    # again on commit so a response built from pre-commit data is not stamped
+    # with the new version.
+    names = [model._meta.db_table for model in models]
+    bump_table_versions(*names)
+    transaction.on_commit(lambda: bump_table_versions(*names))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def touch_catalog_table(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    touch_tables(Product if sender is ProductImage else sender)
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+@receiver(m2m_changed, sender=Product.allowed_languages.through)
+@receiver(m2m_changed, sender=Product.allowed_versions.through)
+def touch_product_relations(sender, action, **kwargs):
+    if action.startswith('post_'):
+        touch_tables(Product)
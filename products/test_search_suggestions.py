@@ -48,3 +48,16 @@ def test_empty_query_returns_empty():
     assert response.status_code == 200
     assert response.data == []
 
+
+
+@pytest.mark.django_db
+def test_fuzzy_suggestions_mode():
+    Product.objects.create(name="Charizard", block="Base", series="Alpha", tcg_type="pokemon")
+    Product.objects.create(name="Blastoise", tcg_type="pokemon")
+
+    client = APIClient()
+    url = reverse("search-suggestions")
+    response = client.get(url, {"query": "Chari", "fuzzy": "true"})
+
+    assert response.status_code == 200
+    assert response.data == ["Charizard"]
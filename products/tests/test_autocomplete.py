@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+from accounts.models import User
+from products.models import Condition, Language, Listing, Product, Variant, Version
+from products.services import autocomplete
+from products.services.autocomplete import PrefixIndex
+
+
+def test_prefix_index_ranks_by_popularity():
+    index = PrefixIndex()
+    index.set_product(1, ("Pikachu", "Base Set", "Base"), weight=2)
+    index.set_product(2, ("Pikachu VMAX", "Vivid Voltage", "Sword & Shield"), weight=5)
+    index.set_product(3, ("Pichu", "Neo Genesis", "Neo"), weight=1)
+
+    assert index.suggest("pi") == ["Pikachu VMAX", "Pikachu", "Pichu"]
+    assert index.suggest("PIKA", limit=1) == ["Pikachu VMAX"]
+    assert index.suggest("vmax") == ["Pikachu VMAX"]
+    assert index.suggest("genèsis") == ["Neo Genesis"]
+
+
+def test_prefix_index_incremental_updates():
+    index = PrefixIndex()
+    index.set_product(1, ("Charizard", "Base Set", None), weight=1)
+    index.set_product(2, ("Blastoise", "Base Set", None), weight=1)
+    assert index.suggest("base") == ["Base Set"]
+
+    index.set_product(1, ("Dracaufeu", "Set de Base", None), weight=1)
+    assert index.suggest("char") == []
+    assert index.suggest("dra") == ["Dracaufeu"]
+
+    index.remove_product(2)
+    assert index.suggest("base") == ["Set de Base"]
+
+
+def test_listing_changes_adjust_product_weight():
+    index = PrefixIndex()
+    index.set_product(1, ("Pikachu",), weight=1)
+    index.set_product(2, ("Pichu",), weight=2)
+    assert index.suggest("pi") == ["Pichu", "Pikachu"]
+
+    index.adjust_product_weight(1, 2)
+    assert index.suggest("pi") == ["Pikachu", "Pichu"]
+    index.adjust_product_weight(1, -5)
+    assert index.suggest("pi") == ["Pichu", "Pikachu"]
+    index.adjust_product_weight(3, 1)
+    assert index.suggest("pi") == ["Pichu", "Pikachu"]
+
+
+def test_stale_index_is_rebuilt_once_in_the_background(monkeypatch):
+    index = PrefixIndex(max_age=60)
+    index.set_product(1, ("Pikachu",), weight=1)
+    index._built_at = time.monotonic() - 120
+    loading = threading.Event()
+    release = threading.Event()
+    builds = []
+
+    def load_term_weights():
+        builds.append(1)
+        loading.set()
+        release.wait(5)
+        return {"Raichu": 1}, {2: (("Raichu",), 1)}
+
+    monkeypatch.setattr(autocomplete, "load_term_weights", load_term_weights)
+    monkeypatch.setattr(autocomplete, "_product_rows", lambda condition: [(1, ("Pikachu",), 3)])
+
+    index.ensure_built()
+    assert loading.wait(5)
+    index.ensure_built()
+    # The previous index keeps answering while the rebuild reads the database.
+    assert index.suggest("pi") == ["Pikachu"]
+    index.adjust_product_weight(1, 2)
+    release.set()
+    index._rebuild_thread.join(5)
+
+    assert builds == [1]
+    # Products changed during the rebuild are reloaded after the swap.
+    assert index.suggest("ra") == ["Raichu"]
+    assert index.suggest("pi") == ["Pikachu"]
+
+
+@pytest.mark.django_db
+def test_listing_signals_apply_weight_deltas(django_capture_on_commit_callbacks):
+    seller = User.objects.create_user(username="seller", password="pass")
+    language = Language.objects.create(code="EN", name="English")
+    version = Version.objects.create(code="1st", name="1st Edition")
+    condition = Condition.objects.create(code="NM", label="Near Mint")
+    pikachu = Product.objects.create(name="Pikachu", tcg_type="pokemon")
+    Product.objects.create(name="Pichu", tcg_type="pokemon")
+    variant = Variant.objects.create(product=pikachu, language=language, version=version, condition=condition)
+    index = autocomplete.autocomplete_index
+    index.ensure_built()
+    assert index._product_terms[pikachu.pk][1] == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        listing = Listing.objects.create(product=pikachu, variant=variant, seller=seller, price=5, stock=1)
+    assert index._product_terms[pikachu.pk][1] == 2
+
+    listing.status = "sold"
+    with django_capture_on_commit_callbacks(execute=True):
+        listing.save()
+    assert index._product_terms[pikachu.pk][1] == 1
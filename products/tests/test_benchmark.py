@@ -0,0 +1,83 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+from products.models import Listing, ListingSearchDocument, Product, Variant
+from searches.models import SearchHistory, SearchQueryRollup
+from products.services.benchmark import percentile, run_benchmark
+from products.services.catalog_generator import generate_catalog
+
+
+@pytest.mark.django_db
+def test_generate_catalog_builds_skewed_searchable_catalog():
+    counts = generate_catalog(products=40, variants=120, listings=600, sellers=5, seed=1, batch_size=100)
+
+    assert counts['products'] == Product.objects.count() == 40
+    assert Variant.objects.count() == counts['variants'] == 120
+    assert Listing.objects.count() == 600
+    assert ListingSearchDocument.objects.count() == Listing.objects.filter(status='active').count()
+    assert all(not variant.condition.is_graded or variant.grade_id for variant in Variant.objects.select_related('condition'))
+
+    # Popularity is skewed: the most listed product carries several times its fair share.
+    per_product = sorted(
+        (Listing.objects.filter(product=product).count() for product in Product.objects.all()), reverse=True
+    )
+    assert per_product[0] > 3 * 600 / 40
+
+    # Listings are backdated without touching the model field's auto_now_add.
+    assert Listing.objects.earliest('created_at').created_at < Listing.objects.latest('created_at').created_at
+    assert Listing._meta.get_field('created_at').auto_now_add
+
+    # The variant count is read back from the table, not taken from the rows sent.
+    again = generate_catalog(products=5, variants=5 * 400, listings=10, sellers=5, seed=2, batch_size=100)
+    assert again['variants'] == Variant.objects.count() - 120
+
+
+@pytest.mark.django_db
+def test_benchmark_search_reports_latency_percentiles(tmp_path):
+    generate_catalog(products=20, variants=60, listings=200, sellers=3, seed=2, batch_size=100)
+    output = tmp_path / 'report.json'
+
+    call_command('benchmark_search', requests=60, warmup=5, seed=3, output=str(output))
+
+    report = json.loads(output.read_text())
+    assert report['overall']['count'] + report['overall']['errors'] == 60
+    assert report['overall']['errors'] == 0
+    assert report['overall']['p50_ms'] <= report['overall']['p95_ms'] <= report['overall']['p99_ms']
+    assert report['overall']['mean_queries'] >= 1
+    assert {'text', 'suggestions'} <= set(report['scenarios'])
+    assert not SearchHistory.objects.exists()
+    assert not SearchQueryRollup.objects.exists()
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+
+
+@pytest.mark.django_db
+def test_run_benchmark_is_reproducible_for_a_seed():
+    generate_catalog(products=10, variants=30, listings=80, sellers=2, seed=4, batch_size=50)
+    first = run_benchmark(requests=20, warmup=0, seed=5)
+    second = run_benchmark(requests=20, warmup=0, seed=5)
+    assert {kind: stats['count'] for kind, stats in first['scenarios'].items()} == {
+        kind: stats['count'] for kind, stats in second['scenarios'].items()
+    }
+
+
+@pytest.mark.django_db
+def test_read_path_benchmark_compares_page_sizes(tmp_path):
+    generate_catalog(products=10, variants=30, listings=80, sellers=2, seed=6, batch_size=50)
+    output = tmp_path / 'read_path.json'
+
+    call_command('benchmark_read_path', page_sizes=[5, 50], repeat=3, warmup=1, output=str(output))
+
+    report = json.loads(output.read_text())
+    assert set(report['results']) == {'listings:5', 'listings:50', 'variants:5', 'variants:50'}
+    listings = report['results']['listings:50']
+    assert listings['rows'] == 50
+    assert listings['fast']['mean_queries'] <= listings['serializer']['mean_queries']
+    assert listings['speedup'] > 0
@@ -0,0 +1,152 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+from products.models import Category, Condition, Grade, Language, Product, ProductImage, Variant, Version
+from products.services.autocomplete import autocomplete_index
+from products.services.catalog_import import import_catalog, read_jsonl
+
+
+@pytest.fixture
+def references(db):
+    Language.objects.create(code='EN', name='English')
+    Language.objects.create(code='FR', name='French')
+    Version.objects.create(code='1st', name='1st Edition')
+    Condition.objects.create(code='NM', label='Near Mint')
+    Condition.objects.create(code='GR', label='Graded', is_graded=True)
+    Grade.objects.create(grader='PSA', value=9)
+    Category.objects.create(name='Holo Rares', slug='holo')
+
+
+def write_jsonl(path, records):
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    return str(path)
+
+
+CHARIZARD = {
+    'name': 'Charizard', 'series': 'Base Set', 'block': 'Wizards',
+    'categories': ['holo'], 'languages': ['EN', 'FR'], 'versions': ['1st'],
+    'variants': [
+        {'language': 'EN', 'version': '1st', 'condition': 'NM'},
+        {'language': 'FR', 'version': '1st', 'condition': 'GR', 'grade': 'PSA 9'},
+    ],
+    'images': [{'image': 'product_images/charizard.jpg', 'alt_text': 'Front'}],
+}
+
+
+@pytest.mark.django_db
+def test_import_jsonl_creates_products_relations_and_variants(references, tmp_path):
+    path = write_jsonl(tmp_path / 'catalog.jsonl', [
+        CHARIZARD,
+        {'name': 'Blastoise', 'series': 'Base Set', 'block': 'Wizards',
+         'variants': [{'language': 'en', 'version': '1st', 'condition': 'nm'}]},
+    ])
+
+    call_command('import_catalog', path, batch_size=1)
+
+    charizard = Product.objects.get(name='Charizard')
+    assert charizard.slug == 'charizard-base-set-wizards'
+    assert list(charizard.categories.values_list('slug', flat=True)) == ['holo']
+    assert set(charizard.allowed_languages.values_list('code', flat=True)) == {'EN', 'FR'}
+    assert charizard.variants.filter(grade__grader='PSA').count() == 1
+    assert ProductImage.objects.get(product=charizard).alt_text == 'Front'
+    assert Variant.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_import_is_idempotent(references, tmp_path):
+    path = write_jsonl(tmp_path / 'catalog.jsonl', [CHARIZARD])
+
+    call_command('import_catalog', path)
+    call_command('import_catalog', path)
+
+    assert Product.objects.count() == 1
+    assert Variant.objects.count() == 2
+    assert ProductImage.objects.count() == 1
+    assert Product.categories.through.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_import_csv_merges_variant_rows(references, tmp_path):
+    path = tmp_path / 'catalog.csv'
+    path.write_text(
+        'name,series,block,categories,languages,language,version,condition,grade\n'
+        'Mew,Promo,,holo,EN|FR,EN,1st,NM,\n'
+        'Mew,Promo,,holo,EN|FR,FR,1st,GR,PSA 9\n'
+        'Mewtwo,Promo,,,,EN,1st,NM,\n'
+    )
+
+    call_command('import_catalog', str(path))
+
+    mew = Product.objects.get(name='Mew')
+    assert mew.block is None
+    assert mew.variants.count() == 2
+    assert Product.objects.get(name='Mewtwo').variants.count() == 1
+
+
+@pytest.mark.django_db
+def test_import_rejects_invalid_records_and_keeps_going(references, tmp_path, capsys):
+    path = write_jsonl(tmp_path / 'catalog.jsonl', [
+        {'name': 'Pikachu', 'variants': [{'language': 'XX', 'version': '1st', 'condition': 'NM'}]},
+        {'name': 'Raichu', 'variants': [{'language': 'EN', 'version': '1st', 'condition': 'GR'}]},
+        {'name': 'Eevee'},
+    ])
+
+    call_command('import_catalog', path)
+
+    assert list(Product.objects.values_list('name', flat=True)) == ['Eevee']
+    err = capsys.readouterr().err
+    assert "Row 1: Unknown language 'XX'." in err
+    assert 'Row 2: A graded condition must have a grade value.' in err
+
+
+@pytest.mark.django_db
+def test_import_rejects_malformed_nested_fields(references, tmp_path, capsys):
+    path = write_jsonl(tmp_path / 'catalog.jsonl', [
+        {'name': 'Pikachu', 'variants': ['oops']},
+        {'name': 'Raichu', 'variants': {'language': 'EN'}},
+        {'name': 'Pichu', 'images': [3]},
+        {'name': 'Mew', 'categories': 5},
+        {'name': 'Mewtwo', 'series': ['Promo']},
+        {'name': 'Eevee', 'images': ['product_images/eevee.jpg']},
+    ])
+
+    call_command('import_catalog', path)
+
+    assert list(Product.objects.values_list('name', flat=True)) == ['Eevee']
+    err = capsys.readouterr().err
+    assert 'Row 1: Variants must be a list of objects.' in err
+    assert 'Row 2: Variants must be a list of objects.' in err
+    assert 'Row 3: Images must be a list of objects or strings.' in err
+    assert 'Row 4: Expected a list' in err
+    assert 'Row 5: Expected a single value' in err
+
+
+@pytest.mark.django_db
+def test_import_resumes_from_checkpoint(references, tmp_path):
+    path = write_jsonl(tmp_path / 'catalog.jsonl', [{'name': 'Pikachu'}, {'name': 'Eevee'}])
+    (tmp_path / 'catalog.jsonl.checkpoint').write_text('1')
+
+    call_command('import_catalog', path, resume=True)
+
+    assert list(Product.objects.values_list('name', flat=True)) == ['Eevee']
+    assert not (tmp_path / 'catalog.jsonl.checkpoint').exists()
+
+
+@pytest.mark.django_db
+def test_batches_count_written_rows_and_leave_autocomplete_serving(references, tmp_path, monkeypatch):
+    autocomplete_index.ensure_built()
+    rebuilds = []
+    monkeypatch.setattr(autocomplete_index, 'rebuild_in_background', lambda: rebuilds.append(1))
+    lines = [json.dumps(CHARIZARD)]
+
+    first = import_catalog(read_jsonl(lines))
+    again = import_catalog(read_jsonl(lines))
+
+    assert (first['products'], first['variants'], first['images']) == (1, 2, 1)
+    assert (again['products'], again['existing'], again['variants'], again['images']) == (0, 1, 0, 0)
+    # The index is not dropped: requests keep using it while it is rebuilt off-thread.
+    assert autocomplete_index.is_built
+    autocomplete_index.ensure_built()
+    assert rebuilds == [1]
@@ -0,0 +1,97 @@
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from products.models import Category, Product
+
+
+def make_chain(names, parent=None):
+    categories = []
+    for name in names:
+        parent = Category.objects.create(name=name, parent=parent)
+        categories.append(parent)
+    return categories
+
+
+@pytest.mark.django_db
+def test_paths_follow_moves():
+    tcg, pokemon, base = make_chain(["TCG", "Pokemon", "Base Set"])
+    other = Category.objects.create(name="Other")
+    assert base.path == f"{tcg.pk}/{pokemon.pk}/{base.pk}/"
+
+    pokemon.parent = other
+    pokemon.save()
+
+    base.refresh_from_db()
+    assert base.path == f"{other.pk}/{pokemon.pk}/{base.pk}/"
+    assert base.is_descendant_of(other)
+    assert not base.is_descendant_of(tcg)
+
+    other.parent = base
+    with pytest.raises(ValidationError):
+        other.save()
+
+
+@pytest.mark.django_db
+def test_category_list_query_count_does_not_grow_with_depth():
+    client = APIClient()
+    make_chain(["A1", "A2"])
+
+    with CaptureQueriesContext(connection) as shallow:
+        resp = client.get(reverse("category-list"))
+    assert resp.status_code == 200
+
+    make_chain(["B1", "B2", "B3", "B4", "B5"])
+    with CaptureQueriesContext(connection) as deep:
+        resp = client.get(reverse("category-list"))
+    by_name = {item["name"]: item for item in resp.json()["data"]}
+    assert by_name["B1"]["children"][0]["children"][0]["name"] == "B3"
+    assert len(deep.captured_queries) == len(shallow.captured_queries)
+
+
+@pytest.mark.django_db
+def test_category_tree_endpoint_returns_nested_subtree():
+    client = APIClient()
+    tcg, pokemon, base = make_chain(["TCG", "Pokemon", "Base Set"])
+    Category.objects.create(name="Magic", parent=tcg)
+
+    with CaptureQueriesContext(connection) as queries:
+        resp = client.get(reverse("category-tree"))
+    roots = resp.json()["data"]
+    assert [root["name"] for root in roots] == ["TCG"]
+    assert [child["name"] for child in roots[0]["children"]] == ["Magic", "Pokemon"]
+    assert len(queries.captured_queries) == 1
+
+    resp = client.get(reverse("category-tree"), {"root": pokemon.pk})
+    assert resp.json()["data"][0]["children"][0]["name"] == "Base Set"
+
+
+@pytest.mark.django_db
+def test_category_cannot_be_moved_under_its_descendant():
+    client = APIClient()
+    admin = User.objects.create_superuser(username="admin", password="pass", email="admin@example.com")
+    client.force_authenticate(admin)
+    tcg, pokemon = make_chain(["TCG", "Pokemon"])
+
+    resp = client.patch(reverse("category-detail", args=[tcg.pk]), {"parent": pokemon.pk}, format="json")
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+def test_product_filter_includes_descendant_categories():
+    client = APIClient()
+    tcg, pokemon, base = make_chain(["TCG", "Pokemon", "Base Set"])
+    magic = Category.objects.create(name="Magic", parent=tcg)
+    charizard = Product.objects.create(name="Charizard", tcg_type="pokemon")
+    charizard.categories.set([base, pokemon])
+    Product.objects.create(name="Black Lotus", tcg_type="magic").categories.set([magic])
+
+    names = lambda params: sorted(p["name"] for p in client.get(reverse("product-list"), params).json()["results"])
+    assert names({"category": pokemon.pk}) == ["Charizard"]
+    assert names({"category": tcg.slug}) == ["Black Lotus", "Charizard"]
+    assert names({"category": base.pk}) == ["Charizard"]
+    assert names({"category": "missing"}) == []
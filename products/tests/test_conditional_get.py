@@ -0,0 +1,101 @@
+import time
+from contextlib import contextmanager
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from products.models import Category, Condition, Language, Listing, Product, Variant, Version
+
+
+def get(client, url, etag=None, **headers):
+    if etag:
+        headers["HTTP_IF_NONE_MATCH"] = etag
+    return client.get(url, **headers)
+
+
+@contextmanager
+def seconds_ago(monkeypatch, seconds):
+    """Stamp every table write (and first read) made in the block ``seconds`` in the past."""
+    with monkeypatch.context() as patch:
+        now = time.time_ns()
+        patch.setattr(time, "time_ns", lambda: now - seconds * 10**9)
+        yield
+
+
+@pytest.mark.django_db
+def test_unchanged_product_list_answers_304_without_queries(monkeypatch):
+    client = APIClient()
+    url = reverse("product-list")
+    with seconds_ago(monkeypatch, 5):
+        Product.objects.create(name="Pikachu", tcg_type="pokemon")
+        first = get(client, url)
+    assert first.status_code == 200
+    etag = first["ETag"]
+
+    with CaptureQueriesContext(connection) as captured:
+        cached = get(client, url, etag)
+    assert cached.status_code == 304
+    assert cached["ETag"] == etag
+    assert captured.captured_queries == []
+
+    assert get(client, url, etag=None, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code == 304
+    # Validators are per URL: another page or filter is another representation.
+    assert get(client, url + "?page=2", etag).status_code != 304
+
+
+@pytest.mark.django_db
+def test_product_etag_changes_with_products_stats_and_relations():
+    client = APIClient()
+    seller = User.objects.create_user(username="seller", password="pass")
+    product = Product.objects.create(name="Pikachu", tcg_type="pokemon")
+    url = reverse("product-list")
+
+    def changes(write):
+        etag = get(client, url)["ETag"]
+        write()
+        response = get(client, url, etag)
+        return response.status_code == 200 and response["ETag"] != etag
+
+    lang = Language.objects.create(code="EN", name="English")
+    ver = Version.objects.create(code="1st", name="First")
+    cond = Condition.objects.create(code="NM", label="Near Mint")
+    variant = Variant.objects.create(product=product, language=lang, version=ver, condition=cond)
+    assert changes(lambda: Product.objects.filter(pk=product.pk).get().save())
+    assert changes(lambda: product.allowed_languages.add(lang))
+    assert changes(lambda: Listing.objects.create(product=product, variant=variant, seller=seller, price=5))
+    assert changes(lambda: Category.objects.create(name="Cards"))
+    assert changes(lambda: Language.objects.filter(pk=lang.pk).get().save())
+
+
+@pytest.mark.django_db
+def test_category_and_reference_endpoints_are_conditional():
+    client = APIClient()
+    for url, write in [
+        (reverse("category-list"), lambda: Category.objects.create(name="Cards")),
+        (reverse("category-tree"), lambda: Category.objects.create(name="Sealed")),
+        (reverse("language-list"), lambda: Language.objects.create(code="FR", name="French")),
+    ]:
+        etag = get(client, url)["ETag"]
+        assert get(client, url, etag).status_code == 304
+        write()
+        assert get(client, url, etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_last_modified_is_withheld_until_its_second_is_over(monkeypatch):
+    client = APIClient()
+    url = reverse("product-list")
+    with seconds_ago(monkeypatch, 5):
+        Product.objects.create(name="Pikachu", tcg_type="pokemon")
+        since = get(client, url)["Last-Modified"]
+
+    # A write in the same second as the date a client holds still shows up.
+    Product.objects.create(name="Eevee", tcg_type="pokemon")
+    fresh = get(client, url, HTTP_IF_MODIFIED_SINCE=since)
+    assert fresh.status_code == 200
+    assert "Last-Modified" not in fresh
+    assert get(client, url, fresh["ETag"]).status_code == 304
@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework.throttling import ScopedRateThrottle
+
+from accounts.models import User
+from products.models import Category, Condition, Grade, Language, Listing, Product, Variant, Version
+from products.services.exports import export_lines
+
+
+@pytest.fixture
+def catalog(db):
+    seller = User.objects.create_user(username='seller', password='pass', role=User.Role.PROFESSIONNEL)
+    english = Language.objects.create(code='EN', name='English')
+    first = Version.objects.create(code='1st', name='1st Edition')
+    graded = Condition.objects.create(code='GR', label='Graded', is_graded=True)
+    psa = Grade.objects.create(grader='PSA', value=9)
+    holo = Category.objects.create(name='Holo Rares', slug='holo')
+    products = []
+    for index in range(5):
+        product = Product.objects.create(name=f'Card {index}', series='Base Set', tcg_type='pokemon')
+        product.categories.add(holo)
+        product.allowed_languages.add(english)
+        product.allowed_versions.add(first)
+        variant = Variant.objects.create(product=product, language=english, version=first, condition=graded, grade=psa)
+        Listing.objects.create(product=product, variant=variant, seller=seller, price=10 + index, stock=2)
+        Listing.objects.create(product=product, variant=variant, seller=seller, price=99, stock=0)
+        products.append(product)
+    return seller, products
+
+
+def stream(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_product_jsonl_export_streams_every_product_with_relations(catalog):
+    seller, products = catalog
+    client = APIClient()
+    client.force_authenticate(seller)
+
+    response = client.get(reverse('product-export', kwargs={'extension': 'jsonl'}))
+
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/x-ndjson'
+    rows = [json.loads(line) for line in stream(response).splitlines()]
+    assert [row['id'] for row in rows] == [product.pk for product in products]
+    assert rows[0]['categories'] == ['holo']
+    assert rows[0]['languages'] == ['EN']
+    assert rows[0]['min_price'] == '10.00'
+    assert rows[0]['listing_count'] == 1
+
+
+@pytest.mark.django_db
+def test_listing_csv_export_contains_available_listings(catalog):
+    seller, products = catalog
+    client = APIClient()
+    client.force_authenticate(seller)
+
+    response = client.get(reverse('listing-export', kwargs={'extension': 'csv'}))
+
+    rows = list(csv.DictReader(io.StringIO(stream(response))))
+    assert len(rows) == 5
+    assert rows[0]['language'] == 'EN'
+    assert (rows[0]['grader'], rows[0]['grade']) == ('PSA', '9.0')
+
+
+@pytest.mark.django_db
+def test_export_queries_do_not_grow_with_rows(catalog):
+    with CaptureQueriesContext(connection) as captured:
+        lines = list(export_lines('products', 'csv', chunk_size=2))
+    assert len(lines) == 6
+    # One product query, three relation queries per chunk of two, and one
+    # load each of the language and version reference tables.
+    assert len(captured.captured_queries) == 1 + 3 * 3 + 2
+
+
+@pytest.mark.django_db
+def test_export_requires_authentication(catalog):
+    response = APIClient().get(reverse('product-export', kwargs={'extension': 'csv'}))
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ['product-export', 'listing-export'])
+def test_export_is_limited_to_staff_and_professionals(catalog, name):
+    url = reverse(name, kwargs={'extension': 'csv'})
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='buyer', password='pass'))
+    assert client.get(url).status_code == 403
+
+    client.force_authenticate(User.objects.create_user(username='staff', password='pass', is_staff=True))
+    assert client.get(url).status_code == 200
+
+
+@pytest.mark.django_db
+def test_exports_share_a_throttle_scope(catalog, monkeypatch):
+    monkeypatch.setattr(ScopedRateThrottle, 'THROTTLE_RATES', {**ScopedRateThrottle.THROTTLE_RATES, 'exports': '2/hour'})
+    seller, _ = catalog
+    client = APIClient()
+    client.force_authenticate(seller)
+
+    assert client.get(reverse('product-export', kwargs={'extension': 'csv'})).status_code == 200
+    assert client.get(reverse('listing-export', kwargs={'extension': 'csv'})).status_code == 200
+    assert client.get(reverse('product-export', kwargs={'extension': 'jsonl'})).status_code == 429
+    # Other endpoints of the same viewsets are not counted against exports.
+    assert client.get(reverse('listing-list')).status_code == 200
+
+
+@pytest.mark.django_db
+def test_export_command_writes_file(catalog, tmp_path):
+    output = tmp_path / 'listings.jsonl'
+    call_command('export_catalog', 'listings', output=str(output))
+    assert len(output.read_text().splitlines()) == 5
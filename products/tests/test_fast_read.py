@@ -0,0 +1,72 @@
+import pytest
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from products.models import Condition, Grade, Language, Listing, Product, Variant, Version
+from products.serializers import ListingSerializer, VariantSerializer
+from products.services.fast_read import listing_values, render_listings, render_variants, variant_values
+from products.services.documents import sync_search_documents
+
+
+@pytest.fixture
+def catalog(db):
+    seller = User.objects.create_user(username='seller', password='pass')
+    english = Language.objects.create(code='EN', name='English')
+    first = Version.objects.create(code='1st', name='1st Edition', tcg_types=['pokemon'], description='First print')
+    near_mint = Condition.objects.create(code='NM', label='Near Mint')
+    graded = Condition.objects.create(code='GR', label='Graded', is_graded=True)
+    psa = Grade.objects.create(grader='PSA', value=9.5)
+    for index in range(4):
+        product = Product.objects.create(name=f'Charizard {index}', tcg_type='pokemon')
+        raw = Variant.objects.create(product=product, language=english, version=first, condition=near_mint)
+        slab = Variant.objects.create(product=product, language=english, version=first, condition=graded, grade=psa)
+        Listing.objects.create(product=product, variant=raw, seller=seller, price='12.50', stock=2)
+        Listing.objects.create(product=product, variant=slab, seller=seller, price=300 + index, stock=0)
+        Listing.objects.create(product=product, variant=slab, seller=seller, price='99.99', status='sold')
+    # A variant without listings, hence without stats.
+    Variant.objects.create(product=product, language=english, version=Version.objects.create(code='promo', name='Promo'),
+                           condition=near_mint)
+    client = APIClient()
+    client.force_authenticate(seller)
+    return client
+
+
+def as_json(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.mark.django_db
+def test_fast_listing_rows_match_the_serializer(catalog):
+    queryset = Listing.objects.order_by('pk')
+    expected = ListingSerializer(queryset.select_related('variant__stats'), many=True).data
+    assert as_json(render_listings(listing_values(queryset))) == as_json(expected)
+
+
+@pytest.mark.django_db
+def test_fast_variant_rows_match_the_serializer(catalog):
+    queryset = Variant.objects.order_by('pk')
+    expected = VariantSerializer(queryset.select_related('stats'), many=True).data
+    assert as_json(render_variants(variant_values(queryset))) == as_json(expected)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url, params', [
+    ('listing-list', {}),
+    ('listing-list', {'sort': 'grade', 'pagination': 'cursor', 'page_size': 2}),
+    ('listing-list', {'sort': 'best_price'}),
+    ('variant-list', {}),
+    ('search', {'q': 'charizard'}),
+])
+def test_endpoints_respond_the_same_with_and_without_fast_path(catalog, settings, url, params):
+    sync_search_documents(Listing.objects.all())
+    settings.SEARCH_RESULT_CACHE_TIMEOUT = 0
+    settings.FAST_READ_PATH = False
+    slow = catalog.get(reverse(url), params)
+    settings.FAST_READ_PATH = True
+    fast = catalog.get(reverse(url), params)
+
+    assert slow.status_code == fast.status_code == 200
+    assert fast.json()['results']
+    assert fast.content == slow.content
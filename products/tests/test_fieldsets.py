@@ -0,0 +1,85 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from products.models import Condition, Grade, Language, Listing, Product, Variant, Version
+
+
+@pytest.fixture
+def listings(db):
+    seller = User.objects.create_user(username='seller', password='pass')
+    english = Language.objects.create(code='EN', name='English')
+    first = Version.objects.create(code='1st', name='1st Edition', description='First print run')
+    graded = Condition.objects.create(code='GR', label='Graded', is_graded=True)
+    psa = Grade.objects.create(grader='PSA', value=9)
+    for index in range(3):
+        product = Product.objects.create(name=f'Card {index}', tcg_type='pokemon')
+        variant = Variant.objects.create(product=product, language=english, version=first, condition=graded, grade=psa)
+        Listing.objects.create(product=product, variant=variant, seller=seller, price=10 + index)
+    client = APIClient()
+    client.force_authenticate(seller)
+    return client
+
+
+def results(response):
+    assert response.status_code == 200, response.content
+    return response.json()['results']
+
+
+@pytest.mark.django_db
+def test_fields_keep_only_requested_fields_at_any_depth(listings):
+    rows = results(listings.get(reverse('listing-list'), {'fields': 'id,price,variant.language.code'}))
+
+    assert set(rows[0]) == {'id', 'price', 'variant'}
+    assert rows[0]['variant'] == {'language': {'code': 'EN'}}
+
+
+@pytest.mark.django_db
+def test_expand_embeds_only_listed_relations(listings):
+    rows = results(listings.get(reverse('listing-list'), {'expand': 'variant.grade'}))
+
+    variant = rows[0]['variant']
+    assert variant['grade'] == {'id': Grade.objects.get().pk, 'value': '9.0', 'grader': 'PSA'}
+    assert variant['language'] == Language.objects.get().pk
+    assert 'stats' in variant
+
+    collapsed = results(listings.get(reverse('listing-list'), {'expand': ''}))
+    assert collapsed[0]['variant'] == Variant.objects.get(listing__pk=collapsed[0]['id']).pk
+
+
+@pytest.mark.django_db
+def test_default_representation_is_unchanged(listings):
+    rows = results(listings.get(reverse('listing-list')))
+    assert rows[0]['variant']['version']['description'] == 'First print run'
+
+
+@pytest.mark.django_db
+def test_sparse_listing_page_skips_variant_joins(listings):
+    with CaptureQueriesContext(connection) as captured:
+        results(listings.get(reverse('listing-list'), {'fields': 'id,price,variant', 'expand': ''}))
+    listing_query = next(query['sql'] for query in captured.captured_queries if 'FROM "products_listing"' in query['sql']
+                         and 'COUNT' not in query['sql'])
+    assert 'products_variant' not in listing_query
+    assert 'products_variantstats' not in listing_query
+
+
+@pytest.mark.django_db
+def test_unknown_fields_are_rejected(listings):
+    response = listings.get(reverse('listing-list'), {'fields': 'id,variant.nope'})
+    assert response.status_code == 400
+    assert "Unknown field 'variant.nope'." in str(response.json())
+
+    assert listings.get(reverse('listing-list'), {'expand': 'price'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_product_stats_fields_keep_their_join(listings):
+    with CaptureQueriesContext(connection) as captured:
+        response = listings.get(reverse('product-list'), {'fields': 'id,name,min_price'})
+    rows = results(response)
+    assert {row['min_price'] for row in rows} == {10, 11, 12}
+    # The product page, its count and nothing per product.
+    assert len([query for query in captured.captured_queries if 'products_product' in query['sql']]) == 2
@@ -0,0 +1,69 @@
+import pytest
+from django.db.models import F
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+
+from accounts.models import User
+from core.pagination import KeysetPagination
+from products.models import Condition, Language, Listing, ListingSearchDocument, Product, Variant, Version
+
+
+def cursor_request():
+    return Request(APIRequestFactory().get("/", {"pagination": "cursor"}))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("queryset", [
+    lambda: Product.objects.order_by(F("name").desc()),
+    lambda: Product.objects.order_by("block"),
+])
+def test_keyset_rejects_orderings_it_cannot_page(queryset):
+    with pytest.raises(ValidationError):
+        KeysetPagination().paginate_queryset(queryset(), cursor_request())
+
+
+@pytest.mark.django_db
+def test_keyset_accepts_nullable_columns_filtered_to_not_null():
+    queryset = ListingSearchDocument.objects.filter(grade_value__isnull=False).order_by("-grade_value", "price")
+
+    assert KeysetPagination().paginate_queryset(queryset, cursor_request()) == []
+
+
+@pytest.fixture
+def listings(db):
+    seller = User.objects.create_user(username="s", password="pass")
+    lang = Language.objects.create(code="EN", name="English")
+    ver = Version.objects.create(code="v1", name="First")
+    cond = Condition.objects.create(code="NM", label="Near Mint")
+    product = Product.objects.create(name="Bulkmon", tcg_type="pokemon")
+    variant = Variant.objects.create(product=product, language=lang, version=ver, condition=cond)
+    return [
+        Listing.objects.create(product=product, variant=variant, seller=seller, price=i + 1, stock=1)
+        for i in range(25)
+    ]
+
+
+@pytest.mark.parametrize("estimate", [4, 10000])
+def test_estimated_count_never_decides_which_pages_exist(listings, settings, monkeypatch, estimate):
+    from core import pagination
+
+    settings.PAGINATION_COUNT_CAP = 3
+    monkeypatch.setattr(pagination, "estimate_count", lambda queryset: estimate)
+    client = APIClient()
+
+    first = client.get(reverse("search"))
+    assert (first.data["count"], first.data["count_exact"]) == (estimate, False)
+    assert len(first.data["results"]) == 20
+    assert first.data["previous"] is None
+
+    second = client.get(first.data["next"])
+    assert second.status_code == 200
+    assert len(second.data["results"]) == 5
+    assert second.data["next"] is None
+    assert second.data["previous"] is not None
+    seen = [item["id"] for item in first.data["results"] + second.data["results"]]
+    assert sorted(seen) == sorted(listing.id for listing in listings)
+
+    assert client.get(reverse("search"), {"page": 3}).status_code == 404
@@ -0,0 +1,180 @@
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from products.models import (
+    Category,
+    Condition,
+    Language,
+    Listing,
+    Product,
+    ProductStats,
+    Variant,
+    VariantStats,
+    Version,
+)
+from products.services.product_stats import rebuild_listing_stats
+
+
+def make_products(count, seller, start=0):
+    lang = Language.objects.get_or_create(code="EN", defaults={"name": "English"})[0]
+    ver = Version.objects.get_or_create(code="1st", defaults={"name": "First"})[0]
+    cond = Condition.objects.get_or_create(code="NM", defaults={"label": "Near Mint"})[0]
+    parent = Category.objects.get_or_create(name="Cards")[0]
+    child = Category.objects.get_or_create(name="Holo", defaults={"parent": parent})[0]
+    for index in range(start, start + count):
+        product = Product.objects.create(name=f"Card {index}", tcg_type="pokemon")
+        product.categories.set([parent, child])
+        product.allowed_languages.set([lang])
+        product.allowed_versions.set([ver])
+        variant = Variant.objects.create(product=product, language=lang, version=ver, condition=cond)
+        Listing.objects.create(product=product, variant=variant, seller=seller, price=10, stock=2)
+        Listing.objects.create(product=product, variant=variant, seller=seller, price=20, stock=3)
+
+
+def stats_of(model, pk):
+    row = model.objects.filter(pk=pk).values("min_price", "price_total", "total_stock", "listing_count").first()
+    return row and (row["min_price"], row["price_total"], row["total_stock"], row["listing_count"])
+
+
+@pytest.mark.django_db
+def test_listing_stats_follow_listing_changes():
+    seller = User.objects.create_user(username="seller", password="pass")
+    make_products(1, seller)
+    product = Product.objects.get()
+    variant = Variant.objects.get()
+    assert stats_of(ProductStats, product.pk) == (Decimal("10"), Decimal("30"), 5, 2)
+    assert stats_of(VariantStats, variant.pk) == (Decimal("10"), Decimal("30"), 5, 2)
+    assert product.stats.average_price == Decimal("15.00")
+
+    cheap = Listing.objects.create(product=product, variant=variant, seller=seller, price=4, stock=1)
+    assert stats_of(ProductStats, product.pk) == (Decimal("4"), Decimal("34"), 6, 3)
+
+    # Checkout sells the last copy: the listing stops counting.
+    cheap.stock -= 1
+    cheap.save()
+    assert stats_of(ProductStats, product.pk) == (Decimal("10"), Decimal("30"), 5, 2)
+
+    expensive = Listing.objects.get(price=20)
+    expensive.price = 8
+    expensive.save()
+    assert stats_of(VariantStats, variant.pk) == (Decimal("8"), Decimal("18"), 5, 2)
+
+    Listing.objects.get(price=8).delete()
+    assert stats_of(ProductStats, product.pk) == (Decimal("10"), Decimal("10"), 2, 1)
+
+    Listing.objects.filter(price=10).get().delete()
+    Listing.objects.filter(pk=cheap.pk).delete()
+    # No listing left: the rows go, as a rebuild would leave them.
+    assert stats_of(ProductStats, product.pk) is None
+    assert stats_of(VariantStats, variant.pk) is None
+
+
+@pytest.mark.django_db
+def test_reconcile_rebuilds_stats_after_bulk_changes():
+    seller = User.objects.create_user(username="seller", password="pass")
+    make_products(2, seller)
+    first, second = Product.objects.order_by("id")
+    Listing.objects.filter(product=first, price=10).update(status="sold")
+    Listing.objects.filter(product=second).update(stock=0)
+    ProductStats.objects.filter(pk=first.pk).update(listing_count=99)
+
+    call_command("reconcile_listing_stats")
+
+    assert stats_of(ProductStats, first.pk) == (Decimal("20"), Decimal("20"), 3, 1)
+    assert stats_of(ProductStats, second.pk) is None
+    assert VariantStats.objects.count() == 1
+    assert rebuild_listing_stats(product_ids=[first.pk]) == 1
+
+
+@pytest.mark.django_db
+def test_product_and_listing_payloads_read_precomputed_stats():
+    client = APIClient()
+    seller = User.objects.create_user(username="seller", password="pass")
+    make_products(1, seller)
+    Product.objects.create(name="Unlisted", tcg_type="pokemon")
+
+    products = {item["name"]: item for item in client.get(reverse("product-list")).json()["results"]}
+    assert float(products["Card 0"]["min_price"]) == 10
+    assert float(products["Card 0"]["average_price"]) == 15
+    assert products["Card 0"]["total_stock"] == 5
+    assert products["Card 0"]["listing_count"] == 2
+    assert products["Unlisted"]["listing_count"] == 0
+    assert products["Unlisted"]["min_price"] is None
+
+    listing = client.get(reverse("listing-list")).json()["results"][0]
+    assert listing["variant"]["stats"]["listing_count"] == 2
+    assert float(listing["variant"]["stats"]["min_price"]) == 10
+
+
+@pytest.mark.django_db
+def test_product_list_query_count_does_not_grow_with_page_size():
+    client = APIClient()
+    seller = User.objects.create_user(username="seller", password="pass")
+    make_products(2, seller)
+
+    with CaptureQueriesContext(connection) as small:
+        resp = client.get(reverse("product-list"))
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert {item["total_stock"] for item in results} == {5}
+    assert float(results[0]["average_price"]) == 15
+
+    make_products(6, seller, start=2)
+    with CaptureQueriesContext(connection) as large:
+        resp = client.get(reverse("product-list"))
+    assert len(resp.json()["results"]) == 8
+    assert len(large.captured_queries) == len(small.captured_queries)
+
+
+@pytest.mark.django_db
+def test_product_search_query_count_does_not_grow_with_matches():
+    client = APIClient()
+    seller = User.objects.create_user(username="seller", password="pass")
+    client.force_authenticate(seller)
+    make_products(2, seller)
+
+    with CaptureQueriesContext(connection) as small:
+        resp = client.get(reverse("product-search"), {"q": "card"})
+    assert len(resp.json()) == 2
+
+    make_products(5, seller, start=2)
+    with CaptureQueriesContext(connection) as large:
+        resp = client.get(reverse("product-search"), {"q": "card"})
+    assert len(resp.json()) == 7
+    assert resp.json()[0]["total_stock"] == 5
+    assert len(large.captured_queries) == len(small.captured_queries)
+
+
+@pytest.mark.django_db
+def test_product_without_listings_reads_the_same_whatever_its_history():
+    from products.services.exports import product_rows
+
+    client = APIClient()
+    seller = User.objects.create_user(username="seller", password="pass")
+    make_products(1, seller)
+    Product.objects.create(name="Unlisted", tcg_type="pokemon")
+    for listing in Listing.objects.all():
+        listing.status = "sold"
+        listing.save()
+    assert not ProductStats.objects.exists() and not VariantStats.objects.exists()
+
+    def payloads():
+        products = {item["name"]: item for item in client.get(reverse("product-list")).json()["results"]}
+        exported = {row["name"]: row for row in product_rows()}
+        return [
+            ({key: item[key] for key in ("min_price", "average_price", "total_stock", "listing_count")},
+             {key: exported[name][key] for key in ("min_price", "average_price", "total_stock", "listing_count")})
+            for name, item in sorted(products.items())
+        ]
+
+    sold_out = payloads()
+    assert sold_out[0] == sold_out[1]
+    call_command("reconcile_listing_stats")
+    assert payloads() == sold_out
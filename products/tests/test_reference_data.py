@@ -0,0 +1,112 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from products.models import Condition, Grade, Language, Listing, Product, Variant, Version
+from products.services.query_parser import parse_query
+from products.services.reference_data import ReferenceTable, reference_table
+
+REFERENCE_TABLES = ("products_language", "products_version", "products_condition", "products_grade")
+
+
+def reference_queries(captured):
+    return [q["sql"] for q in captured.captured_queries if any(t in q["sql"] for t in REFERENCE_TABLES)]
+
+
+def make_listings(count, seller):
+    lang = Language.objects.get_or_create(code="EN", defaults={"name": "English"})[0]
+    ver = Version.objects.get_or_create(code="1st", defaults={"name": "First"})[0]
+    cond = Condition.objects.get_or_create(code="GR", defaults={"label": "Graded", "is_graded": True})[0]
+    grade = Grade.objects.create(grader="PSA", value=9)
+    for index in range(count):
+        product = Product.objects.create(name=f"Card {index}", tcg_type="pokemon")
+        variant = Variant.objects.create(product=product, language=lang, version=ver, condition=cond, grade=grade)
+        Listing.objects.create(product=product, variant=variant, seller=seller, price=10, stock=1)
+
+
+@pytest.mark.django_db
+def test_listing_serialization_reads_reference_rows_from_memory():
+    client = APIClient()
+    seller = User.objects.create_user(username="seller", password="pass")
+    make_listings(3, seller)
+    client.get(reverse("listing-list"))  # loads the reference tables
+
+    with CaptureQueriesContext(connection) as captured:
+        resp = client.get(reverse("listing-list"))
+    variant = resp.json()["results"][0]["variant"]
+    assert variant["language"]["code"] == "EN"
+    assert variant["grade"]["grader"] == "PSA"
+    assert reference_queries(captured) == []
+
+
+@pytest.mark.django_db
+def test_edits_propagate_through_the_version_stamp(settings):
+    settings.REFERENCE_CACHE_CHECK_INTERVAL = 0
+    language = Language.objects.create(code="FR", name="French")
+    other_process = ReferenceTable(Language, ("code", "name"))
+    assert other_process.by_code("french").code == "FR"
+
+    language.name = "Francais"
+    language.save()
+
+    assert other_process.by_code("francais") == language
+    assert other_process.by_code("french") is None
+
+
+@pytest.mark.django_db
+def test_query_operators_resolve_codes_from_memory():
+    Language.objects.create(code="JP", name="Japanese")
+    Condition.objects.create(code="NM", label="Near Mint")
+    reference_table(Language).all()
+    reference_table(Condition).all()
+
+    with CaptureQueriesContext(connection) as captured:
+        parsed = parse_query('charizard lang:japanese cond:"near mint"')
+    assert parsed.text == "charizard"
+    assert [str(condition) for _, condition in parsed.conditions] == [
+        str(parse_query("lang:jp").conditions[0][1]),
+        str(parse_query("cond:NM").conditions[0][1]),
+    ]
+    assert captured.captured_queries == []
+
+
+@pytest.mark.django_db
+def test_variant_ids_are_validated_against_the_cache():
+    client = APIClient()
+    admin = User.objects.create_superuser(username="admin", password="pass", email="admin@example.com")
+    client.force_authenticate(admin)
+    lang = Language.objects.create(code="EN", name="English")
+    ver = Version.objects.create(code="1st", name="First")
+    cond = Condition.objects.create(code="NM", label="Near Mint")
+    product = Product.objects.create(name="Pikachu", tcg_type="pokemon")
+    payload = {"product": product.pk, "language_id": lang.pk, "version_id": ver.pk, "condition_id": cond.pk, "grade_id": None}
+
+    resp = client.post(reverse("variant-list"), {**payload, "language_id": 999}, format="json")
+    assert resp.status_code == 400
+    assert "language_id" in resp.json()["details"]
+
+    resp = client.post(reverse("variant-list"), payload, format="json")
+    assert resp.status_code == 201
+    assert resp.json()["language"]["name"] == "English"
+
+
+@pytest.mark.django_db
+def test_validated_reference_ids_do_not_hand_out_the_cached_row():
+    from products.serializers import VariantSerializer
+
+    lang = Language.objects.create(code="EN", name="English")
+    ver = Version.objects.create(code="1st", name="First")
+    cond = Condition.objects.create(code="NM", label="Near Mint")
+    product = Product.objects.create(name="Pikachu", tcg_type="pokemon")
+    serializer = VariantSerializer(data={
+        "product": product.pk, "language_id": lang.pk, "version_id": ver.pk, "condition_id": cond.pk, "grade_id": None,
+    })
+    assert serializer.is_valid(), serializer.errors
+
+    language = serializer.validated_data["language"]
+    assert language == reference_table(Language).get(lang.pk)
+    language.name = "Changed"
+    assert reference_table(Language).get(lang.pk).name == "English"
@@ -84,3 +84,320 @@ def test_search_pagination():
     assert len(resp.data["results"]) == 20
     assert resp.data["next"] is not None
 
+
+
+@pytest.mark.django_db
+def test_search_matches_variant_attribute_labels():
+    client = APIClient()
+    seller = User.objects.create_user(username="seller", password="pass")
+    ver = Version.objects.create(code="v1", name="First")
+    cond = Condition.objects.create(code="NM", label="Near Mint")
+    product = Product.objects.create(name="Dracaufeu", tcg_type="pokemon")
+    french = Variant.objects.create(
+        product=product, language=Language.objects.create(code="FR", name="French"), version=ver, condition=cond
+    )
+    english = Variant.objects.create(
+        product=product, language=Language.objects.create(code="EN", name="English"), version=ver, condition=cond
+    )
+    listing = Listing.objects.create(product=product, variant=french, seller=seller, price=10, stock=1)
+    Listing.objects.create(product=product, variant=english, seller=seller, price=12, stock=1)
+
+    resp = client.get(reverse("search"), {"q": "french"})
+    assert resp.status_code == 200
+    assert [item["id"] for item in resp.data["results"]] == [listing.id]
+
+
+@pytest.mark.django_db
+def test_search_updates_query_rollup():
+    from searches.models import SearchQueryRollup
+
+    client = APIClient()
+    user = User.objects.create_user(username="user", password="pass")
+    client.force_authenticate(user=user)
+    url = reverse("search")
+    client.get(url, {"q": "Pokémon  Base"})
+    client.get(url, {"q": "pokemon base"})
+
+    rollup = SearchQueryRollup.objects.get()
+    assert rollup.query == "pokemon base"
+    assert rollup.count == 2
+
+
+@pytest.mark.django_db
+def test_search_documents_follow_catalog_changes():
+    from products.models import ListingSearchDocument
+
+    client = APIClient()
+    seller = User.objects.create_user(username="seller", password="pass")
+    lang = Language.objects.create(code="EN", name="English")
+    ver = Version.objects.create(code="v1", name="First")
+    cond = Condition.objects.create(code="NM", label="Near Mint")
+    product = Product.objects.create(name="Mewtwo", tcg_type="pokemon", series="Base")
+    variant = Variant.objects.create(product=product, language=lang, version=ver, condition=cond)
+    listing = Listing.objects.create(product=product, variant=variant, seller=seller, price=10, stock=1)
+    sold = Listing.objects.create(product=product, variant=variant, seller=seller, price=8, stock=1)
+
+    sold.status = "sold"
+    sold.save()
+    product.name = "Mew"
+    product.save()
+    lang.name = "Anglais"
+    lang.save()
+
+    document = ListingSearchDocument.objects.get()
+    assert document.listing_id == listing.id
+    assert document.product_name == "Mew"
+    assert "Anglais" in document.labels
+
+    resp = client.get(reverse("search"), {"q": "anglais"})
+    assert [item["id"] for item in resp.data["results"]] == [listing.id]
+
+
+@pytest.mark.django_db
+def test_search_facets_exclude_their_own_filter():
+    client = APIClient()
+    seller = User.objects.create_user(username="seller", password="pass")
+    ver = Version.objects.create(code="v1", name="First")
+    near_mint = Condition.objects.create(code="NM", label="Near Mint")
+    played = Condition.objects.create(code="PL", label="Played")
+    english = Language.objects.create(code="EN", name="English")
+    french = Language.objects.create(code="FR", name="French")
+    product = Product.objects.create(name="Eevee", tcg_type="pokemon")
+    for language, condition, price in [
+        (english, near_mint, 5), (english, played, 30), (french, near_mint, 120), (french, played, 8),
+    ]:
+        variant = Variant.objects.create(product=product, language=language, version=ver, condition=condition)
+        Listing.objects.create(product=product, variant=variant, seller=seller, price=price, stock=1)
+
+    resp = client.get(reverse("search"), {"language": "EN", "facets": "true"})
+    assert resp.status_code == 200
+    assert resp.data["count"] == 2
+    facets = resp.data["facets"]
+    assert facets["language"] == [{"value": "EN", "count": 2}, {"value": "FR", "count": 2}]
+    assert facets["condition"] == [{"value": "NM", "count": 1}, {"value": "PL", "count": 1}]
+    assert facets["price"] == [{"value": "0-10", "count": 1}, {"value": "25-50", "count": 1}]
+    assert facets["tcg_type"] == [{"value": "pokemon", "count": 2}]
+
+
+@pytest.mark.django_db
+def test_search_cursor_pagination_is_stable_under_inserts():
+    client = APIClient()
+    seller = User.objects.create_user(username="s", password="pass")
+    lang = Language.objects.create(code="EN", name="English")
+    ver = Version.objects.create(code="v1", name="First")
+    cond = Condition.objects.create(code="NM", label="Near Mint")
+    product = Product.objects.create(name="Bulkmon", tcg_type="pokemon")
+    variant = Variant.objects.create(product=product, language=lang, version=ver, condition=cond)
+    listings = [
+        Listing.objects.create(product=product, variant=variant, seller=seller, price=i + 1, stock=1)
+        for i in range(25)
+    ]
+
+    resp = client.get(reverse("search"), {"pagination": "cursor"})
+    assert resp.status_code == 200
+    assert "count" not in resp.data
+    first_page = [item["id"] for item in resp.data["results"]]
+    assert len(first_page) == 20
+
+    # A listing created between two pages must not shift the next one.
+    Listing.objects.create(product=product, variant=variant, seller=seller, price=99, stock=1)
+    resp = client.get(resp.data["next"])
+    second_page = [item["id"] for item in resp.data["results"]]
+    assert resp.data["next"] is None
+    assert sorted(first_page + second_page) == sorted(listing.id for listing in listings)
+
+    resp = client.get(reverse("listing-list"), {"pagination": "cursor", "page_size": 10})
+    assert len(resp.data["results"]) == 10
+    assert resp.data["next"] is not None
+
+
+@pytest.mark.django_db
+def test_search_results_cached_until_a_write(django_assert_num_queries, django_capture_on_commit_callbacks):
+    client = APIClient()
+    seller = User.objects.create_user(username="seller", password="pass")
+    lang = Language.objects.create(code="EN", name="English")
+    ver = Version.objects.create(code="v1", name="First")
+    cond = Condition.objects.create(code="NM", label="Near Mint")
+    pokemon = Product.objects.create(name="Pikachu", tcg_type="pokemon")
+    magic = Product.objects.create(name="Black Lotus", tcg_type="magic")
+    pokemon_variant = Variant.objects.create(product=pokemon, language=lang, version=ver, condition=cond)
+    magic_variant = Variant.objects.create(product=magic, language=lang, version=ver, condition=cond)
+    Listing.objects.create(product=pokemon, variant=pokemon_variant, seller=seller, price=10, stock=1)
+
+    url = reverse("search")
+    assert client.get(url, {"tcg_type": "pokemon", "q": "Pika"}).data["count"] == 1
+    with django_assert_num_queries(0):
+        resp = client.get(url, {"q": "  pika ", "tcg_type": "pokemon"})
+    assert resp.data["count"] == 1
+
+    # A write in another tcg_type leaves the pokemon entry valid...
+    with django_capture_on_commit_callbacks(execute=True):
+        Listing.objects.create(product=magic, variant=magic_variant, seller=seller, price=99, stock=1)
+    with django_assert_num_queries(0):
+        client.get(url, {"tcg_type": "pokemon", "q": "pika"})
+
+    # ...while a pokemon write invalidates it.
+    with django_capture_on_commit_callbacks(execute=True):
+        Listing.objects.create(product=pokemon, variant=pokemon_variant, seller=seller, price=12, stock=1)
+    assert client.get(url, {"tcg_type": "pokemon", "q": "pika"}).data["count"] == 2
+
+
+@pytest.mark.django_db
+def test_cached_search_links_follow_the_requesting_host(settings):
+    settings.ALLOWED_HOSTS = ["*"]
+    client = APIClient()
+    seller = User.objects.create_user(username="s", password="pass")
+    lang = Language.objects.create(code="EN", name="English")
+    ver = Version.objects.create(code="v1", name="First")
+    cond = Condition.objects.create(code="NM", label="Near Mint")
+    product = Product.objects.create(name="Bulkmon", tcg_type="pokemon")
+    variant = Variant.objects.create(product=product, language=lang, version=ver, condition=cond)
+    for i in range(25):
+        Listing.objects.create(product=product, variant=variant, seller=seller, price=i + 1, stock=1)
+
+    internal = client.get(reverse("search"), HTTP_HOST="search.internal")
+    public = client.get(reverse("search"), HTTP_HOST="shop.example.com", secure=True)
+
+    assert internal.data["next"].startswith("http://search.internal/api/")
+    assert public.data["next"].startswith("https://shop.example.com/api/")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("backend", [
+    "products.services.backends.DatabaseSearchBackend",
+    "products.services.backends.InMemorySearchBackend",
+])
+def test_search_backends_agree(settings, backend):
+    settings.SEARCH_BACKEND = backend
+    client = APIClient()
+    user = User.objects.create_user(username="seller", password="pass")
+    lang = Language.objects.create(code="EN", name="English")
+    ver = Version.objects.create(code="v1", name="First")
+    cond = Condition.objects.create(code="NM", label="Near Mint")
+    pikachu = Product.objects.create(name="Pikachu", tcg_type="pokemon", series="Jungle")
+    raichu = Product.objects.create(name="Raichu", tcg_type="pokemon", series="Fossil")
+    for product in (pikachu, raichu):
+        variant = Variant.objects.create(product=product, language=lang, version=ver, condition=cond)
+        Listing.objects.create(product=product, variant=variant, seller=user, price=10, stock=1)
+
+    resp = client.get(reverse("search"), {"q": "pika"})
+    assert [item["product"] for item in resp.data["results"]] == [pikachu.id]
+    resp = client.get(reverse("search"), {"q": "jungle near"})
+    assert [item["product"] for item in resp.data["results"]] == [pikachu.id]
+
+    client.force_authenticate(user=user)
+    resp = client.get(reverse("product-search"), {"q": "raich"})
+    assert [item["id"] for item in resp.data] == [raichu.id]
+
+
+@pytest.mark.django_db
+def test_search_query_operators():
+    from products.services.query_parser import parse_query
+
+    client = APIClient()
+    seller = User.objects.create_user(username="seller", password="pass")
+    ver = Version.objects.create(code="v1", name="First")
+    graded = Condition.objects.create(code="GR", label="Graded", is_graded=True)
+    japanese = Language.objects.create(code="JP", name="Japanese")
+    english = Language.objects.create(code="EN", name="English")
+    charizard = Product.objects.create(name="Charizard", tcg_type="pokemon")
+    wanted = None
+    for language, grade, price in [
+        (japanese, Grade.objects.create(grader="PSA", value=9), 150),
+        (japanese, Grade.objects.create(grader="PSA", value=8), 120),
+        (japanese, Grade.objects.create(grader="BGS", value=9.5), 180),
+        (english, Grade.objects.create(grader="PSA", value=10), 100),
+    ]:
+        variant = Variant.objects.create(product=charizard, language=language, version=ver, condition=graded, grade=grade)
+        listing = Listing.objects.create(product=charizard, variant=variant, seller=seller, price=price, stock=1)
+        wanted = wanted or listing
+
+    parsed = parse_query('Charizard lang:jp grade:psa>=9 price:<200 foo:bar series:"base set"')
+    assert parsed.text == "Charizard foo:bar"
+    assert [facet for facet, _ in parsed.conditions] == ["language", "grader", "price", None]
+
+    resp = client.get(reverse("search"), {"q": "charizard lang:jp grade:psa>=9 price:<200"})
+    assert [item["id"] for item in resp.data["results"]] == [wanted.id]
+
+
+@pytest.mark.django_db
+def test_search_sort_modes():
+    client = APIClient()
+    seller = User.objects.create_user(username="seller", password="pass")
+    lang = Language.objects.create(code="EN", name="English")
+    ver = Version.objects.create(code="v1", name="First")
+    raw = Condition.objects.create(code="NM", label="Near Mint")
+    graded = Condition.objects.create(code="GR", label="Graded", is_graded=True)
+    product = Product.objects.create(name="Gengar", tcg_type="pokemon")
+    plain = Variant.objects.create(product=product, language=lang, version=ver, condition=raw)
+    psa9 = Variant.objects.create(
+        product=product, language=lang, version=ver, condition=graded, grade=Grade.objects.create(grader="PSA", value=9)
+    )
+    psa10 = Variant.objects.create(
+        product=product, language=lang, version=ver, condition=graded, grade=Grade.objects.create(grader="PSA", value=10)
+    )
+    cheap_plain = Listing.objects.create(product=product, variant=plain, seller=seller, price=5, stock=1)
+    Listing.objects.create(product=product, variant=plain, seller=seller, price=7, stock=1)
+    cheap_psa9 = Listing.objects.create(product=product, variant=psa9, seller=seller, price=80, stock=1)
+    Listing.objects.create(product=product, variant=psa9, seller=seller, price=90, stock=1)
+    top = Listing.objects.create(product=product, variant=psa10, seller=seller, price=300, stock=1)
+
+    def ids(sort, url=reverse("search")):
+        resp = client.get(url, {"sort": sort})
+        assert resp.status_code == 200
+        return [item["id"] for item in resp.data["results"]]
+
+    assert [Listing.objects.get(pk=pk).price for pk in ids("price_asc")] == [5, 7, 80, 90, 300]
+    assert ids("price_desc")[0] == top.id
+    assert ids("grade")[:2] == [top.id, cheap_psa9.id]
+    assert len(ids("grade")) == 3
+    assert ids("best_price") == [cheap_plain.id, cheap_psa9.id, top.id]
+    assert ids("best_price", reverse("listing-list")) == [cheap_plain.id, cheap_psa9.id, top.id]
+    assert ids("grade", reverse("listing-list"))[0] == top.id
+    assert client.get(reverse("search"), {"sort": "cheapest"}).status_code == 400
+
+    # Facets count the rows the sort keeps.
+    def facets(sort, **params):
+        resp = client.get(reverse("search"), {"sort": sort, "facets": "true", **params})
+        counts = {facet: {item["value"]: item["count"] for item in items} for facet, items in resp.data["facets"].items()}
+        return resp.data["count"], counts
+
+    count, counts = facets("best_price")
+    assert count == 3
+    assert counts["condition"] == {"GR": 2, "NM": 1}
+    count, counts = facets("grade")
+    assert count == 3
+    assert counts["condition"] == {"GR": 3}
+    count, counts = facets("best_price", min_price=6)
+    assert count == 3
+    assert counts["price"] == {"0-10": 1, "50-100": 1, "250+": 1}
+    assert facets("newest")[1]["condition"] == {"GR": 3, "NM": 2}
+
+    # A listing nobody can buy is never a variant's best price.
+    Listing.objects.filter(pk=cheap_plain.pk).update(status="sold")
+    Listing.objects.filter(pk=cheap_psa9.pk).update(stock=0)
+    assert [Listing.objects.get(pk=pk).price for pk in ids("best_price", reverse("listing-list"))] == [7, 90, 300]
+
+
+@pytest.mark.django_db
+def test_search_count_is_estimated_above_the_cap(settings, monkeypatch):
+    from core import pagination
+
+    settings.PAGINATION_COUNT_CAP = 3
+    client = APIClient()
+    seller = User.objects.create_user(username="s", password="pass")
+    lang = Language.objects.create(code="EN", name="English")
+    ver = Version.objects.create(code="v1", name="First")
+    cond = Condition.objects.create(code="NM", label="Near Mint")
+    product = Product.objects.create(name="Bulkmon", tcg_type="pokemon")
+    variant = Variant.objects.create(product=product, language=lang, version=ver, condition=cond)
+    for i in range(5):
+        Listing.objects.create(product=product, variant=variant, seller=seller, price=i + 1, stock=1)
+
+    resp = client.get(reverse("search"), {"max_price": 3})
+    assert (resp.data["count"], resp.data["count_exact"]) == (3, True)
+
+    monkeypatch.setattr(pagination, "estimate_count", lambda queryset: 40)
+    resp = client.get(reverse("search"))
+    assert (resp.data["count"], resp.data["count_exact"]) == (40, False)
+    assert len(resp.data["results"]) == 5
@@ -0,0 +1,62 @@
+import os
+import time
+
+from products.services import shared_index
+from products.services.autocomplete import PrefixIndex
+from products.services.shared_index import MappedPrefixIndex, write_index_file
+
+
+def _weights():
+    weights = {f"Card {number:04d}": number % 37 + 1 for number in range(600)}
+    weights.update({"Pikachu": 50, "Pikachu VMAX": 80, "Pichu": 3, "Dracaufeu": 10, "Évoli": 7})
+    return weights
+
+
+def _memory_index(weights):
+    index = PrefixIndex()
+    for term, weight in weights.items():
+        index.add_term(term, weight)
+    return index
+
+
+def test_mapped_index_matches_memory_index(tmp_path):
+    weights = _weights()
+    path = tmp_path / "autocomplete.idx"
+    write_index_file(path, weights)
+
+    mapped = MappedPrefixIndex(str(path))
+    memory = _memory_index(weights)
+    for prefix in ["c", "card", "card 01", "card 0123", "pi", "vmax", "evo", "DRA", "zzz"]:
+        assert mapped.suggest(prefix) == memory.suggest(prefix), prefix
+    assert mapped.suggest("pi", limit=2) == ["Pikachu VMAX", "Pikachu"]
+
+
+def test_mapped_index_picks_up_new_generation(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_index, "RELOAD_CHECK_INTERVAL", 0)
+    path = str(tmp_path / "autocomplete.idx")
+    write_index_file(path, {"Charizard": 1})
+    mapped = MappedPrefixIndex(path)
+    first_generation = mapped.generation
+    assert mapped.suggest("dra") == []
+
+    write_index_file(path, {"Charizard": 1, "Dracaufeu": 2})
+    assert mapped.suggest("dra") == ["Dracaufeu"]
+    assert mapped.generation != first_generation
+    assert [name for name in os.listdir(tmp_path)] == ["autocomplete.idx"]
+
+
+def test_stale_index_file_is_rebuilt_in_the_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_index, "RELOAD_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(shared_index, "load_term_weights", lambda: ({"Charizard": 1, "Dracaufeu": 2}, {}))
+    path = str(tmp_path / "autocomplete.idx")
+    write_index_file(path, {"Charizard": 1})
+    old = time.time() - 600
+    os.utime(path, (old, old))
+    mapped = MappedPrefixIndex(path, max_age=300)
+
+    assert mapped.suggest("dra") == []
+    mapped._rebuild_thread.join(5)
+
+    assert mapped.suggest("dra") == ["Dracaufeu"]
+    # A file younger than max_age is left alone.
+    assert shared_index.rebuild_index_file(path, max_age=300) is None
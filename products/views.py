@@ -1,15 +1,38 @@
 from rest_framework import viewsets, generics
-from rest_framework.pagination import PageNumberPagination
-from accounts.permissions import IsPremiumUser
+from accounts.permissions import CanExportCatalog, IsPremiumUser
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.throttling import ScopedRateThrottle, UserRateThrottle
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from django.apps import apps
+from django.shortcuts import get_object_or_404
 from django.db.models import Q
-from core.mixins import StandardResponseMixin, ValidationMixin, PermissionMixin
+from django.http import StreamingHttpResponse
+from core.mixins import ConditionalGetMixin, SparseFieldsetMixin, StandardResponseMixin, ValidationMixin, PermissionMixin
 from core.exceptions import APIResponse
+from core.pagination import KeysetOrPageNumberPagination
+from .services.autocomplete import get_autocomplete_index
+from .services.categories import CategoryTree, products_in_categories
+from .services.exports import CONTENT_TYPES, export_lines
+from .services.facets import cached_facets
+from .services.fast_read import (
+    fast_read_enabled,
+    listing_values,
+    render_listings,
+    render_listings_by_id,
+    render_variants,
+    variant_values,
+)
+from .services.query_parser import parse_query
+from .services.sorting import SORT_MODES, sort_listings, sort_rows
+from .services.product_stats import available_listings, product_list_queryset
+from .services.result_cache import absolute_links, cached_search, relative_links
+from .services.backends import get_search_backend
+from .services.search import fuzzy_suggestions
 from .models import (
     Product,
     Category,
@@ -20,6 +43,7 @@ from .models import (
     Grade,
     Variant,
     Listing,
+    ListingSearchDocument,
     Collection,
 )
 from .serializers import (
@@ -35,7 +59,61 @@ from .serializers import (
     CollectionSerializer,
 )
 
-class CategoryViewSet(StandardResponseMixin, ValidationMixin, PermissionMixin, viewsets.ModelViewSet):
+SUGGESTION_LIMIT = 10
+RESULT_CACHE_PREFIX = 'search:results:'
+
+
+SORT_PARAMETER = openapi.Parameter(
+    'sort', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(SORT_MODES),
+    description="newest, price_asc, price_desc, grade (graded listings, highest first) "
+                "or best_price (cheapest listing of each variant)",
+)
+
+
+def is_truthy(value):
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
+EXPORT_URL_PATH = r'export/(?P<extension>jsonl|csv)'
+# Full dumps are expensive: on top of the per-user rate, the ``exports`` scope.
+EXPORT_THROTTLES = [UserRateThrottle, ScopedRateThrottle]
+TCG_TYPE_PARAMETER = openapi.Parameter('tcg_type', openapi.IN_QUERY, type=openapi.TYPE_STRING)
+
+
+def export_response(kind, extension, queryset):
+    # Streamed line by line: the export is never held in memory.
+    response = StreamingHttpResponse(export_lines(kind, extension, queryset), content_type=CONTENT_TYPES[extension])
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{extension}"'
+    return response
+
+
+def fast_list(view, values, render):
+    """
+    ``list`` built from ``values()`` rows (see products.services.fast_read),
+    for requests that want the serializer's default representation.
+    """
+    queryset = values(view.filter_queryset(view.get_queryset()))
+    page = view.paginate_queryset(queryset)
+    if page is None:
+        return Response(render(queryset))
+    return view.get_paginated_response(render(page))
+
+
+def sorted_listings(queryset, sort):
+    try:
+        return sort_listings(queryset, sort)
+    except ValueError as error:
+        raise ValidationError({'sort': str(error)})
+
+
+def rows_for_sort(queryset, sort):
+    try:
+        return sort_rows(queryset, sort)
+    except ValueError as error:
+        raise ValidationError({'sort': str(error)})
+
+
+class CategoryViewSet(ConditionalGetMixin, StandardResponseMixin, ValidationMixin, PermissionMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing product categories.
     
@@ -44,6 +122,7 @@ class CategoryViewSet(StandardResponseMixin, ValidationMixin, PermissionMixin, v
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    conditional_tables = ('products_category',)
     object_name = "category"
 
     def get_queryset(self):
@@ -96,7 +175,29 @@ class CategoryViewSet(StandardResponseMixin, ValidationMixin, PermissionMixin, v
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
 
-class ProductViewSet(viewsets.ModelViewSet):
+    @swagger_auto_schema(
+        operation_description="Nested category tree, from every root or from the category given as 'root'",
+        operation_summary="Category Tree",
+        tags=['Product Catalog'],
+        manual_parameters=[
+            openapi.Parameter('root', openapi.IN_QUERY, description="Category id to start from", type=openapi.TYPE_INTEGER),
+        ],
+    )
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        return self.conditional_response(request, self.render_tree)
+
+    def render_tree(self, request):
+        root = None
+        if request.query_params.get('root'):
+            root = get_object_or_404(Category, pk=request.query_params['root'])
+        tree = CategoryTree.load(root)
+        roots = [tree.nodes[root.pk]] if root else tree.roots
+        context = {**self.get_serializer_context(), 'category_tree': tree}
+        serializer = self.get_serializer(roots, many=True, context=context)
+        return APIResponse.success(data=serializer.data, message="Category tree retrieved successfully")
+
+class ProductViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing TCG products.
     
@@ -106,13 +207,30 @@ class ProductViewSet(viewsets.ModelViewSet):
     """
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    throttle_scope = 'exports'
+    # Everything ProductSerializer renders; images and M2M edits bump products_product.
+    conditional_tables = (
+        'products_product', 'products_category', 'products_language', 'products_version', 'products_productstats',
+    )
 
     def get_queryset(self):
-        return Product.objects.prefetch_related('categories', 'images').all()
+        queryset = product_list_queryset()
+        if self.action == 'list':
+            queryset = self.filter_by_category(queryset)
+        return queryset
+
+    def filter_by_category(self, queryset):
+        category = self.request.query_params.get('category')
+        if category:
+            lookup = Q(pk=category) if category.isdigit() else Q(slug=category)
+            queryset = products_in_categories(queryset, Category.objects.filter(lookup))
+        return queryset
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy', 'add_image']:
             permission_classes = [IsAdminUser]
+        elif self.action == 'export':
+            permission_classes = [CanExportCatalog]
         else:
             permission_classes = []
         return [permission() for permission in permission_classes]
@@ -173,10 +291,25 @@ class ProductViewSet(viewsets.ModelViewSet):
             return APIResponse.created(serializer.data, "Image added successfully")
         return APIResponse.validation_error(serializer.errors)
 
-class LanguageViewSet(viewsets.ModelViewSet):
+    @swagger_auto_schema(
+        operation_description="Stream every product with its relations and listing stats as JSON Lines or CSV",
+        operation_summary="Export Products",
+        tags=['Product Catalog'],
+        manual_parameters=[TCG_TYPE_PARAMETER, openapi.Parameter('category', openapi.IN_QUERY, type=openapi.TYPE_STRING)],
+    )
+    @action(detail=False, methods=['get'], url_path=EXPORT_URL_PATH, throttle_classes=EXPORT_THROTTLES)
+    def export(self, request, extension):
+        queryset = self.filter_by_category(Product.objects.all())
+        tcg_type = request.query_params.get('tcg_type')
+        if tcg_type:
+            queryset = queryset.filter(tcg_type=tcg_type)
+        return export_response('products', extension, queryset)
+
+class LanguageViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Language options for TCG products (e.g., English, French, Japanese)."""
     queryset = Language.objects.all()
     serializer_class = LanguageSerializer
+    conditional_tables = ('products_language',)
 
     @swagger_auto_schema(
         operation_description="List all available languages for TCG products",
@@ -186,10 +319,11 @@ class LanguageViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
-class VersionViewSet(viewsets.ModelViewSet):
+class VersionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Version options for TCG products (e.g., First Edition, Unlimited)."""
     queryset = Version.objects.all()
     serializer_class = VersionSerializer
+    conditional_tables = ('products_version',)
 
     @swagger_auto_schema(
         operation_description="List all available versions for TCG products",
@@ -199,10 +333,11 @@ class VersionViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
-class ConditionViewSet(viewsets.ModelViewSet):
+class ConditionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Condition options for TCG products (e.g., Near Mint, Played)."""
     queryset = Condition.objects.all()
     serializer_class = ConditionSerializer
+    conditional_tables = ('products_condition',)
 
     @swagger_auto_schema(
         operation_description="List all available conditions for TCG products",
@@ -212,10 +347,11 @@ class ConditionViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
-class GradeViewSet(viewsets.ModelViewSet):
+class GradeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Professional grading options (e.g., PSA 10, BGS 9.5)."""
     queryset = Grade.objects.all()
     serializer_class = GradeSerializer
+    conditional_tables = ('products_grade',)
 
     @swagger_auto_schema(
         operation_description="List all available professional grades",
@@ -225,9 +361,10 @@ class GradeViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
-class VariantViewSet(viewsets.ModelViewSet):
+class VariantViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """Product variants combining language, version, condition, and grade."""
-    queryset = Variant.objects.all()
+    # Languages, versions, conditions and grades are served from the reference cache.
+    queryset = Variant.objects.select_related('stats')
     serializer_class = VariantSerializer
 
     @swagger_auto_schema(
@@ -236,21 +373,51 @@ class VariantViewSet(viewsets.ModelViewSet):
         tags=['Product Catalog']
     )
     def list(self, request, *args, **kwargs):
+        if fast_read_enabled() and self.get_fieldset() is None:
+            return fast_list(self, variant_values, render_variants)
         return super().list(request, *args, **kwargs)
 
-class ListingViewSet(viewsets.ModelViewSet):
+class ListingViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """Marketplace listings where sellers offer their products for sale."""
-    queryset = Listing.objects.all()
+    queryset = Listing.objects.select_related('variant__stats')
     serializer_class = ListingSerializer
+    pagination_class = KeysetOrPageNumberPagination
+    throttle_scope = 'exports'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = sorted_listings(queryset, self.request.query_params.get('sort'))
+        return queryset
 
     @swagger_auto_schema(
         operation_description="List all marketplace listings with pricing and availability",
         operation_summary="List Marketplace Listings",
-        tags=['Marketplace']
+        tags=['Marketplace'],
+        manual_parameters=[SORT_PARAMETER],
     )
     def list(self, request, *args, **kwargs):
+        if fast_read_enabled() and self.get_fieldset() is None:
+            return fast_list(self, listing_values, render_listings)
         return super().list(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        operation_description="Stream every active, in-stock listing as JSON Lines or CSV",
+        operation_summary="Export Listings",
+        tags=['Marketplace'],
+        manual_parameters=[TCG_TYPE_PARAMETER],
+    )
+    @action(
+        detail=False, methods=['get'], url_path=EXPORT_URL_PATH,
+        permission_classes=[CanExportCatalog], throttle_classes=EXPORT_THROTTLES,
+    )
+    def export(self, request, extension):
+        queryset = available_listings()
+        tcg_type = request.query_params.get('tcg_type')
+        if tcg_type:
+            queryset = queryset.filter(product__tcg_type=tcg_type)
+        return export_response('listings', extension, queryset)
+
 
 class CollectionViewSet(viewsets.ModelViewSet):
     """
@@ -301,7 +468,8 @@ class SearchSuggestionView(APIView):
     """
     Search suggestions API providing auto-complete functionality.
     
-    Returns suggestions based on product names, series, blocks, and user search history.
+    Returns suggestions based on product names, series, blocks, and user search history,
+    most popular first. Lookups are served from an in-memory prefix index.
     """
 
     @swagger_auto_schema(
@@ -315,7 +483,13 @@ class SearchSuggestionView(APIView):
                 description="Partial search query",
                 type=openapi.TYPE_STRING,
                 required=True
-            )
+            ),
+            openapi.Parameter(
+                'fuzzy',
+                openapi.IN_QUERY,
+                description="Typo-tolerant matching, results ordered by similarity",
+                type=openapi.TYPE_BOOLEAN
+            ),
         ],
         responses={
             200: openapi.Response(
@@ -332,62 +506,35 @@ class SearchSuggestionView(APIView):
     )
     def get(self, request, *args, **kwargs):
         query = request.query_params.get("query", "").strip()
-        suggestions: set[str] = set()
 
-        if query:
-            suggestions.update(
-                Product.objects.filter(name__icontains=query)
-                .values_list("name", flat=True)
-                .distinct()
-            )
-            suggestions.update(
-                Product.objects.filter(series__icontains=query)
-                .exclude(series__isnull=True)
-                .values_list("series", flat=True)
-                .distinct()
-            )
-            suggestions.update(
-                Product.objects.filter(block__icontains=query)
-                .exclude(block__isnull=True)
-                .values_list("block", flat=True)
-                .distinct()
-            )
+        if query and is_truthy(request.query_params.get("fuzzy")):
+            return Response(fuzzy_suggestions(query, limit=SUGGESTION_LIMIT))
 
-            # Include terms from SearchHistory model if it exists
-            from django.apps import apps
-
-            try:
-                SearchHistory = apps.get_model("searches", "SearchHistory")
-            except LookupError:
-                SearchHistory = None
-
-            if SearchHistory is not None:
-                history_terms = (
-                    SearchHistory.objects.filter(query__icontains=query)
-                    .values_list("query", flat=True)
-                    .distinct()[:5]
-                )
-                suggestions.update(history_terms)
+        if query:
+            return Response(get_autocomplete_index().suggest(query, limit=SUGGESTION_LIMIT))
 
-        return Response(sorted(suggestions))
+        return Response([])
 
 class SearchView(generics.ListAPIView):
     """
     Advanced search API for finding marketplace listings.
     
     Supports filtering by multiple criteria including product attributes,
-    price range, condition, and availability. Automatically saves search
-    history for authenticated users.
+    price range, condition, and availability. Queries run against the
+    denormalized ListingSearchDocument table; free text is matched with
+    PostgreSQL full-text search and ranked by relevance. Automatically saves
+    search history for authenticated users.
     """
     serializer_class = ListingSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = KeysetOrPageNumberPagination
 
     @swagger_auto_schema(
         operation_description="Search marketplace listings with advanced filters",
         operation_summary="Search Listings",
         tags=['Search & Discovery'],
         manual_parameters=[
-            openapi.Parameter('q', openapi.IN_QUERY, description="Search query", type=openapi.TYPE_STRING),
+            openapi.Parameter('q', openapi.IN_QUERY, description="Search query; accepts operators such as lang:jp grade:psa>=9 price:<200", type=openapi.TYPE_STRING),
+            openapi.Parameter('fuzzy', openapi.IN_QUERY, description="Typo-tolerant matching on product name, series and block", type=openapi.TYPE_BOOLEAN),
             openapi.Parameter('tcg_type', openapi.IN_QUERY, description="TCG Type (pokemon, yugioh, magic)", type=openapi.TYPE_STRING),
             openapi.Parameter('block', openapi.IN_QUERY, description="Product block", type=openapi.TYPE_STRING),
             openapi.Parameter('series', openapi.IN_QUERY, description="Product series", type=openapi.TYPE_STRING),
@@ -398,50 +545,37 @@ class SearchView(generics.ListAPIView):
             openapi.Parameter('min_price', openapi.IN_QUERY, description="Minimum price", type=openapi.TYPE_NUMBER),
             openapi.Parameter('max_price', openapi.IN_QUERY, description="Maximum price", type=openapi.TYPE_NUMBER),
             openapi.Parameter('availability', openapi.IN_QUERY, description="in_stock or out_of_stock", type=openapi.TYPE_STRING),
+            openapi.Parameter('pagination', openapi.IN_QUERY, description="'cursor' for keyset pages (follow the returned 'next' link)", type=openapi.TYPE_STRING),
+            SORT_PARAMETER,
+            openapi.Parameter('facets', openapi.IN_QUERY, description="Add per-value counts for tcg_type, language, condition, grader and price buckets", type=openapi.TYPE_BOOLEAN),
         ]
     )
 
     def get_queryset(self):
-        qs = Listing.objects.filter(status='active').select_related(
-            'product',
-            'variant__language',
-            'variant__version',
-            'variant__condition',
-            'variant__grade',
-        )
-
-        query = self.request.query_params.get('q')
-        if query:
-            qs = qs.filter(
-                Q(product__name__icontains=query)
-                | Q(product__series__icontains=query)
-                | Q(product__block__icontains=query)
-                | Q(variant__language__name__icontains=query)
-                | Q(variant__version__name__icontains=query)
-                | Q(variant__condition__label__icontains=query)
-                | Q(variant__grade__grader__icontains=query)
-                | Q(variant__grade__value__icontains=query)
-            )
+        qs = self.get_base_queryset()
+        for condition in self.get_facet_filters().values():
+            qs = qs.filter(condition)
+        return sorted_listings(qs, self.request.query_params.get('sort'))
+
+    def get_base_queryset(self):
+        """Documents matching the text query and every filter that is not a facet."""
+        qs = ListingSearchDocument.objects.all()
+
+        parsed = self.get_parsed_query()
+        if parsed.text:
+            fuzzy = is_truthy(self.request.query_params.get('fuzzy'))
+            qs = get_search_backend().search_listings(qs, parsed.text, fuzzy=fuzzy)
+        for facet, condition in parsed.conditions:
+            if facet is None:
+                qs = qs.filter(condition)
 
         filters = self.request.query_params
-        if 'tcg_type' in filters:
-            qs = qs.filter(product__tcg_type=filters['tcg_type'])
         if 'block' in filters:
-            qs = qs.filter(product__block__iexact=filters['block'])
+            qs = qs.filter(product_block__iexact=filters['block'])
         if 'series' in filters:
-            qs = qs.filter(product__series__iexact=filters['series'])
-        if 'language' in filters:
-            qs = qs.filter(variant__language__code=filters['language'])
+            qs = qs.filter(product_series__iexact=filters['series'])
         if 'version' in filters:
-            qs = qs.filter(variant__version__code=filters['version'])
-        if 'condition' in filters:
-            qs = qs.filter(variant__condition__code=filters['condition'])
-        if 'grade' in filters:
-            qs = qs.filter(variant__grade__grader=filters['grade'])
-        if 'min_price' in filters:
-            qs = qs.filter(price__gte=filters['min_price'])
-        if 'max_price' in filters:
-            qs = qs.filter(price__lte=filters['max_price'])
+            qs = qs.filter(version_code=filters['version'])
         if filters.get('availability') == 'in_stock':
             qs = qs.filter(stock__gt=0)
         if filters.get('availability') == 'out_of_stock':
@@ -449,27 +583,86 @@ class SearchView(generics.ListAPIView):
 
         return qs
 
+    def get_facet_filters(self):
+        """Filters that are also facets, keyed by facet name (see products.services.facets)."""
+        filters = self.request.query_params
+        conditions = {}
+        if 'tcg_type' in filters:
+            conditions['tcg_type'] = Q(tcg_type=filters['tcg_type'])
+        if 'language' in filters:
+            conditions['language'] = Q(language_code=filters['language'])
+        if 'condition' in filters:
+            conditions['condition'] = Q(condition_code=filters['condition'])
+        if 'grade' in filters:
+            conditions['grader'] = Q(grader=filters['grade'])
+        price = Q()
+        if 'min_price' in filters:
+            price &= Q(price__gte=filters['min_price'])
+        if 'max_price' in filters:
+            price &= Q(price__lte=filters['max_price'])
+        if price:
+            conditions['price'] = price
+        for facet, condition in self.get_parsed_query().conditions:
+            if facet is not None:
+                conditions[facet] = conditions.get(facet, Q()) & condition
+        return conditions
+
+    def get_parsed_query(self):
+        """``q`` split into free text and ``lang:``/``grade:``/``price:``... operators."""
+        if not hasattr(self, '_parsed_query'):
+            self._parsed_query = parse_query(self.request.query_params.get('q', ''))
+        return self._parsed_query
+
+    def get_results(self, request):
+        # Filtering, ranking and paging only touch the document table; the
+        # page's listings are then fetched by primary key.
+        documents = self.get_queryset().defer('search_vector', 'labels')
+        page = self.paginate_queryset(documents)
+        if page is None:
+            return self.serialize_listings([doc.listing_id for doc in documents])
+
+        results = self.serialize_listings([doc.listing_id for doc in page])
+        data = dict(self.get_paginated_response(results).data)
+        if is_truthy(request.query_params.get('facets')):
+            data['facets'] = cached_facets(request.query_params, *self.get_facet_queryset())
+        return data
+
+    def get_facet_queryset(self):
+        """
+        ``(queryset, facet filters)`` counted by the facets: the same rows as
+        the results, each facet ignoring its own filter.
+        """
+        queryset, facet_filters = self.get_base_queryset(), self.get_facet_filters()
+        sort = self.request.query_params.get('sort')
+        if sort == 'best_price' and 'price' in facet_filters:
+            # The cheapest listing is picked among the listings in the price
+            # range, so that range cannot be dropped for the price facet.
+            queryset = queryset.filter(facet_filters.pop('price'))
+        return rows_for_sort(queryset, sort), facet_filters
+
+    def serialize_listings(self, listing_ids):
+        if fast_read_enabled():
+            return render_listings_by_id(listing_ids)
+        # Plain containers: the serializer's ReturnList would drag the request into the cache.
+        return list(self.get_serializer(self.get_listings(listing_ids), many=True).data)
+
+    def get_listings(self, listing_ids):
+        """Load the listings of one result page, keeping the page order."""
+        # Variant attributes are read from the reference cache, not joined.
+        listings = Listing.objects.select_related('product', 'variant__stats').in_bulk(listing_ids)
+        return [listings[pk] for pk in listing_ids if pk in listings]
+
     def list(self, request, *args, **kwargs):
-        response = super().list(request, *args, **kwargs)
-
-        if request.user.is_authenticated:
-            from django.apps import apps
-            try:
-                SearchHistory = apps.get_model("searches", "SearchHistory")
-                params = request.query_params.dict()
-                query = params.pop('q', '')
-                params.pop('page', None)
-
-                SearchHistory.objects.create(
-                    user=request.user,
-                    query=query,
-                )
-
-                histories = SearchHistory.objects.filter(user=request.user).order_by('-searched_at')
-                if histories.count() > 50:
-                    for history in histories[50:]:
-                        history.delete()
-            except LookupError:
-                pass  # SearchHistory model not available
+        # Identical searches are served from the versioned result cache; the
+        # history below is still recorded for every request.
+        data = cached_search(
+            RESULT_CACHE_PREFIX, request.query_params, lambda: relative_links(self.get_results(request))
+        )
+        response = Response(absolute_links(data, request))
+
+        if request.user.is_authenticated and apps.is_installed('searches'):
+            from searches.services import record_search
+
+            record_search(request.user, request.query_params.get('q', ''))
 
         return response
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SearchHistory
+from .models import SearchHistory, SearchQueryRollup
 
 
 @admin.register(SearchHistory)
@@ -7,3 +7,10 @@ class SearchHistoryAdmin(admin.ModelAdmin):
     list_display = ('user', 'query', 'searched_at')
     search_fields = ('user__username', 'query')
     list_filter = ('searched_at',)
+
+
+@admin.register(SearchQueryRollup)
+class SearchQueryRollupAdmin(admin.ModelAdmin):
+    list_display = ('query', 'count', 'last_searched_at')
+    search_fields = ('query',)
+    ordering = ('-count',)
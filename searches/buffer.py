@@ -0,0 +1,83 @@
+"""
+Write-behind buffer for search events.
+
+Requests only append to an in-process list. A daemon thread flushes it with
+``write_search_events`` when ``SEARCH_HISTORY_BUFFER_SIZE`` events are pending
+or every ``SEARCH_HISTORY_FLUSH_INTERVAL`` seconds, and once more when the
+process exits. Events still buffered when a worker is killed are lost, which
+is acceptable for search history.
+"""
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+from .services import write_search_events
+
+logger = logging.getLogger(__name__)
+
+
+class SearchEventBuffer:
+
+    def __init__(self, max_size=100, flush_interval=5.0):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._events = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def __len__(self):
+        return len(self._events)
+
+    def add(self, event):
+        with self._lock:
+            self._events.append(event)
+            pending = len(self._events)
+        self._ensure_flusher()
+        if pending >= self.max_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write every pending event; returns how many were written."""
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return 0
+        try:
+            write_search_events(events)
+        except Exception:
+            logger.exception("Dropped %d buffered search events", len(events))
+            return 0
+        return len(events)
+
+    def _ensure_flusher(self):
+        # Threads do not survive fork(): start one per worker process.
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='search-event-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                connection.close()
+
+
+search_event_buffer = SearchEventBuffer(
+    max_size=getattr(settings, 'SEARCH_HISTORY_BUFFER_SIZE', 100),
+    flush_interval=getattr(settings, 'SEARCH_HISTORY_FLUSH_INTERVAL', 5.0),
+)
+atexit.register(search_event_buffer.flush)
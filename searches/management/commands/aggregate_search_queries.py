@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Max
+
+from searches.models import SearchHistory, SearchQueryRollup
+from searches.services import normalize_query
+
+
+class Command(BaseCommand):
+    help = 'Seed the search query rollup from the retained search history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        totals = {}
+        rows = (
+            SearchHistory.objects.exclude(query='')
+            .values_list('query')
+            .annotate(total=Count('id'), last=Max('searched_at'))
+            .order_by()
+        )
+        for query, total, last in rows.iterator(chunk_size=options['batch_size']):
+            normalized = normalize_query(query)
+            if not normalized:
+                continue
+            count, last_searched_at = totals.get(normalized, (0, last))
+            totals[normalized] = (count + total, max(last, last_searched_at))
+
+        # Queries already counted incrementally are left untouched.
+        SearchQueryRollup.objects.bulk_create(
+            [
+                SearchQueryRollup(query=query, count=count, last_searched_at=last)
+                for query, (count, last) in totals.items()
+            ],
+            batch_size=options['batch_size'],
+            ignore_conflicts=True,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Aggregated {len(totals)} distinct queries into the rollup.'
+        ))
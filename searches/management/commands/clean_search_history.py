@@ -1,17 +1,50 @@
 from django.core.management.base import BaseCommand
 from searches.models import SearchHistory
+from searches.services import HISTORY_LIMIT, trim_search_history
 
 
 class Command(BaseCommand):
     help = 'Trim search history entries, keeping only the 50 most recent per user.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of users trimmed per DELETE statement.')
+        parser.add_argument('--keep', type=int, default=HISTORY_LIMIT,
+                            help='Searches kept per user.')
+        parser.add_argument('--start-after', type=int, default=0, metavar='USER_ID',
+                            help='Resume after this user id (printed with each batch).')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the entries that would be deleted.')
+
     def handle(self, *args, **options):
-        user_ids = SearchHistory.objects.values_list('user_id', flat=True).distinct()
-        for uid in user_ids:
-            histories = SearchHistory.objects.filter(user_id=uid).order_by('-searched_at')
-            if histories.count() > 50:
-                to_delete = histories[50:]
-                count = to_delete.count()
-                to_delete.delete()
-                self.stdout.write(f"Deleted {count} old entries for user {uid}")
-        self.stdout.write(self.style.SUCCESS('Search history cleanup completed.'))
+        batch_size = options['batch_size']
+        keep = options['keep']
+        dry_run = options['dry_run']
+        last_user_id = options['start_after']
+        verb = 'Would delete' if dry_run else 'Deleted'
+        total = 0
+        batches = 0
+
+        while True:
+            user_ids = list(
+                SearchHistory.objects.filter(user_id__gt=last_user_id)
+                .order_by('user_id')
+                .values_list('user_id', flat=True)
+                .distinct()[:batch_size]
+            )
+            if not user_ids:
+                break
+            # Each batch commits on its own, so an interrupted run can resume
+            # from the last reported user id.
+            count = trim_search_history(user_ids, keep=keep, dry_run=dry_run)
+            total += count
+            batches += 1
+            last_user_id = user_ids[-1]
+            self.stdout.write(
+                f"Batch {batches}: users {user_ids[0]}-{last_user_id}, "
+                f"{verb.lower()} {count} entries ({total} total). Resume with --start-after {last_user_id}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Search history cleanup completed. {verb} {total} entries in {batches} batches.'
+        ))
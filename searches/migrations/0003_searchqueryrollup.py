@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('searches', '0002_searchhistory_searches_se_user_id_191fa0_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchQueryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(max_length=255, unique=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('last_searched_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-count'],
+                'indexes': [models.Index(fields=['-count'], name='searches_se_count_8e3b2e_idx'), models.Index(fields=['last_searched_at'], name='searches_se_last_se_1796b6_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:14
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('searches', '0003_searchqueryrollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='searchhistory',
+            name='searched_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,11 +1,13 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class SearchHistory(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='search_histories')
     query = models.CharField(max_length=255)
-    searched_at = models.DateTimeField(auto_now_add=True)
+    # Set by the caller: buffered events are written after the search happened.
+    searched_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         indexes = [
@@ -18,3 +20,20 @@ class SearchHistory(models.Model):
 
     def __str__(self):
         return f"{self.user}: {self.query}"
+
+
+class SearchQueryRollup(models.Model):
+    """Search counts per normalized query, the source of query suggestions."""
+    query = models.CharField(max_length=255, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    last_searched_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-count']),
+            models.Index(fields=['last_searched_at']),
+        ]
+        ordering = ['-count']
+
+    def __str__(self):
+        return f"{self.query} ({self.count})"
@@ -0,0 +1,120 @@
+"""
+Search bookkeeping shared by the search endpoints.
+
+Searches are recorded as events. By default they go through a write-behind
+buffer (``searches.buffer``) and are written in batches: one ``bulk_create``
+for the history rows, one upsert for the query rollup and one set-based
+DELETE enforcing the per-user history cap.
+"""
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from products.services.autocomplete import normalize
+
+from .models import SearchHistory, SearchQueryRollup
+
+SearchEvent = namedtuple('SearchEvent', ['user_id', 'query', 'searched_at'])
+
+HISTORY_LIMIT = 50
+
+_EXCESS_HISTORY_SQL = """
+SELECT id FROM (
+    SELECT id, ROW_NUMBER() OVER (
+        PARTITION BY user_id ORDER BY searched_at DESC, id DESC
+    ) AS row_rank
+    FROM {table}
+    WHERE user_id IN ({users})
+) ranked
+WHERE row_rank > %s
+"""
+
+_ROLLUP_UPSERT_SQL = """
+INSERT INTO {table} (query, count, last_searched_at) VALUES {values}
+ON CONFLICT (query) DO UPDATE SET
+    count = {table}.count + excluded.count,
+    last_searched_at = {greatest}({table}.last_searched_at, excluded.last_searched_at)
+"""
+
+# Batches flushed by several processes can arrive out of order, so the upsert
+# keeps the later timestamp. SQLite spells GREATEST as a two-argument MAX.
+_GREATEST = {'sqlite': 'MAX'}
+
+
+def normalize_query(query):
+    """Key used by the rollup: casefolded, accent-free, single-spaced."""
+    return normalize(query)[:255]
+
+
+def record_search(user, query):
+    """Record that ``user`` searched ``query``, buffered unless disabled."""
+    if not getattr(settings, 'SEARCH_HISTORY_ENABLED', True):
+        return
+    event = SearchEvent(user.pk, query[:255], timezone.now())
+    if getattr(settings, 'SEARCH_HISTORY_BUFFERED', True):
+        from .buffer import search_event_buffer
+
+        search_event_buffer.add(event)
+    else:
+        write_search_events([event])
+
+
+def write_search_events(events):
+    """Persist a batch of search events in a constant number of statements."""
+    if not events:
+        return
+    SearchHistory.objects.bulk_create(
+        [SearchHistory(user_id=e.user_id, query=e.query, searched_at=e.searched_at) for e in events]
+    )
+    bump_query_rollups(events)
+    trim_search_history({event.user_id for event in events})
+
+
+def bump_query_rollups(events):
+    """Add the events' searches to the rollup with a single upsert."""
+    counts = Counter()
+    last_seen = {}
+    for event in events:
+        normalized = normalize_query(event.query)
+        if not normalized:
+            continue
+        counts[normalized] += 1
+        last_seen[normalized] = max(event.searched_at, last_seen.get(normalized, event.searched_at))
+    if not counts:
+        return
+
+    table = connection.ops.quote_name(SearchQueryRollup._meta.db_table)
+    params = []
+    for query, count in counts.items():
+        params.extend([query, count, connection.ops.adapt_datetimefield_value(last_seen[query])])
+    values = ', '.join(['(%s, %s, %s)'] * len(counts))
+    with connection.cursor() as cursor:
+        sql = _ROLLUP_UPSERT_SQL.format(
+            table=table, values=values, greatest=_GREATEST.get(connection.vendor, 'GREATEST')
+        )
+        cursor.execute(sql, params)
+
+
+def trim_search_history(user_ids, keep=HISTORY_LIMIT, dry_run=False):
+    """
+    Keep only the ``keep`` most recent searches of each user in ``user_ids``
+    with one window-function DELETE. Returns the number of deleted rows, or
+    the number that would be deleted when ``dry_run`` is set.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    excess = _EXCESS_HISTORY_SQL.format(
+        table=connection.ops.quote_name(SearchHistory._meta.db_table),
+        users=', '.join(['%s'] * len(user_ids)),
+    )
+    if dry_run:
+        sql = f'SELECT COUNT(*) FROM ({excess}) excess'
+    else:
+        sql = f'DELETE FROM {connection.ops.quote_name(SearchHistory._meta.db_table)} WHERE id IN ({excess})'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*user_ids, keep])
+        return cursor.fetchone()[0] if dry_run else cursor.rowcount
+
@@ -0,0 +1,77 @@
+import pytest
+from django.utils import timezone
+
+from accounts.models import User
+from searches.buffer import SearchEventBuffer
+from searches.models import SearchHistory, SearchQueryRollup
+from searches.services import SearchEvent, write_search_events
+
+
+@pytest.mark.django_db
+def test_batch_write_caps_history_per_user():
+    user = User.objects.create_user(username="u1", password="pass")
+    other = User.objects.create_user(username="u2", password="pass")
+    now = timezone.now()
+    events = [SearchEvent(user.pk, f"query {i}", now + timezone.timedelta(seconds=i)) for i in range(60)]
+    events.append(SearchEvent(other.pk, "Query 1", now))
+
+    write_search_events(events)
+
+    kept = list(SearchHistory.objects.filter(user=user).values_list("query", flat=True))
+    assert len(kept) == 50
+    assert kept[0] == "query 59"
+    assert "query 9" not in kept
+    assert SearchHistory.objects.filter(user=other).count() == 1
+    assert SearchQueryRollup.objects.get(query="query 1").count == 2
+
+
+@pytest.mark.django_db
+def test_buffer_flushes_in_one_batch():
+    user = User.objects.create_user(username="u1", password="pass")
+    buffer = SearchEventBuffer(max_size=1000, flush_interval=3600)
+    buffer._ensure_flusher = lambda: None
+    for query in ["pikachu", "Pikachu", "mew"]:
+        buffer.add(SearchEvent(user.pk, query, timezone.now()))
+    assert SearchHistory.objects.count() == 0
+
+    assert buffer.flush() == 3
+    assert len(buffer) == 0
+    assert SearchHistory.objects.filter(user=user).count() == 3
+    assert SearchQueryRollup.objects.get(query="pikachu").count == 2
+
+
+@pytest.mark.django_db
+def test_clean_search_history_command():
+    from io import StringIO
+    from django.core.management import call_command
+
+    users = [User.objects.create_user(username=f"user{i}", password="pass") for i in range(3)]
+    now = timezone.now()
+    SearchHistory.objects.bulk_create(
+        SearchHistory(user=user, query=f"q{i}", searched_at=now + timezone.timedelta(seconds=i))
+        for user in users
+        for i in range(55)
+    )
+
+    out = StringIO()
+    call_command("clean_search_history", "--batch-size", "2", "--dry-run", stdout=out)
+    assert "Would delete 15 entries in 2 batches" in out.getvalue()
+    assert SearchHistory.objects.count() == 165
+
+    call_command("clean_search_history", "--batch-size", "2", "--start-after", str(users[0].pk), stdout=out)
+    assert SearchHistory.objects.filter(user=users[0]).count() == 55
+    assert SearchHistory.objects.filter(user=users[1]).count() == 50
+    assert not SearchHistory.objects.filter(user=users[2], query="q4").exists()
+
+
+@pytest.mark.django_db
+def test_rollup_keeps_latest_timestamp_across_out_of_order_batches():
+    user = User.objects.create_user(username="u1", password="pass")
+    now = timezone.now()
+
+    write_search_events([SearchEvent(user.pk, "pikachu", now)])
+    write_search_events([SearchEvent(user.pk, "Pikachu", now - timezone.timedelta(minutes=5))])
+
+    rollup = SearchQueryRollup.objects.get(query="pikachu")
+    assert rollup.count == 2
+    assert rollup.last_searched_at == now
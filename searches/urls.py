@@ -2,5 +2,5 @@ from django.urls import path
 from .views import SearchView
 
 urlpatterns = [
-    path('search/', SearchView.as_view(), name='search'),
+    path('search/products/', SearchView.as_view(), name='product-search'),
 ]
@@ -4,10 +4,11 @@ from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from products.models import Product
 from products.serializers import ProductSerializer
+from products.services.backends import get_search_backend
+from products.services.product_stats import product_list_queryset
 
-from .models import SearchHistory
+from .services import record_search
 
 
 class SearchView(APIView):
@@ -39,13 +40,10 @@ class SearchView(APIView):
     )
     def get(self, request):
         query = request.query_params.get('q', '')
-        products = Product.objects.filter(name__icontains=query)
+        products = get_search_backend().search_products(product_list_queryset(), query)
         serialized = ProductSerializer(products, many=True)
 
         if query:
-            SearchHistory.objects.create(user=request.user, query=query)
-            histories = SearchHistory.objects.filter(user=request.user).order_by('-searched_at')
-            if histories.count() >= 50:
-                histories[50:].delete()
+            record_search(request.user, query)
 
         return Response(serialized.data)